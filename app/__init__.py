@@ -1,23 +1,38 @@
 # app/__init__.py
 from flask import Flask, jsonify, send_from_directory
+import atexit
 import logging
+from app.config import Config
 from app.utils.error_handling import handle_error
-from app.api.scene_api import scene_api
+from app.api.scene_api import scene_api, scene_service
 from app.api.word_api import word_api
 from app.api.story_api import story_api
+from app.services.service_container import ServiceContainer
 
 
-def create_app():
+def create_app(testing: bool = False):
     """
     创建并配置 Flask 应用
+    Args:
+        testing (bool): 测试模式: 设置 TESTING，不启动词表文件监视，不注册退出时的清理。
     """
     app = Flask(__name__, static_folder="static")
     app.debug = True
+    app.config["TESTING"] = testing
     # 配置日志
     logging.basicConfig(
         level=logging.DEBUG,
         format="%(asctime)s - %(levelname)s - %(filename)s - %(lineno)d - %(message)s",
     )
+    # 创建应用级服务容器，所有蓝图共享同一组服务对象
+    service_container = ServiceContainer(scene_service=scene_service)
+    app.extensions["service_container"] = service_container
+    if not app.testing:
+        # words.json 变化时在后台重新加载词表，无需重启进程
+        if Config.WORDS_WATCH_ENABLED:
+            service_container.word_service.start_watching()
+        # 进程退出时停止后台线程，并写入故事存储中尚未写入的修改
+        atexit.register(service_container.close)
     # 注册 Blueprint
     app.register_blueprint(word_api)
     app.register_blueprint(scene_api)
@@ -1,24 +1,24 @@
 # app/api/story_api.py
-from flask import Blueprint, request, jsonify
-from app.services.story_service import StoryService
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.utils.error_handling import handle_error
 from app.utils.api_key_auth import api_key_required
 from app.config import Config
-from app.services.word_service import WordService
-from app.services.scene_service import SceneService
-from app.utils.literacy_calculator import LiteracyCalculator
-from app.services.ai_service_factory import AIServiceFactory  # 导入 AIServiceFactory
+from app.services.service_container import get_service_container
+from app.services.cached_ai_service import bypass_generation_cache
+from app.services.job_queue import JobQueueFullError
+from app.services.resilient_ai_service import AIServiceUnavailableError
+from app.utils.rate_limiter import track_queue_wait
 from app.models.story_model import StoryModel  # 确保导入 StoryModel
+import json
 import logging
 
 story_api = Blueprint("story_api", __name__, url_prefix="/api/v1/stories")
 
+# 响应头: 这次请求在 AI 服务限流队列中等待的总时间 (毫秒)
+QUEUE_WAIT_HEADER = "X-Queue-Wait-Ms"
 
-# 初始化 StoryService
-# 为了避免循环依赖，在这里初始化依赖
-word_service = WordService()
-scene_service = SceneService()
-# literacy_calculator = LiteracyCalculator(word_service)  #  移动到 key_word_ids 验证之后
+# WordService、SceneService、LiteracyCalculator 和按 AI 服务缓存的 StoryService
+# 都由 create_app() 创建的 ServiceContainer 提供，请求之间共享
 
 
 @story_api.route("/generate", methods=["POST"])
@@ -32,130 +32,165 @@ def generate_story():
         if not data:
             return handle_error(400, "Missing request body")
 
-        vocabulary_level = data.get("vocabulary_level")
-        scene_id = data.get("scene_id")
-        story_word_count = data.get("story_word_count")
-        new_word_rate = data.get("new_word_rate")
-        key_word_ids = data.get("key_word_ids", [])
-        new_word_rate_tolerance = data.get("new_word_rate_tolerance")
-        story_word_count_tolerance = data.get("story_word_count_tolerance")
-        ai_service_name = data.get("ai_service", "gemini")  # 默认使用 gemini
-        multiplier = data.get("multiplier")  # 获取倍率参数， 允许为空
-
-        # 验证参数是否存在
-        if not vocabulary_level:
-            return handle_error(400, "Missing required field: 'vocabulary_level'")
-        if not scene_id:
-            return handle_error(400, "Missing required field: 'scene_id'")
-        if not story_word_count:
-            return handle_error(400, "Missing required field: 'story_word_count'")
-        if not new_word_rate:
-            return handle_error(400, "Missing required field: 'new_word_rate'")
-
-        # 验证参数类型
-        if not isinstance(vocabulary_level, int):
-            return handle_error(
-                400, "Invalid field type: 'vocabulary_level' must be an integer"
-            )
-        if not isinstance(scene_id, str):
-            return handle_error(400, "Invalid field type: 'scene_id' must be a string")
-        if not isinstance(story_word_count, int):
-            return handle_error(
-                400, "Invalid field type: 'story_word_count' must be an integer"
-            )
-        if not isinstance(new_word_rate, float):
-            return handle_error(
-                400, "Invalid field type: 'new_word_rate' must be a float"
-            )
-        if key_word_ids and not isinstance(key_word_ids, list):
-            return handle_error(
-                400, "Invalid field type: 'key_word_ids' must be a list"
-            )
-
-        # 验证参数取值范围
-        if not 1 <= vocabulary_level <= 300:
-            return handle_error(
-                400, "Validation failed: 'vocabulary_level' must be between 1 and 300"
-            )
-        if not 0 <= new_word_rate <= 1:
-            return handle_error(
-                400, "Validation failed: 'new_word_rate' must be between 0 and 1"
-            )
-
-        if new_word_rate_tolerance is not None and not isinstance(
-            new_word_rate_tolerance, float
-        ):
-            return handle_error(
-                400,
-                "Invalid field type: 'new_word_rate_tolerance' must be a float",
-            )
-
-        if story_word_count_tolerance is not None and not isinstance(
-            story_word_count_tolerance, int
-        ):
-            return handle_error(
-                400,
-                "Invalid field type: 'story_word_count_tolerance' must be a integer",
-            )
-
-        if multiplier is not None:  # 如果 multiplier 不为空， 则验证其类型
-            if not isinstance(multiplier, (int, float)):
-                return handle_error(
-                    400, "Invalid field type: 'multiplier' must be a number"
-                )
-        else:
-            multiplier = 1.2  # 如果 multiplier 为空， 则使用默认值 1.2
-
+        container = get_service_container()
+        spec, error_message = parse_generate_request(data, container.word_service)
+        if error_message:
+            return handle_error(400, error_message)
+        ai_service_name = spec["ai_service"]
         try:
-            #  创建 AI 服务对象
-            ai_service = AIServiceFactory.create_ai_service(
-                ai_service_name=ai_service_name,
-            )
+            #  获取使用该 AI 服务的 StoryService (按 AI 服务缓存)
+            story_service = container.get_story_service(ai_service_name)
         except ValueError as e:
             return handle_error(400, str(e))
 
-        # 获取目标级别词汇
-        target_words = word_service.get_words(chaotong_level=vocabulary_level)
-        target_word_ids = {word.id for word in target_words}
-
-        print(f"vocabulary_level: {vocabulary_level}")
-        print(f"target_word_ids: {target_word_ids}")
-        print(f"key_word_ids: {key_word_ids}")
-
-        # 验证 key_word_ids 是否属于目标级别
-        for word_id in key_word_ids:
-            if word_id not in target_word_ids:
-                error_message = f"关键词 ID {word_id} 不属于词汇级别 {vocabulary_level}"
-                print(error_message)
-                return handle_error(
-                    400,
-                    error_message,
+        generate_kwargs = spec["kwargs"]
+        with bypass_generation_cache(not spec["use_cache"]):
+            if spec["async"]:
+                # 在任务队列的工作线程中生成，不占用当前请求线程
+                return _submit_job(
+                    container,
+                    "generate",
+                    lambda: story_service.generate_story(**generate_kwargs).to_dict(),
                 )
+            with track_queue_wait() as queue_wait:
+                story = story_service.generate_story(
+                    **generate_kwargs
+                )  # 移除 request_limit
 
-        # 移动 literacy_calculator 的初始化到这里
-        literacy_calculator = LiteracyCalculator(word_service)
-
-        story_service = StoryService(
-            word_service=word_service,
-            scene_service=scene_service,
-            literacy_calculator=literacy_calculator,  # 使用更新后的 literacy_calculator
-            ai_service=ai_service,  # 传递 AI 服务对象
+        response = jsonify(
+            {
+                "code": 200,
+                "message": "Story generated successfully",
+                "data": story.to_dict(),
+            }
         )
+        response.headers[QUEUE_WAIT_HEADER] = str(queue_wait.milliseconds)
+        return response
+    except AIServiceUnavailableError as e:
+        logging.warning(f"AI service unavailable: {e}")
+        return handle_error(503, str(e))
+    except Exception as e:
+        logging.error(f"Error generating story: {e}")
+        return handle_error(500, f"Internal server error: {str(e)}")
 
-        # 获取已学词汇数量
-        known_words = word_service.get_words_below_level(vocabulary_level)
-        known_word_count = len(known_words)
 
-        # 定义合理的字数范围
-        max_word_count = int(
-            known_word_count * multiplier
-        )  # 用户要求的字数不能超过已学词汇数量的 multiplier 倍, 取整
+def parse_generate_request(data, word_service):
+    """
+    验证生成故事的请求参数。
+
+    Args:
+        data: 请求体 (或批量请求中的一项)。
+        word_service: 用于验证关键词和字数的 WordService。
+    Returns:
+        (spec, error_message): 验证通过时 spec 包含 ai_service、use_cache、async 和
+        传给 StoryService.generate_story 的 kwargs，error_message 为 None；
+        否则 spec 为 None，error_message 为错误信息。
+    """
+    vocabulary_level = data.get("vocabulary_level")
+    scene_id = data.get("scene_id")
+    story_word_count = data.get("story_word_count")
+    new_word_rate = data.get("new_word_rate")
+    key_word_ids = data.get("key_word_ids", [])
+    new_word_rate_tolerance = data.get("new_word_rate_tolerance")
+    story_word_count_tolerance = data.get("story_word_count_tolerance")
+    ai_service_name = data.get("ai_service", "gemini")  # 默认使用 gemini
+    use_cache = data.get("use_cache", True)  # false 表示不使用缓存的生成结果
+    run_async = data.get("async", False)  # true 表示提交异步任务，立即返回任务 ID
+    multiplier = data.get("multiplier")  # 获取倍率参数， 允许为空
+    max_attempts = data.get("max_attempts")  # 生词率或词数不满足要求时最多生成几次
+
+    # 验证参数是否存在
+    if not vocabulary_level:
+        return None, "Missing required field: 'vocabulary_level'"
+    if not scene_id:
+        return None, "Missing required field: 'scene_id'"
+    if not story_word_count:
+        return None, "Missing required field: 'story_word_count'"
+    if not new_word_rate:
+        return None, "Missing required field: 'new_word_rate'"
+
+    # 验证参数类型
+    if not isinstance(vocabulary_level, int):
+        return None, "Invalid field type: 'vocabulary_level' must be an integer"
+    if not isinstance(scene_id, str):
+        return None, "Invalid field type: 'scene_id' must be a string"
+    if not isinstance(story_word_count, int):
+        return None, "Invalid field type: 'story_word_count' must be an integer"
+    if not isinstance(new_word_rate, float):
+        return None, "Invalid field type: 'new_word_rate' must be a float"
+    if key_word_ids and not isinstance(key_word_ids, list):
+        return None, "Invalid field type: 'key_word_ids' must be a list"
+
+    # 验证参数取值范围
+    if not 1 <= vocabulary_level <= 300:
+        return None, "Validation failed: 'vocabulary_level' must be between 1 and 300"
+    if not 0 <= new_word_rate <= 1:
+        return None, "Validation failed: 'new_word_rate' must be between 0 and 1"
+
+    if new_word_rate_tolerance is not None and not isinstance(
+        new_word_rate_tolerance, float
+    ):
+        return None, "Invalid field type: 'new_word_rate_tolerance' must be a float"
+
+    if story_word_count_tolerance is not None and not isinstance(
+        story_word_count_tolerance, int
+    ):
+        return (
+            None,
+            "Invalid field type: 'story_word_count_tolerance' must be a integer",
+        )
 
-        # 进行校验
-        if story_word_count > max_word_count:
-            return handle_error(400, "字数要求过多")
+    if not isinstance(use_cache, bool):
+        return None, "Invalid field type: 'use_cache' must be a boolean"
+    if not isinstance(run_async, bool):
+        return None, "Invalid field type: 'async' must be a boolean"
+    if max_attempts is not None:
+        if not isinstance(max_attempts, int) or isinstance(max_attempts, bool):
+            return None, "Invalid field type: 'max_attempts' must be an integer"
+        if not 1 <= max_attempts <= Config.STORY_MAX_ATTEMPTS_LIMIT:
+            return (
+                None,
+                f"Validation failed: 'max_attempts' must be between 1 and {Config.STORY_MAX_ATTEMPTS_LIMIT}",
+            )
 
-        story = story_service.generate_story(
+    if multiplier is not None:  # 如果 multiplier 不为空， 则验证其类型
+        if not isinstance(multiplier, (int, float)):
+            return None, "Invalid field type: 'multiplier' must be a number"
+    else:
+        multiplier = 1.2  # 如果 multiplier 为空， 则使用默认值 1.2
+
+    # 获取目标级别词汇
+    target_words = word_service.get_words(chaotong_level=vocabulary_level)
+    target_word_ids = {word.id for word in target_words}
+
+    print(f"vocabulary_level: {vocabulary_level}")
+    print(f"target_word_ids: {target_word_ids}")
+    print(f"key_word_ids: {key_word_ids}")
+
+    # 验证 key_word_ids 是否属于目标级别
+    for word_id in key_word_ids:
+        if word_id not in target_word_ids:
+            error_message = f"关键词 ID {word_id} 不属于词汇级别 {vocabulary_level}"
+            print(error_message)
+            return None, error_message
+
+    # 获取已学词汇数量
+    known_word_count = word_service.count_words_below_level(vocabulary_level)
+
+    # 定义合理的字数范围
+    max_word_count = int(
+        known_word_count * multiplier
+    )  # 用户要求的字数不能超过已学词汇数量的 multiplier 倍, 取整
+
+    # 进行校验
+    if story_word_count > max_word_count:
+        return None, "字数要求过多"
+
+    spec = {
+        "ai_service": ai_service_name,
+        "use_cache": use_cache,
+        "async": run_async,
+        "kwargs": dict(
             vocabulary_level=vocabulary_level,
             scene_id=scene_id,
             story_word_count=story_word_count,
@@ -163,19 +198,162 @@ def generate_story():
             key_word_ids=key_word_ids,
             new_word_rate_tolerance=new_word_rate_tolerance,
             story_word_count_tolerance=story_word_count_tolerance,
-        )  # 移除 request_limit
+            max_attempts=max_attempts,
+        ),
+    }
+    return spec, None
+
+
+@story_api.route("/generate/batch", methods=["POST"])
+@api_key_required
+def generate_stories_batch():
+    """
+    批量生成故事。请求体为 {"items": [生成参数, ...]}，每项的参数与 /generate 相同。
 
-        return jsonify(
+    各项并发生成，响应为 NDJSON 流: 每完成一项输出一行
+    {"index", "status": "succeeded", "data"} 或 {"index", "status": "failed", "error"}，
+    最后一行为 {"status": "done", "total", "succeeded", "failed"}。
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return handle_error(400, "Missing request body")
+        items = data.get("items") if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            return handle_error(
+                400, "Invalid field type: 'items' must be a non-empty list"
+            )
+        if len(items) > Config.BATCH_MAX_ITEMS:
+            return handle_error(
+                400,
+                f"Validation failed: 'items' must contain at most {Config.BATCH_MAX_ITEMS} items",
+            )
+
+        container = get_service_container()
+        specs, indexes, errors = [], [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append((index, "Invalid item: must be an object"))
+                continue
+            spec, error_message = parse_generate_request(item, container.word_service)
+            if not error_message and spec["async"]:
+                error_message = "Validation failed: 'async' is not supported in a batch"
+            if not error_message:
+                try:
+                    container.get_story_service(spec["ai_service"])
+                except ValueError as e:
+                    error_message = str(e)
+            if error_message:
+                errors.append((index, error_message))
+            else:
+                specs.append(spec)
+                indexes.append(index)
+    except Exception as e:
+        logging.error(f"Error generating stories: {e}")
+        return handle_error(500, f"Internal server error: {str(e)}")
+
+    def generate():
+        succeeded = 0
+        for index, error_message in errors:
+            yield _ndjson({"index": index, "status": "failed", "error": error_message})
+        for position, story, error in container.batch_generator.generate(specs):
+            if error is None:
+                succeeded += 1
+                yield _ndjson(
+                    {
+                        "index": indexes[position],
+                        "status": "succeeded",
+                        "data": story.to_dict(),
+                    }
+                )
+            else:
+                yield _ndjson(
+                    {
+                        "index": indexes[position],
+                        "status": "failed",
+                        "error": str(error),
+                    }
+                )
+        yield _ndjson(
             {
-                "code": 200,
-                "message": "Story generated successfully",
-                "data": story.to_dict(),
+                "status": "done",
+                "total": len(items),
+                "succeeded": succeeded,
+                "failed": len(items) - succeeded,
             }
         )
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def _ndjson(data) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+@story_api.route("/generate/stream", methods=["POST"])
+@api_key_required
+def generate_story_stream():
+    """
+    流式生成故事 (Server-Sent Events)，请求参数与 /generate 相同。
+
+    AI 服务输出的文本以 token 事件 {"text"} 逐段发送；完整的故事计算生词率并保存后
+    发送 scored 事件 (data 与 /generate 响应的 data 相同)；失败时发送 error 事件 {"message"}。
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return handle_error(400, "Missing request body")
+
+        container = get_service_container()
+        spec, error_message = parse_generate_request(data, container.word_service)
+        if error_message:
+            return handle_error(400, error_message)
+        if spec["async"]:
+            return handle_error(
+                400, "Validation failed: 'async' is not supported for streaming"
+            )
+        # 已经发送的文本不能撤回，流式生成只生成一次
+        if (spec["kwargs"].pop("max_attempts") or 1) > 1:
+            return handle_error(
+                400, "Validation failed: 'max_attempts' is not supported for streaming"
+            )
+        try:
+            story_service = container.get_story_service(spec["ai_service"])
+        except ValueError as e:
+            return handle_error(400, str(e))
+
+        with bypass_generation_cache(not spec["use_cache"]):
+            events = story_service.generate_story_stream(**spec["kwargs"])
+    except AIServiceUnavailableError as e:
+        logging.warning(f"AI service unavailable: {e}")
+        return handle_error(503, str(e))
     except Exception as e:
         logging.error(f"Error generating story: {e}")
         return handle_error(500, f"Internal server error: {str(e)}")
 
+    def generate():
+        # 立即发送响应头和一行注释，客户端不必等到模型输出第一段文本
+        yield ": generating\n\n"
+        try:
+            for event in events:
+                if event["event"] == "token":
+                    yield _sse("token", {"text": event["data"]})
+                else:
+                    yield _sse("scored", event["data"].to_dict())
+        except Exception as e:
+            logging.error(f"Error streaming story: {e}")
+            yield _sse("error", {"message": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @story_api.route("/rewrite", methods=["POST"])
 @api_key_required
@@ -192,6 +370,8 @@ def rewrite_story_endpoint():
         target_level = data.get("target_level")
         story_type = data.get("story_type", 2)  # 默认为 2 (中文绘本)
         ai_service_name = data.get("ai_service", "gemini")  # 默认使用 gemini
+        use_cache = data.get("use_cache", True)  # false 表示不使用缓存的生成结果
+        run_async = data.get("async", False)  # true 表示提交异步任务，立即返回任务 ID
 
         # --- 参数验证 ---
         if not original_story_id:
@@ -213,46 +393,137 @@ def rewrite_story_endpoint():
             return handle_error(
                 400, "Validation failed: 'target_level' must be between 1 and 300"
             )
+        if not isinstance(use_cache, bool):
+            return handle_error(
+                400, "Invalid field type: 'use_cache' must be a boolean"
+            )
+        if not isinstance(run_async, bool):
+            return handle_error(400, "Invalid field type: 'async' must be a boolean")
         # --- 参数验证结束 ---
 
+        container = get_service_container()
         try:
-            # 创建 AI 服务对象
-            ai_service = AIServiceFactory.create_ai_service(
-                ai_service_name=ai_service_name,
-            )
+            # 获取使用该 AI 服务的 StoryService (按 AI 服务缓存)
+            story_service = container.get_story_service(ai_service_name)
         except ValueError as e:
             return handle_error(400, str(e))
 
-        # 初始化依赖
-        # word_service 和 scene_service 已在蓝图级别初始化
-        literacy_calculator = LiteracyCalculator(word_service)
-
-        story_service = StoryService(
-            word_service=word_service,
-            scene_service=scene_service,
-            literacy_calculator=literacy_calculator,
-            ai_service=ai_service,
-        )
-
-        # 调用服务层进行改写
-        rewritten_story: StoryModel = story_service.rewrite_story(
+        rewrite_kwargs = dict(
             original_story_id=original_story_id,
             target_level=target_level,
             story_type=story_type,
         )
+        # 调用服务层进行改写
+        with bypass_generation_cache(not use_cache):
+            if run_async:
+                return _submit_job(
+                    container,
+                    "rewrite",
+                    lambda: _rewrite_story_job(story_service, rewrite_kwargs),
+                )
+            with track_queue_wait() as queue_wait:
+                rewritten_story: StoryModel = story_service.rewrite_story(
+                    **rewrite_kwargs
+                )
 
         if rewritten_story:
-            return jsonify(
+            response = jsonify(
                 {
                     "code": 200,
                     "message": "Story rewritten successfully",
                     "data": rewritten_story.to_dict(),
                 }
             )
+            response.headers[QUEUE_WAIT_HEADER] = str(queue_wait.milliseconds)
+            return response
         else:
             # rewrite_story 内部已记录详细错误，这里返回通用错误
             return handle_error(500, "Failed to rewrite story")
 
+    except AIServiceUnavailableError as e:
+        logging.warning(f"AI service unavailable: {e}")
+        return handle_error(503, str(e))
     except Exception as e:
         logging.exception(f"Error rewriting story: {e}")  # 使用 exception 记录堆栈信息
         return handle_error(500, f"Internal server error: {str(e)}")
+
+
+def _rewrite_story_job(story_service, rewrite_kwargs):
+    rewritten_story = story_service.rewrite_story(**rewrite_kwargs)
+    if not rewritten_story:
+        # rewrite_story 内部已记录详细错误
+        raise Exception("Failed to rewrite story")
+    return rewritten_story.to_dict()
+
+
+def _submit_job(container, kind, func):
+    """
+    把生成/改写提交到任务队列，返回 202 和任务 ID
+    """
+    try:
+        job = container.job_queue.submit(kind, func)
+    except JobQueueFullError as e:
+        logging.warning(f"Rejected {kind} job: {e}")
+        return handle_error(429, str(e))
+    return (
+        jsonify(
+            {
+                "code": 202,
+                "message": "Job submitted successfully",
+                "data": {
+                    "job_id": job.id,
+                    "status": job.status,
+                    "status_url": f"{story_api.url_prefix}/jobs/{job.id}",
+                },
+            }
+        ),
+        202,
+    )
+
+
+@story_api.route("/jobs/metrics", methods=["GET"])
+@api_key_required
+def get_job_metrics():
+    """
+    获取任务队列的深度和任务耗时等指标
+    """
+    return jsonify(
+        {
+            "code": 200,
+            "message": "Job metrics retrieved successfully",
+            "data": get_service_container().job_queue.get_metrics(),
+        }
+    )
+
+
+@story_api.route("/ai/metrics", methods=["GET"])
+@api_key_required
+def get_ai_metrics():
+    """
+    获取各 AI 服务的调用、重试、超时和熔断计数
+    """
+    return jsonify(
+        {
+            "code": 200,
+            "message": "AI service metrics retrieved successfully",
+            "data": get_service_container().get_ai_metrics(),
+        }
+    )
+
+
+@story_api.route("/jobs/<job_id>", methods=["GET"])
+@api_key_required
+def get_job(job_id):
+    """
+    获取异步生成/改写任务的状态和结果
+    """
+    job = get_service_container().job_queue.get_job(job_id)
+    if job is None:
+        return handle_error(404, f"Job {job_id} not found")
+    return jsonify(
+        {
+            "code": 200,
+            "message": "Job retrieved successfully",
+            "data": job.to_dict(),
+        }
+    )
@@ -1,6 +1,6 @@
 # app/api/word_api.py
 from flask import Blueprint, request, jsonify
-from app.services.word_service import WordService
+from app.services.service_container import get_service_container
 from app.utils.error_handling import handle_error
 from app.utils.api_key_auth import api_key_required
 import logging
@@ -8,8 +8,7 @@ import math
 
 word_api = Blueprint("word_api", __name__, url_prefix="/api/v1/words")
 
-# 初始化 WordService
-word_service = WordService()
+# WordService 由 create_app() 创建的 ServiceContainer 提供，与其他蓝图共享
 
 
 @word_api.route("", methods=["GET"])
@@ -19,6 +18,7 @@ def get_words():
     获取词语列表
     """
     try:
+        word_service = get_service_container().word_service
         chaotong_level = request.args.get("chaotong_level")
         part_of_speech = request.args.get("part_of_speech")
         page = request.args.get("page", default=1)
@@ -114,3 +114,23 @@ def get_words():
     except Exception as e:
         logging.error(f"Error getting words: {e}")
         return handle_error(500, f"Internal server error: {str(e)}")
+
+
+@word_api.route("/reload", methods=["POST"])
+@api_key_required
+def reload_words():
+    """
+    重新加载 words.json。新词表构建完成后才替换，正在进行的计算继续使用旧词表。
+    """
+    try:
+        result = get_service_container().word_service.reload()
+        return jsonify(
+            {
+                "code": 200,
+                "message": "Words reloaded successfully",
+                "data": result,
+            }
+        )
+    except Exception as e:
+        logging.error(f"Error reloading words: {e}")
+        return handle_error(500, f"Failed to reload words: {str(e)}")
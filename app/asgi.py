@@ -0,0 +1,262 @@
+# app/asgi.py
+import asyncio
+import json
+import logging
+import sys
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from flask import Flask
+from app.api.story_api import QUEUE_WAIT_HEADER, parse_generate_request
+from app.services.cached_ai_service import bypass_generation_cache
+from app.services.resilient_ai_service import AIServiceUnavailableError
+from app.utils.api_key_auth import check_api_key
+from app.utils.rate_limiter import track_queue_wait
+
+logger = logging.getLogger(__name__)
+
+
+class AsgiApplication:
+    """
+    ASGI 应用: 生成故事的请求在事件循环中原生异步处理，等待 AI 服务时不占用线程，
+    一个工作进程可以同时进行多个 AI 调用；其它请求交给 Flask (WSGI) 应用，
+    在线程池中处理 (包括流式响应)。
+    """
+
+    def __init__(self, flask_app: Flask):
+        """
+        初始化 AsgiApplication。
+
+        Args:
+            flask_app: create_app() 创建的 Flask 应用，两种请求共享它的 ServiceContainer。
+        """
+        self.flask_app = flask_app
+        self.container = flask_app.extensions["service_container"]
+        # (method, path) -> 原生异步处理函数；返回 None 表示交给 Flask 处理
+        self.routes = {
+            ("POST", "/api/v1/stories/generate"): self.generate_story,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await _read_body(receive)
+        handler = self.routes.get((scope["method"], scope["path"]))
+        response = await handler(scope, body) if handler else None
+        if response is None:
+            await self._call_wsgi(scope, body, send)
+            return
+        await _send_json(send, *response)
+
+    async def generate_story(
+        self, scope, body: bytes
+    ) -> Optional[Tuple[int, Dict, Dict[str, str]]]:
+        """
+        生成故事 (POST /api/v1/stories/generate)，请求和响应与 Flask 视图相同；
+        "async": true 的请求交给 Flask 视图提交到任务队列。
+
+        Returns:
+            (status, payload, headers)，None 表示交给 Flask 处理。
+        """
+        error_message = check_api_key(_headers(scope).get("authorization"))
+        if error_message:
+            return _error(401, error_message)
+        try:
+            data = json.loads(body) if body else None
+            if not data:
+                return _error(400, "Missing request body")
+
+            spec, error_message = parse_generate_request(
+                data, self.container.word_service
+            )
+            if error_message:
+                return _error(400, error_message)
+            if spec["async"]:
+                return None
+            try:
+                story_service = self.container.get_story_service(spec["ai_service"])
+            except ValueError as e:
+                return _error(400, str(e))
+
+            with bypass_generation_cache(not spec["use_cache"]):
+                with track_queue_wait() as queue_wait:
+                    story = await story_service.agenerate_story(**spec["kwargs"])
+            return (
+                200,
+                {
+                    "code": 200,
+                    "message": "Story generated successfully",
+                    "data": story.to_dict(),
+                },
+                {QUEUE_WAIT_HEADER: str(queue_wait.milliseconds)},
+            )
+        except AIServiceUnavailableError as e:
+            logger.warning(f"AI service unavailable: {e}")
+            return _error(503, str(e))
+        except Exception as e:
+            logger.error(f"Error generating story: {e}")
+            return _error(500, f"Internal server error: {str(e)}")
+
+    async def _call_wsgi(self, scope, body: bytes, send):
+        """
+        在线程池中调用 Flask 应用，响应体按块发送 (流式响应不会被缓冲)。
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        environ = _build_environ(scope, body)
+
+        def put(kind, value=None):
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+
+        def start_response(status, headers, exc_info=None):
+            response_headers = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+            put("start", (int(status.split(" ", 1)[0]), response_headers))
+            return lambda data: put("body", data)
+
+        def run():
+            try:
+                result = self.flask_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if chunk:
+                            put("body", chunk)
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+            except Exception as e:
+                logger.error(f"Error handling {scope['method']} {scope['path']}: {e}")
+                put("error")
+            finally:
+                put("end")
+
+        worker = asyncio.ensure_future(asyncio.to_thread(run))
+        start = None
+        started = False
+        while True:
+            kind, value = await queue.get()
+            if kind == "start":
+                start = value
+                continue
+            if kind == "end":
+                break
+            if kind == "error":
+                if not started:
+                    start = (500, [(b"content-type", b"text/plain")])
+                    value = b"Internal server error"
+                else:
+                    continue
+            if not started:
+                await send(_response_start(*start))
+                started = True
+            await send({"type": "http.response.body", "body": value, "more_body": True})
+        if not started:
+            await send(_response_start(*start))
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        await worker
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.container.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app: Flask = None) -> AsgiApplication:
+    """
+    创建 ASGI 应用。
+
+    Args:
+        flask_app: 处理其它请求的 Flask 应用，默认调用 create_app() 创建。
+    """
+    if flask_app is None:
+        from app import create_app
+
+        flask_app = create_app()
+    return AsgiApplication(flask_app)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _headers(scope) -> Dict[str, str]:
+    return {
+        name.decode("latin-1").lower(): value.decode("latin-1")
+        for name, value in scope.get("headers", [])
+    }
+
+
+def _error(code: int, message: str) -> Tuple[int, Dict, Dict[str, str]]:
+    # 与 app.utils.error_handling.handle_error 的响应格式相同
+    return code, {"code": code, "message": message, "data": None}, {}
+
+
+def _response_start(status: int, headers: List[Tuple[bytes, bytes]]) -> Dict:
+    return {"type": "http.response.start", "status": status, "headers": headers}
+
+
+async def _send_json(send, status: int, payload: Dict, headers: Dict[str, str]):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    response_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ]
+    response_headers.extend(
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers.items()
+    )
+    await send(_response_start(status, response_headers))
+    await send({"type": "http.response.body", "body": body})
+
+
+def _build_environ(scope, body: bytes) -> Dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": "",
+        # WSGI 要求路径是按 latin-1 解码的原始字节
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
@@ -10,7 +10,78 @@ class Config:
     API_KEY = os.getenv("API_KEY")
     DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+
+    # AI 服务 HTTP 连接池: 每个 AI 服务最多同时打开的连接数
+    AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", 20))
+    # 连接池中保持 keep-alive 的空闲连接数
+    AI_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+        os.getenv("AI_HTTP_MAX_KEEPALIVE_CONNECTIONS", 10)
+    )
+    # 空闲连接保持的时间 (秒)
+    AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", 60))
+    # 建立连接的超时时间 (秒)
+    AI_HTTP_CONNECT_TIMEOUT = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", 10))
+    # 单次 AI 请求的总超时时间 (秒)，生成长故事可能需要较长时间
+    # 开启容错 (AI_RESILIENCE_ENABLED) 时不超过 AI_CALL_TIMEOUT，SDK 也不再自己重试
+    AI_HTTP_TIMEOUT = float(os.getenv("AI_HTTP_TIMEOUT", 120))
     
+    # AI 生成结果缓存: 相同的提示语在有效期内直接返回之前的生成结果
+    # 默认关闭: 开启后相同的生成请求返回同一个故事 (并以新的 story_id 再保存一次)
+    AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "False") == "True"
+    # 缓存有效期 (秒)
+    AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", 3600))
+    # 进程内缓存最多保存的生成结果数 (最近最少使用淘汰)
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", 256))
+    # 磁盘缓存最多保存的生成结果数 (超过时删除最早写入的条目)，0 表示不限制
+    AI_CACHE_DISK_MAX_ENTRIES = int(os.getenv("AI_CACHE_DISK_MAX_ENTRIES", 10000))
+    # 磁盘缓存每写入多少个条目清理一次过期和超出数量的条目
+    AI_CACHE_DISK_SWEEP_EVERY = int(os.getenv("AI_CACHE_DISK_SWEEP_EVERY", 16))
+
+    # AI 服务容错: 单次调用的截止时间、重试和熔断
+    AI_RESILIENCE_ENABLED = os.getenv("AI_RESILIENCE_ENABLED", "True") == "True"
+    # 单次调用的截止时间 (秒)，超过后放弃这次调用 (可以重试)
+    AI_CALL_TIMEOUT = float(os.getenv("AI_CALL_TIMEOUT", 60))
+    # 临时错误 (超时、连接错误、限流、服务端错误、无效 JSON) 的最多重试次数
+    AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", 2))
+    # 重试间隔: 指数退避的初始值和上限 (秒)
+    AI_RETRY_BACKOFF_BASE = float(os.getenv("AI_RETRY_BACKOFF_BASE", 0.5))
+    AI_RETRY_BACKOFF_MAX = float(os.getenv("AI_RETRY_BACKOFF_MAX", 8))
+    # 连续失败多少次后熔断 (0 表示不熔断)
+    AI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", 5))
+    # 熔断后经过多少秒允许一次试探调用
+    AI_CIRCUIT_RESET_TIMEOUT = float(os.getenv("AI_CIRCUIT_RESET_TIMEOUT", 30))
+    # 执行带截止时间的同步调用的线程数 (每个 AI 服务)
+    AI_CALL_WORKERS = int(os.getenv("AI_CALL_WORKERS", 32))
+
+    # 自动路由 (ai_service 为 auto): 参与路由的 AI 服务，没有统计数据时按这个顺序调用
+    AI_AUTO_BACKENDS = [
+        name.strip()
+        for name in os.getenv("AI_AUTO_BACKENDS", "gemini,deepseek").split(",")
+        if name.strip()
+    ]
+    # 按耗时和错误率路由时参考的每个 AI 服务最近调用数
+    AI_ROUTING_WINDOW = int(os.getenv("AI_ROUTING_WINDOW", 100))
+    # 对冲请求: 第一个 AI 服务超过耗时分位数仍未返回时，同时调用下一个 AI 服务
+    AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "True") == "True"
+    AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", 0.95))
+    # 发出对冲请求前至少等待的时间 (秒)
+    AI_HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", 1))
+    # 统计数据不足时发出对冲请求前等待的时间 (秒)
+    AI_HEDGE_DEFAULT_DELAY = float(os.getenv("AI_HEDGE_DEFAULT_DELAY", 30))
+
+    # 异步生成任务: 执行任务的工作线程数
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+    # 最多排队 (尚未开始执行) 的任务数，超过时拒绝新任务
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+    # 已完成任务的结果保留时间 (秒)
+    JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 3600))
+
+    # 批量生成: 一次请求最多包含的故事数
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 50))
+    # 批量生成时每个 AI 服务最多同时进行的调用数 (所有批量请求共享)
+    BATCH_CONCURRENCY_PER_BACKEND = int(os.getenv("BATCH_CONCURRENCY_PER_BACKEND", 4))
+
     # 如果是开发环境，可以设置 DEBUG = True
     DEBUG = os.getenv("DEBUG", False) == "True"
     # 配置其他
@@ -21,14 +92,76 @@ class Config:
     # API 请求频率限制
     REQUEST_LIMIT = int(os.getenv("REQUEST_LIMIT", 100))
 
+    # AI 服务客户端限流 (在容错层中，每次调用和重试发出前排队): 超过限制的调用按到达顺序排队，
+    # 而不是收到 AI 服务的 429 错误
+    AI_RATE_LIMIT_ENABLED = os.getenv("AI_RATE_LIMIT_ENABLED", "True") == "True"
+    # 每个 AI 服务每分钟的请求数 (默认 REQUEST_LIMIT)、每分钟的 token 数和同时进行的调用数，0 表示不限制
+    AI_RATE_LIMITS = {
+        "deepseek": {
+            "requests_per_minute": float(os.getenv("DEEPSEEK_RPM", REQUEST_LIMIT)),
+            "tokens_per_minute": float(os.getenv("DEEPSEEK_TPM", 0)),
+            "max_in_flight": int(os.getenv("DEEPSEEK_MAX_IN_FLIGHT", 16)),
+        },
+        "gemini": {
+            "requests_per_minute": float(os.getenv("GEMINI_RPM", REQUEST_LIMIT)),
+            "tokens_per_minute": float(os.getenv("GEMINI_TPM", 0)),
+            "max_in_flight": int(os.getenv("GEMINI_MAX_IN_FLIGHT", 16)),
+        },
+    }
+    # 最长排队时间 (秒)，超过时返回 503
+    AI_RATE_LIMIT_MAX_WAIT = float(os.getenv("AI_RATE_LIMIT_MAX_WAIT", 120))
+    # 估计 token 数: 提示语每多少个字符算一个 token，加上生成的故事估计使用的 token 数
+    AI_CHARS_PER_TOKEN = float(os.getenv("AI_CHARS_PER_TOKEN", 1))
+    AI_ESTIMATED_OUTPUT_TOKENS = int(os.getenv("AI_ESTIMATED_OUTPUT_TOKENS", 1000))
+
     # 故事字数容差值
     STORY_WORD_COUNT_TOLERANCE = int(os.getenv("STORY_WORD_COUNT_TOLERANCE", 20))
+    # 生成-验证循环: 生词率或词数超出容差时，把超出的生词反馈给 AI 服务重新生成
+    # 每个故事默认最多调用 AI 服务的次数 (1 表示只生成一次)，请求中的 max_attempts 不能超过上限
+    STORY_MAX_ATTEMPTS = int(os.getenv("STORY_MAX_ATTEMPTS", 1))
+    STORY_MAX_ATTEMPTS_LIMIT = int(os.getenv("STORY_MAX_ATTEMPTS_LIMIT", 5))
+    # 每个故事最多使用的 token 数 (估计值)，0 表示只受次数限制
+    STORY_TOKEN_BUDGET = int(os.getenv("STORY_TOKEN_BUDGET", 0))
+    # 反馈给 AI 服务的生词最多列出多少个
+    STORY_FEEDBACK_MAX_WORDS = int(os.getenv("STORY_FEEDBACK_MAX_WORDS", 30))
     # 获取当前文件(config.py)的绝对路径
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     # 加载词汇数据的路径
     WORDS_FILE_PATH = os.path.join(
         BASE_DIR, "..", os.getenv("WORDS_FILE_PATH", "app/data/words.json")
     )
+    # words.json 的预编译缓存 (内容变化时自动重建)，设置为空字符串可禁用
+    WORDS_CACHE_PATH = (
+        os.path.join(
+            BASE_DIR, "..", os.getenv("WORDS_CACHE_PATH", "app/data/words.cache")
+        )
+        if os.getenv("WORDS_CACHE_PATH", "app/data/words.cache")
+        else None
+    )
+    # 是否在后台监视 words.json 并自动重新加载词表 (测试时不启动)
+    WORDS_WATCH_ENABLED = os.getenv("WORDS_WATCH_ENABLED", "False") == "True"
+    # 每隔多少秒检查 words.json 是否变化并自动重新加载词表，0 表示不监视
+    WORDS_WATCH_INTERVAL = float(os.getenv("WORDS_WATCH_INTERVAL", 5))
+    # AI 生成结果的磁盘缓存目录 (进程重启后仍然有效)，设置为空字符串只使用进程内缓存
+    AI_CACHE_DIR = (
+        os.path.join(BASE_DIR, "..", os.getenv("AI_CACHE_DIR", "app/data/ai_cache"))
+        if os.getenv("AI_CACHE_DIR", "app/data/ai_cache")
+        else None
+    )
+    # 提示语模板目录
+    PROMPTS_DIR = os.path.join(BASE_DIR, "prompts")
+    # 编译后的提示语模板的字节码缓存目录，设置为空字符串可禁用
+    PROMPT_BYTECODE_CACHE_DIR = (
+        os.path.join(
+            BASE_DIR,
+            "..",
+            os.getenv("PROMPT_BYTECODE_CACHE_DIR", "app/data/prompt_cache"),
+        )
+        if os.getenv("PROMPT_BYTECODE_CACHE_DIR", "app/data/prompt_cache")
+        else None
+    )
+    # 按级别缓存的已知词汇提示语片段数 (最近最少使用淘汰)，默认可以容纳所有级别
+    KNOWN_WORDS_CACHE_SIZE = int(os.getenv("KNOWN_WORDS_CACHE_SIZE", 512))
     SCENES_FILE_PATH = os.path.join(
         BASE_DIR, "..", os.getenv("SCENES_FILE_PATH", "app/data/scenes.json")
     )
@@ -39,6 +172,26 @@ class Config:
         os.getenv("STORIES_FILE_PATH", "app/data/stories.json"),  
     )  
 
+    # 存储引擎: json (JSONStorage) 或 sqlite (SQLiteStorage)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json")
+    # sqlite 存储引擎使用的数据库文件
+    SQLITE_DB_PATH = os.path.join(
+        BASE_DIR, "..", os.getenv("SQLITE_DB_PATH", "app/data/storypal.db")
+    )
+    # JSON 存储模式: snapshot (每次修改重写整个文件) 或 journal (追加日志 + 定期压缩)
+    STORAGE_MODE = os.getenv("STORAGE_MODE", "snapshot")
+    # journal 模式下，日志累计多少条记录后压缩为快照
+    STORAGE_JOURNAL_COMPACT_THRESHOLD = int(
+        os.getenv("STORAGE_JOURNAL_COMPACT_THRESHOLD", 500)
+    )
+    # JSON 存储持久化级别: strict (每次修改立即写入并 fsync)、
+    # batched (合并写入并 fsync) 或 relaxed (合并写入，不 fsync)
+    STORAGE_DURABILITY = os.getenv("STORAGE_DURABILITY", "strict")
+    # batched/relaxed 模式下合并写入的时间窗口 (秒)
+    STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", 0.5))
+    # 多进程共享数据文件时，等待文件锁的最长时间 (秒)
+    STORAGE_LOCK_TIMEOUT = float(os.getenv("STORAGE_LOCK_TIMEOUT", 10))
+
 
 def get_api_key_from_config():
     return Config.API_KEY
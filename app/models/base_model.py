@@ -9,6 +9,10 @@ class BaseModel:
     所有数据模型的基类，提供通用的属性和方法。
     """
 
+    # 基类不定义 __dict__，子类可以用 __slots__ 获得紧凑的内存布局；
+    # 没有定义 __slots__ 的子类仍然有 __dict__
+    __slots__ = ()
+
     def __init__(self, id: str = None, created_at: str = None):
         """
         初始化方法。
@@ -21,6 +21,7 @@ class StoryModel(BaseModel):
         key_words: List[Dict] = None,
         unknown_words: List[Dict[str, Union[str, int, None]]] = None,  # 修改类型
         created_at: str = None,
+        generation: Dict = None,
     ):
         """
         初始化方法。
@@ -36,6 +37,8 @@ class StoryModel(BaseModel):
             key_words (List[Dict]): 故事中包含的重点词汇列表。每个字典包含 'word' 和 'part_of_speech' (英文缩写)。
             unknown_words (List[Dict[str, Union[str, int, None]]]): 故事中的生词列表。每个字典包含 'word', 'pos' (英文缩写), 和 'level'。
             created_at (str, optional): 模型的创建时间，如果为None，则设置为当前时间.
+            generation (Dict, optional): 生成过程: 调用 AI 服务的次数、使用的 token 数 (估计值)、
+                是否满足生词率和词数要求，以及每次生成的结果。
         """
         super().__init__(id=story_id, created_at=created_at)
         self.title = title
@@ -47,6 +50,7 @@ class StoryModel(BaseModel):
         self.new_word_rate = new_word_rate  # new_char_rate -> new_word_rate
         self.key_words = key_words if key_words else []
         self.unknown_words = unknown_words if unknown_words else []
+        self.generation = generation
 
     def to_dict(self) -> Dict:
         """
@@ -66,6 +70,7 @@ class StoryModel(BaseModel):
             "key_words": self.key_words,  # 存储包含英文词性缩写的字典列表
             "unknown_words": self.unknown_words,  # 存储包含英文词性缩写的字典列表
             "created_at": self.created_at,
+            "generation": self.generation,
         }
 
     @classmethod
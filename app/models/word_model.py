@@ -1,13 +1,46 @@
 # app/models/word_model.py
-from typing import List, Dict, Optional
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Any, List, Dict, Optional
 from app.models.base_model import BaseModel
 
+# 级别等取值很少的字段在所有 WordModel 之间共享同一个对象
+_interned_values: Dict[Any, Any] = {}
+
+
+def _intern_value(value: Any) -> Any:
+    # 以 (类型, 值) 为键，避免 1 和 1.0 被合并
+    key = (value.__class__, value)
+    try:
+        return _interned_values[key]
+    except KeyError:
+        pass
+    except TypeError:  # 不可哈希的值原样保存
+        return value
+    if isinstance(value, str):
+        value = sys.intern(value)
+    _interned_values[key] = value
+    return value
+
 
 class WordModel(BaseModel):
     """
     词语数据模型。
+
+    词表可能包含数万个词，因此使用 __slots__ 存储属性，词性和级别使用共享 (intern) 的对象，
+    created_at 在第一次访问时才生成。
     """
 
+    __slots__ = (
+        "id",
+        "_created_at",
+        "word",
+        "chaotong_level",
+        "hsk_level",
+        "part_of_speech",
+    )
+
     def __init__(
         self,
         word_id: str = None,
@@ -27,11 +60,26 @@ class WordModel(BaseModel):
             part_of_speech (str): 词性
             created_at (str, optional): 模型的创建时间，如果为None，则设置为当前时间.
         """
-        super().__init__(id=word_id, created_at=created_at)
+        # 不调用 BaseModel.__init__: created_at 延迟到第一次访问时生成
+        self.id = word_id if word_id else str(uuid.uuid4())
+        self._created_at = created_at
         self.word = word
-        self.chaotong_level = chaotong_level
-        self.hsk_level = hsk_level
-        self.part_of_speech = part_of_speech
+        self.chaotong_level = _intern_value(chaotong_level)
+        self.hsk_level = _intern_value(hsk_level)
+        self.part_of_speech = _intern_value(part_of_speech)
+
+    @property
+    def created_at(self) -> str:
+        """
+        模型的创建时间，如果初始化时为None，则在第一次访问时设置为当前时间。
+        """
+        if self._created_at is None:
+            self._created_at = datetime.now(timezone.utc).isoformat()
+        return self._created_at
+
+    @created_at.setter
+    def created_at(self, created_at: str):
+        self._created_at = created_at
 
     def to_dict(self) -> Dict:
         """
@@ -48,6 +96,38 @@ class WordModel(BaseModel):
             "created_at": self.created_at,
         }
 
+    def to_row(self) -> tuple:
+        """
+        将模型对象转换为紧凑的元组 (用于词表缓存)，顺序与 __init__ 的参数一致。
+        """
+        return (
+            self.id,
+            self.word,
+            self.chaotong_level,
+            self.hsk_level,
+            self.part_of_speech,
+            self._created_at,
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple):
+        """
+        从 to_row() 返回的元组创建模型对象。
+
+        不经过 __init__: 缓存中的行由 to_row() 生成，id 已确定，
+        共享的词性/级别对象在 pickle 时也保持共享。
+        """
+        word_model = cls.__new__(cls)
+        (
+            word_model.id,
+            word_model.word,
+            word_model.chaotong_level,
+            word_model.hsk_level,
+            word_model.part_of_speech,
+            word_model._created_at,
+        ) = row
+        return word_model
+
     @classmethod
     def from_dict(cls, data: Dict):
         """
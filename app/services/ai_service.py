@@ -1,6 +1,8 @@
 # app/services/ai_service.py
+import asyncio
+import json
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
 
 class AIService(ABC):
@@ -21,3 +23,37 @@ class AIService(ABC):
             Dict: 包含故事标题、内容和关键词的字典
         """
         pass
+
+    def generate_story_stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式生成故事，按模型输出的顺序返回文本片段，全部拼接后是完整的 JSON。
+        默认一次返回 generate_story 的完整结果，支持流式输出的 AI 服务应覆盖此方法。
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Iterator[str]: JSON 文本片段
+        """
+        yield json.dumps(self.generate_story(prompt), ensure_ascii=False)
+
+    async def agenerate_story(self, prompt: str) -> Dict:
+        """
+        异步生成故事。默认在线程池中调用 generate_story，
+        有原生异步客户端的 AI 服务应覆盖此方法。
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        """
+        return await asyncio.to_thread(self.generate_story, prompt)
+
+    def close(self):
+        """
+        释放 AI 服务持有的连接等资源
+        """
+        pass
+
+    async def aclose(self):
+        """
+        释放异步客户端持有的连接等资源
+        """
+        pass
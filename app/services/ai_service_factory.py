@@ -1,18 +1,29 @@
 # app/services/ai_service_factory.py
+import logging
+import threading
+from typing import Dict
 from app.services.ai_service import AIService
 from app.services.deepseek_service import DeepseekService
 from app.services.gemini_service import GeminiService
 
+logger = logging.getLogger(__name__)
+
 
 class AIServiceFactory:
     """
     AI 服务工厂类
+
+    每个 AI 服务只创建一个实例并在整个进程内复用：底层 HTTP 客户端是线程安全的，
+    复用同一个实例可以保留已建立的 TLS 连接和连接池。
     """
 
+    _services: Dict[str, AIService] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def create_ai_service(ai_service_name: str) -> AIService:
         """
-        创建 AI 服务对象
+        获取 AI 服务对象 (每个 AI 服务名称只创建一次)
         Args:
             ai_service_name (str): AI 服务名称 (例如 deepseek, gemini)
         Returns:
@@ -20,9 +31,35 @@ class AIServiceFactory:
         Raises:
             ValueError: 如果 AI 服务名称无效
         """
+        service = AIServiceFactory._services.get(ai_service_name)
+        if service is not None:
+            return service
+        with AIServiceFactory._lock:
+            service = AIServiceFactory._services.get(ai_service_name)
+            if service is None:
+                service = AIServiceFactory._new_ai_service(ai_service_name)
+                AIServiceFactory._services[ai_service_name] = service
+                logger.info(f"Created shared AI service: {ai_service_name}")
+        return service
+
+    @staticmethod
+    def _new_ai_service(ai_service_name: str) -> AIService:
         if ai_service_name == "deepseek":
             return DeepseekService()
         elif ai_service_name == "gemini":
             return GeminiService()
         else:
             raise ValueError(f"无效的 AI 服务名称: {ai_service_name}")
+
+    @staticmethod
+    def close_all():
+        """
+        关闭并丢弃所有已创建的 AI 服务 (例如在配置变化后或进程退出前)
+        """
+        with AIServiceFactory._lock:
+            services, AIServiceFactory._services = AIServiceFactory._services, {}
+        for name, service in services.items():
+            try:
+                service.close()
+            except Exception as e:
+                logger.warning(f"Error closing AI service {name}: {e}")
@@ -0,0 +1,115 @@
+# app/services/batch_story_generator.py
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from app.config import Config
+from app.models.story_model import StoryModel
+from app.services.cached_ai_service import bypass_generation_cache
+from app.services.known_words_prompt_cache import KnownWordsPromptCache
+from app.services.story_service import StoryService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchStoryGenerator:
+    """
+    批量生成故事: 并发调用 AI 服务，按完成顺序返回每一项的结果。
+
+    同一级别的已知词汇片段在开始前准备一次，所有项共享；
+    每个 AI 服务名称一个线程池 (线程数为 concurrency_per_backend)，在所有批量请求之间共享，
+    因此每个名称同时进行的调用数不超过 concurrency_per_backend。
+
+    限制按请求中的 ai_service 名称计算: auto 有自己的线程池，不计入它路由到的
+    deepseek / gemini。混合使用 auto 和具体 AI 服务的批量请求，某个 AI 服务同时进行的
+    调用数可能超过 concurrency_per_backend；每个 AI 服务的硬性上限由容错层的
+    AIRateLimiter (AI_RATE_LIMITS 中的 MAX_IN_FLIGHT) 保证。
+    """
+
+    def __init__(
+        self,
+        story_service_provider: Callable[[str], StoryService],
+        known_words_cache: KnownWordsPromptCache,
+        concurrency_per_backend: int = None,
+    ):
+        """
+        初始化 BatchStoryGenerator。
+
+        Args:
+            story_service_provider: 根据 AI 服务名称获取 StoryService 的函数，
+                例如 ServiceContainer.get_story_service。
+            known_words_cache: 已知词汇提示语片段缓存。
+            concurrency_per_backend: 每个 AI 服务最多同时进行的调用数，
+                默认使用 Config.BATCH_CONCURRENCY_PER_BACKEND。
+        """
+        self.story_service_provider = story_service_provider
+        self.known_words_cache = known_words_cache
+        self.concurrency_per_backend = (
+            concurrency_per_backend or Config.BATCH_CONCURRENCY_PER_BACKEND
+        )
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def _executor(self, ai_service_name: str) -> ThreadPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(ai_service_name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency_per_backend,
+                    thread_name_prefix=f"story-batch-{ai_service_name}",
+                )
+                self._executors[ai_service_name] = executor
+            return executor
+
+    def generate(
+        self, specs: List[Dict]
+    ) -> Iterator[Tuple[int, Optional[StoryModel], Optional[Exception]]]:
+        """
+        并发生成多个故事。
+
+        Args:
+            specs: 生成参数列表，每项包含 ai_service、use_cache 和
+                传给 StoryService.generate_story 的 kwargs。
+        Yields:
+            (index, story, error): 按完成顺序返回，index 是该项在 specs 中的位置；
+            成功时 error 为 None，失败时 story 为 None。
+        """
+        if not specs:
+            return
+        # 每个级别的已知词汇片段只准备一次，之后的生成直接命中缓存
+        for level in {spec["kwargs"]["vocabulary_level"] for spec in specs}:
+            self.known_words_cache.get_known_words_section(level)
+
+        futures = {
+            self._executor(spec["ai_service"]).submit(
+                contextvars.copy_context().run, self._generate_one, spec
+            ): index
+            for index, spec in enumerate(specs)
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    logger.error(f"Batch item {futures[future]} failed: {e}")
+                    yield futures[future], None, e
+        finally:
+            # 调用方提前停止 (例如客户端断开) 时取消这个批量请求中尚未开始的项
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        """
+        停止所有线程池，取消尚未开始的项。
+        """
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _generate_one(self, spec: Dict) -> StoryModel:
+        story_service = self.story_service_provider(spec["ai_service"])
+        with bypass_generation_cache(not spec.get("use_cache", True)):
+            return story_service.generate_story(**spec["kwargs"])
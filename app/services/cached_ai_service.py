@@ -0,0 +1,157 @@
+# app/services/cached_ai_service.py
+import copy
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+from app.services.ai_service import AIService
+from app.utils.generation_cache import GenerationCache
+
+logger = logging.getLogger(__name__)
+
+# 当前请求是否跳过生成结果缓存 (每个请求/线程独立)
+_bypass_cache: ContextVar[bool] = ContextVar("bypass_generation_cache", default=False)
+
+
+@contextmanager
+def bypass_generation_cache(bypass: bool = True):
+    """
+    在 with 代码块内跳过生成结果缓存的读取：总是调用 AI 服务，
+    新的结果仍然写入缓存，替换旧的结果。
+
+    Args:
+        bypass: 是否跳过缓存，便于直接传入请求参数。
+    """
+    token = _bypass_cache.set(bypass)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    规范化提示语: 统一换行符，去掉行尾和首尾空白，
+    只在这些方面不同的提示语共用一个缓存条目。
+    """
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").strip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+class CachedAIService(AIService):
+    """
+    带生成结果缓存的 AI 服务 (包装另一个 AIService)。
+
+    缓存键由 AI 服务名称、模型和规范化后提示语的 SHA-256 组成；
+    相同的提示语在缓存有效期内直接返回之前的生成结果。
+    """
+
+    def __init__(self, ai_service: AIService, backend: str, cache: GenerationCache):
+        """
+        初始化 CachedAIService。
+
+        Args:
+            ai_service: 实际调用的 AI 服务。
+            backend: AI 服务名称，例如 deepseek、gemini。
+            cache: 生成结果缓存。
+        """
+        self.ai_service = ai_service
+        self.backend = backend
+        self.model = getattr(ai_service, "model", None)
+        self.cache = cache
+
+    def cache_key(self, prompt: str) -> str:
+        """
+        计算提示语的缓存键。
+        """
+        prompt_hash = hashlib.sha256(
+            normalize_prompt(prompt).encode("utf-8")
+        ).hexdigest()
+        return hashlib.sha256(
+            f"{self.backend}\0{self.model}\0{prompt_hash}".encode("utf-8")
+        ).hexdigest()
+
+    def generate_story(self, prompt: str) -> Dict:
+        """
+        生成故事，缓存命中时不调用 AI 服务
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        """
+        key = self.cache_key(prompt)
+        if not _bypass_cache.get():
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Generation cache hit ({self.backend}, {key[:12]})")
+                # 返回副本，调用方修改结果不会影响缓存
+                return copy.deepcopy(cached)
+        response = self.ai_service.generate_story(prompt)
+        if isinstance(response, dict) and response:
+            self.cache.set(key, copy.deepcopy(response))
+        return response
+
+    def generate_story_stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式生成故事。缓存命中时一次返回缓存的结果；否则转发 AI 服务的输出，
+        拼接后的完整结果是有效的 JSON 对象时写入缓存
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Iterator[str]: JSON 文本片段
+        """
+        key = self.cache_key(prompt)
+        # 在调用时 (而不是迭代时) 读取设置: 流式响应在 with bypass_generation_cache 之外迭代
+        if not _bypass_cache.get():
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Generation cache hit ({self.backend}, {key[:12]})")
+                return iter([json.dumps(cached, ensure_ascii=False)])
+        return self._stream_and_cache(
+            key, self.ai_service.generate_story_stream(prompt)
+        )
+
+    def _stream_and_cache(self, key: str, stream: Iterator[str]) -> Iterator[str]:
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        try:
+            response = json.loads("".join(chunks))
+        except ValueError:
+            return
+        if isinstance(response, dict) and response:
+            self.cache.set(key, response)
+
+    async def agenerate_story(self, prompt: str) -> Dict:
+        """
+        异步生成故事，缓存命中时不调用 AI 服务
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        """
+        key = self.cache_key(prompt)
+        if not _bypass_cache.get():
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"Generation cache hit ({self.backend}, {key[:12]})")
+                return copy.deepcopy(cached)
+        response = await self.ai_service.agenerate_story(prompt)
+        if isinstance(response, dict) and response:
+            self.cache.set(key, copy.deepcopy(response))
+        return response
+
+    def close(self):
+        """
+        释放被包装的 AI 服务的资源
+        """
+        self.ai_service.close()
+
+    async def aclose(self):
+        """
+        释放被包装的 AI 服务的异步客户端资源
+        """
+        await self.ai_service.aclose()
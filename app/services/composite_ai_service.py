@@ -0,0 +1,367 @@
+# app/services/composite_ai_service.py
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from app.config import Config
+from app.services.ai_service import AIService
+from app.services.resilient_ai_service import (
+    AIServiceUnavailableError,
+    CircuitBreaker,
+    InvalidAIResponseError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BackendStats:
+    """
+    单个 AI 服务最近 window 次调用的耗时和成功率
+    """
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)  # 成功调用的耗时 (秒)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, succeeded: bool):
+        with self._lock:
+            self.outcomes.append(succeeded)
+            if succeeded:
+                self.latencies.append(latency)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def latency_percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    def expected_latency(self) -> float:
+        """
+        路由用的期望耗时: 耗时中位数按成功率放大。没有调用过的服务为 0 (优先尝试)，
+        最近只有失败的服务为无穷大。
+        """
+        p50 = self.latency_percentile(0.5)
+        if p50 is None:
+            return float("inf") if self.outcomes else 0.0
+        return p50 / max(0.05, 1 - self.error_rate())
+
+    def to_dict(self) -> Dict:
+        p50 = self.latency_percentile(0.5)
+        p95 = self.latency_percentile(0.95)
+        return {
+            "samples": len(self.outcomes),
+            "error_rate": round(self.error_rate(), 3),
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class CompositeAIService(AIService):
+    """
+    组合多个 AI 服务 (ai_service 为 auto 时使用):
+
+    - 按最近的耗时和错误率排序，优先调用期望耗时最短的服务，熔断中的服务排在最后；
+    - 调用失败时换下一个服务 (failover)；
+    - 对冲请求: 第一个服务超过它的耗时分位数 (AI_HEDGE_PERCENTILE) 仍未返回时，
+      同时调用下一个服务，先返回有效 JSON 的结果被采用。
+    """
+
+    # 按耗时分位数发出对冲请求前，第一个服务至少需要的成功调用数
+    HEDGE_MIN_SAMPLES = 20
+
+    def __init__(
+        self,
+        backends: Dict[str, AIService],
+        hedge: bool = None,
+        hedge_percentile: float = None,
+        hedge_min_delay: float = None,
+        hedge_default_delay: float = None,
+        window: int = None,
+    ):
+        """
+        初始化 CompositeAIService，未指定的参数使用 Config.AI_HEDGE_* / AI_ROUTING_WINDOW。
+
+        Args:
+            backends: AI 服务名称 -> AI 服务，没有统计数据时按这个顺序调用。
+            hedge: 是否发出对冲请求。
+            hedge_percentile: 超过第一个服务的哪个耗时分位数时发出对冲请求。
+            hedge_min_delay: 发出对冲请求前至少等待的时间 (秒)。
+            hedge_default_delay: 统计数据不足时发出对冲请求前等待的时间 (秒)。
+            window: 每个服务保留的最近调用数。
+        """
+        if not backends:
+            raise ValueError("CompositeAIService 至少需要一个 AI 服务")
+        self.backends = dict(backends)
+        self.model = "+".join(
+            f"{name}:{getattr(service, 'model', None)}"
+            for name, service in self.backends.items()
+        )
+        self.hedge = Config.AI_HEDGE_ENABLED if hedge is None else hedge
+        self.hedge_percentile = (
+            Config.AI_HEDGE_PERCENTILE if hedge_percentile is None else hedge_percentile
+        )
+        self.hedge_min_delay = (
+            Config.AI_HEDGE_MIN_DELAY if hedge_min_delay is None else hedge_min_delay
+        )
+        self.hedge_default_delay = (
+            Config.AI_HEDGE_DEFAULT_DELAY
+            if hedge_default_delay is None
+            else hedge_default_delay
+        )
+        window = window or Config.AI_ROUTING_WINDOW
+        self.stats = {name: BackendStats(window) for name in self.backends}
+        # 对冲请求需要同时进行多个同步调用
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.AI_CALL_WORKERS, thread_name_prefix="ai-auto"
+        )
+        self._counts = {
+            "requests": 0,
+            "failovers": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "failed": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def rank(self) -> List[str]:
+        """
+        按调用顺序返回 AI 服务名称。
+        """
+
+        def key(name):
+            breaker = getattr(self.backends[name], "circuit_breaker", None)
+            circuit_open = breaker is not None and breaker.state == CircuitBreaker.OPEN
+            return (circuit_open, self.stats[name].expected_latency())
+
+        return sorted(self.backends, key=key)
+
+    def hedge_delay(self, name: str) -> float:
+        """
+        调用 name 多久之后发出对冲请求 (秒)。
+        """
+        stats = self.stats[name]
+        if len(stats.latencies) < self.HEDGE_MIN_SAMPLES:
+            return self.hedge_default_delay
+        return max(
+            self.hedge_min_delay, stats.latency_percentile(self.hedge_percentile)
+        )
+
+    def _call(self, name: str, prompt: str) -> Dict:
+        start = time.monotonic()
+        try:
+            response = self._check_response(
+                name, self.backends[name].generate_story(prompt)
+            )
+        except Exception:
+            self.stats[name].record(time.monotonic() - start, False)
+            raise
+        self.stats[name].record(time.monotonic() - start, True)
+        return response
+
+    async def _acall(self, name: str, prompt: str) -> Dict:
+        start = time.monotonic()
+        try:
+            response = self._check_response(
+                name, await self.backends[name].agenerate_story(prompt)
+            )
+        except asyncio.CancelledError:
+            # 对冲请求中落后的调用被取消，不计入统计
+            raise
+        except Exception:
+            self.stats[name].record(time.monotonic() - start, False)
+            raise
+        self.stats[name].record(time.monotonic() - start, True)
+        return response
+
+    @staticmethod
+    def _check_response(name: str, response) -> Dict:
+        if not isinstance(response, dict) or not response:
+            raise InvalidAIResponseError(f"{name} AI 服务返回无效的 JSON 格式")
+        return response
+
+    def generate_story(self, prompt: str) -> Dict:
+        """
+        生成故事: 按排序调用 AI 服务，失败时换下一个，必要时发出对冲请求
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        Raises:
+            AIServiceUnavailableError: 如果所有 AI 服务都熔断或超时
+        """
+        self._count("requests")
+        candidates = self.rank()
+        primary = candidates[0]
+        pending = {}
+        errors: List[Tuple[str, Exception]] = []
+        hedged = False
+
+        def launch():
+            name = candidates.pop(0)
+            context = contextvars.copy_context()
+            pending[self._executor.submit(context.run, self._call, name, prompt)] = name
+
+        launch()
+        while pending:
+            timeout = None
+            if self.hedge and not hedged and candidates and len(pending) == 1:
+                timeout = self.hedge_delay(next(iter(pending.values())))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                self._count("hedged")
+                launch()
+                continue
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logger.warning(f"{name} AI 服务调用失败: {e}")
+                    errors.append((name, e))
+                    continue
+                # 落后的同步调用无法中断，在后台完成后只更新统计
+                if hedged and name != primary:
+                    self._count("hedge_wins")
+                return response
+            if not pending and candidates:
+                self._count("failovers")
+                launch()
+        raise self._failure(errors)
+
+    async def agenerate_story(self, prompt: str) -> Dict:
+        """
+        异步生成故事: 与 generate_story 相同，采用第一个有效结果后取消其它调用
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        Raises:
+            AIServiceUnavailableError: 如果所有 AI 服务都熔断或超时
+        """
+        self._count("requests")
+        candidates = self.rank()
+        primary = candidates[0]
+        pending = {}
+        errors: List[Tuple[str, Exception]] = []
+        hedged = False
+
+        def launch():
+            name = candidates.pop(0)
+            pending[asyncio.ensure_future(self._acall(name, prompt))] = name
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not hedged and candidates and len(pending) == 1:
+                    timeout = self.hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    self._count("hedged")
+                    launch()
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        logger.warning(f"{name} AI 服务调用失败: {e}")
+                        errors.append((name, e))
+                        continue
+                    if hedged and name != primary:
+                        self._count("hedge_wins")
+                    return response
+                if not pending and candidates:
+                    self._count("failovers")
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise self._failure(errors)
+
+    def generate_story_stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式生成故事。在收到第一段文本之前失败时换下一个 AI 服务，之后不再切换；
+        流式调用不发出对冲请求
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Iterator[str]: JSON 文本片段
+        """
+        self._count("requests")
+        errors: List[Tuple[str, Exception]] = []
+        for index, name in enumerate(self.rank()):
+            if index:
+                self._count("failovers")
+            start = time.monotonic()
+            try:
+                stream = iter(self.backends[name].generate_story_stream(prompt))
+                first = next(stream)
+            except StopIteration:
+                error = InvalidAIResponseError(f"{name} AI 服务没有返回内容")
+                self.stats[name].record(time.monotonic() - start, False)
+                errors.append((name, error))
+                continue
+            except Exception as e:
+                logger.warning(f"{name} AI 服务调用失败: {e}")
+                self.stats[name].record(time.monotonic() - start, False)
+                errors.append((name, e))
+                continue
+            try:
+                yield first
+                yield from stream
+            except Exception:
+                self.stats[name].record(time.monotonic() - start, False)
+                raise
+            self.stats[name].record(time.monotonic() - start, True)
+            return
+        raise self._failure(errors)
+
+    def _failure(self, errors: List[Tuple[str, Exception]]) -> Exception:
+        self._count("failed")
+        if errors and all(
+            isinstance(error, AIServiceUnavailableError) for _, error in errors
+        ):
+            return AIServiceUnavailableError(
+                "所有 AI 服务暂时不可用: "
+                + "; ".join(f"{name}: {error}" for name, error in errors)
+            )
+        return errors[-1][1]
+
+    def get_metrics(self) -> Dict:
+        """
+        获取路由、failover 和对冲请求的计数，以及每个 AI 服务的耗时和错误率。
+        """
+        with self._lock:
+            metrics = dict(self._counts)
+        metrics["order"] = self.rank()
+        metrics["backends"] = {
+            name: stats.to_dict() for name, stats in self.stats.items()
+        }
+        return metrics
+
+    def close(self):
+        """
+        停止调用线程。组合的 AI 服务由创建者 (ServiceContainer) 负责关闭
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,15 @@
 # app/services/deepseek_service.py
 import json
 import logging
-from typing import List, Dict
-from openai import OpenAI
+from typing import Dict, Iterator, List
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 from app.config import Config
 from app.services.ai_service import AIService
+from app.utils.http_client import (
+    get_http_limits,
+    get_http_timeout,
+    get_sdk_max_retries,
+)
 
 
 class DeepseekService(AIService):
@@ -14,10 +19,54 @@ class DeepseekService(AIService):
 
     def __init__(self):
         self.api_key = Config.DEEPSEEK_API_KEY
-        self.base_url = "https://api.deepseek.com"
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.base_url = Config.DEEPSEEK_BASE_URL
+        # 使用带连接池和 keep-alive 的 HTTP 客户端，实例由 AIServiceFactory 长期复用
+        self.client = OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=get_http_timeout(),
+            max_retries=get_sdk_max_retries(),
+            http_client=DefaultHttpxClient(
+                limits=get_http_limits(), timeout=get_http_timeout()
+            ),
+        )
+        # 异步客户端在第一次异步调用时创建 (绑定到当时的事件循环)
+        self._async_client = None
+        # 模型选择
+        self.model = "deepseek-chat"
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """
+        带连接池的异步客户端，供 agenerate_story 使用
+        """
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=get_http_timeout(),
+                max_retries=get_sdk_max_retries(),
+                http_client=DefaultAsyncHttpxClient(
+                    limits=get_http_limits(), timeout=get_http_timeout()
+                ),
+            )
+        return self._async_client
+
+    def close(self):
+        """
+        关闭 HTTP 连接池
+        """
+        self.client.close()
+
+    async def aclose(self):
+        """
+        关闭异步客户端的 HTTP 连接池
+        """
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
     def generate_story(self, prompt: str) -> Dict:
         """
         使用 Deepseek AI 生成故事
@@ -28,12 +77,55 @@ class DeepseekService(AIService):
         """
         try:
             response = self.client.chat.completions.create(
-                model="deepseek-chat",
+                model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"},  
             )
             ai_message = response.choices[0].message.content
             return json.loads(ai_message)
+        except Exception as e:
+            self.logger.error(f"Deepseek AI 服务调用失败: {e}")
+            raise Exception(f"Deepseek AI 服务调用失败: {e}")
+
+    def generate_story_stream(self, prompt: str) -> Iterator[str]:
+        """
+        使用 Deepseek AI 流式生成故事
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Iterator[str]: 模型输出的 JSON 文本片段
+        """
+        try:
+            # 调用方提前停止迭代时 with 语句关闭响应，释放连接
+            with self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
+                stream=True,
+            ) as stream:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except Exception as e:
+            self.logger.error(f"Deepseek AI 服务调用失败: {e}")
+            raise Exception(f"Deepseek AI 服务调用失败: {e}")
+
+    async def agenerate_story(self, prompt: str) -> Dict:
+        """
+        使用 Deepseek AI 异步生成故事，等待响应时不占用线程
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        """
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
+            )
+            ai_message = response.choices[0].message.content
+            return json.loads(ai_message)
         except Exception as e:
             self.logger.error(f"Deepseek AI 服务调用失败: {e}")
             raise Exception(f"Deepseek AI 服务调用失败: {e}")
\ No newline at end of file
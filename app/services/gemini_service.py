@@ -1,11 +1,17 @@
 # app/services/gemini_service.py
 import json
 import logging
-from typing import List, Dict
+from typing import Dict, Iterator, List
 from app.config import Config
 from app.services.ai_service import AIService
 import os
 from google import genai  # 正确的引入方式
+from google.genai import types
+from app.utils.http_client import (
+    get_http_limits,
+    get_http_timeout,
+    get_http_timeout_seconds,
+)
 
 
 class GeminiService(AIService):
@@ -21,14 +27,37 @@ class GeminiService(AIService):
             )
 
 
-        # 使用 genai.Client 初始化 Gemini 客户端
-        self.client = genai.Client(api_key=self.api_key)
+        # 使用 genai.Client 初始化 Gemini 客户端，
+        # 底层 HTTP 连接池和 keep-alive 按配置设置，实例由 AIServiceFactory 长期复用
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(
+                timeout=int(get_http_timeout_seconds() * 1000),  # 毫秒
+                client_args={"limits": get_http_limits(), "timeout": get_http_timeout()},
+                async_client_args={
+                    "limits": get_http_limits(),
+                    "timeout": get_http_timeout(),
+                },
+            ),
+        )
 
         # 模型选择
         self.model = "gemini-2.0-flash"  
 
         self.logger = logging.getLogger(__name__)
 
+    def close(self):
+        """
+        关闭 HTTP 连接池
+        """
+        self.client.close()
+
+    async def aclose(self):
+        """
+        关闭异步客户端的 HTTP 连接池
+        """
+        await self.client.aio.aclose()
+
     def generate_story(self, prompt: str) -> Dict:
         """
         使用 Gemini AI 生成故事
@@ -44,17 +73,57 @@ class GeminiService(AIService):
                 contents=[prompt],
                 config={"response_mime_type": "application/json"},
             )
-            ai_message = response.text
-            print(ai_message)
-            try:
-                ai_response = json.loads(ai_message)
-                return ai_response
-            except (json.JSONDecodeError, TypeError) as e:
-                self.logger.error(
-                    f"Gemini AI 服务返回无效的 JSON 格式: {e}, 返回内容: {ai_message}"
-                )
-                raise Exception(f"Gemini AI 服务返回无效的 JSON 格式: {e}")
+            return self._parse_response(response.text)
+        except Exception as e:
+            self.logger.error(f"Gemini AI 服务调用失败: {e}")
+            raise Exception(f"Gemini AI 服务调用失败: {e}")
+
+    def generate_story_stream(self, prompt: str) -> Iterator[str]:
+        """
+        使用 Gemini AI 流式生成故事
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Iterator[str]: 模型输出的 JSON 文本片段
+        """
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=[prompt],
+                config={"response_mime_type": "application/json"},
+            ):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            self.logger.error(f"Gemini AI 服务调用失败: {e}")
+            raise Exception(f"Gemini AI 服务调用失败: {e}")
 
+    async def agenerate_story(self, prompt: str) -> Dict:
+        """
+        使用 Gemini AI 异步生成故事，等待响应时不占用线程
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        """
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=[prompt],
+                config={"response_mime_type": "application/json"},
+            )
+            return self._parse_response(response.text)
         except Exception as e:
             self.logger.error(f"Gemini AI 服务调用失败: {e}")
             raise Exception(f"Gemini AI 服务调用失败: {e}")
+
+    def _parse_response(self, ai_message: str) -> Dict:
+        print(ai_message)
+        try:
+            ai_response = json.loads(ai_message)
+            return ai_response
+        except (json.JSONDecodeError, TypeError) as e:
+            self.logger.error(
+                f"Gemini AI 服务返回无效的 JSON 格式: {e}, 返回内容: {ai_message}"
+            )
+            raise Exception(f"Gemini AI 服务返回无效的 JSON 格式: {e}")
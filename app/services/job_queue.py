@@ -0,0 +1,245 @@
+# app/services/job_queue.py
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """
+    任务队列已满，调用方应稍后重试
+    """
+
+    pass
+
+
+class Job:
+    """
+    异步任务 (例如生成或改写故事) 的状态和结果
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, kind: str):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.status = Job.QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (Job.SUCCEEDED, Job.FAILED)
+
+    def to_dict(self) -> Dict:
+        """
+        将任务转换为字典 (用于 API 响应)
+        """
+
+        def isoformat(timestamp):
+            if timestamp is None:
+                return None
+            return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "submitted_at": isoformat(self.submitted_at),
+            "started_at": isoformat(self.started_at),
+            "finished_at": isoformat(self.finished_at),
+        }
+
+
+class BaseJobQueue(ABC):
+    """
+    任务队列抽象基类
+    """
+
+    @abstractmethod
+    def submit(self, kind: str, func: Callable, *args, **kwargs) -> Job:
+        """
+        提交任务，立即返回。
+
+        Args:
+            kind: 任务类型，例如 generate、rewrite。
+            func: 在工作线程中执行的函数，返回值作为任务结果。
+        Returns:
+            Job: 新的任务。
+        Raises:
+            JobQueueFullError: 如果排队的任务已达到上限
+        """
+        pass
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """
+        获取任务，不存在 (或结果已过期) 时返回 None。
+        """
+        pass
+
+    @abstractmethod
+    def get_metrics(self) -> Dict:
+        """
+        获取队列深度、运行中的任务数和任务耗时等指标。
+        """
+        pass
+
+    def shutdown(self, wait: bool = True):
+        """
+        停止接受新任务并释放工作线程。
+        """
+        pass
+
+
+class LocalJobQueue(BaseJobQueue):
+    """
+    进程内任务队列: 固定大小的线程池执行任务，不依赖外部消息队列。
+
+    同时排队的任务数有上限，超过时 submit 抛出 JobQueueFullError；
+    已完成任务的结果保留 result_ttl 秒后清理。
+    """
+
+    # 计算耗时分位数时保留的最近任务数
+    DURATION_WINDOW = 500
+
+    def __init__(
+        self,
+        workers: int = None,
+        max_queued: int = None,
+        result_ttl: float = None,
+    ):
+        """
+        初始化 LocalJobQueue。
+
+        Args:
+            workers: 工作线程数，默认使用 Config.JOB_WORKERS。
+            max_queued: 最多排队 (未开始执行) 的任务数，默认使用 Config.JOB_QUEUE_SIZE。
+            result_ttl: 已完成任务保留的时间 (秒)，默认使用 Config.JOB_RESULT_TTL。
+        """
+        self.workers = workers or Config.JOB_WORKERS
+        self.max_queued = Config.JOB_QUEUE_SIZE if max_queued is None else max_queued
+        self.result_ttl = Config.JOB_RESULT_TTL if result_ttl is None else result_ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="story-job"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._counts = {Job.SUCCEEDED: 0, Job.FAILED: 0, "rejected": 0}
+        self._durations: Deque[float] = deque(maxlen=self.DURATION_WINDOW)
+        self._waits: Deque[float] = deque(maxlen=self.DURATION_WINDOW)
+
+    def submit(self, kind: str, func: Callable, *args, **kwargs) -> Job:
+        job = Job(kind)
+        with self._lock:
+            self._prune()
+            if self._queued >= self.max_queued:
+                self._counts["rejected"] += 1
+                raise JobQueueFullError(
+                    f"Job queue is full ({self._queued} jobs waiting)"
+                )
+            self._queued += 1
+            self._jobs[job.id] = job
+        # 在提交请求的上下文中执行 (例如 bypass_generation_cache 的设置)
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._run, job, func, args, kwargs)
+        logger.info(f"Submitted {kind} job {job.id}")
+        return job
+
+    def _run(self, job: Job, func: Callable, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job.started_at = time.time()
+        job.status = Job.RUNNING
+        try:
+            result = func(*args, **kwargs)
+            job.result = result
+            status = Job.SUCCEEDED
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {e}")
+            job.error = str(e)
+            status = Job.FAILED
+        job.finished_at = time.time()
+        # 最后设置状态，轮询方看到完成状态时结果已经就绪
+        job.status = status
+        with self._lock:
+            self._running -= 1
+            self._counts[status] += 1
+            self._durations.append(job.finished_at - job.started_at)
+            self._waits.append(job.started_at - job.submitted_at)
+        logger.info(
+            f"{job.kind} job {job.id} {status} in "
+            f"{job.finished_at - job.started_at:.2f}s"
+        )
+
+    def _prune(self):
+        # 调用方持有 self._lock
+        expired_before = time.time() - self.result_ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.done and job.finished_at < expired_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            durations = sorted(self._durations)
+            waits = sorted(self._waits)
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queued,
+                "max_queued": self.max_queued,
+                "running": self._running,
+                "succeeded": self._counts[Job.SUCCEEDED],
+                "failed": self._counts[Job.FAILED],
+                "rejected": self._counts["rejected"],
+                "duration_seconds": _summarize(durations),
+                "wait_seconds": _summarize(waits),
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _summarize(values: List[float]) -> Dict:
+    """
+    计算已排序数值的平均值和分位数
+    """
+    if not values:
+        return {"count": 0, "avg": None, "p50": None, "p95": None, "max": None}
+
+    def percentile(p):
+        return round(values[min(len(values) - 1, int(len(values) * p))], 3)
+
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values), 3),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "max": round(values[-1], 3),
+    }
@@ -0,0 +1,119 @@
+# app/services/known_words_prompt_cache.py
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from app.config import Config
+from app.services.prompt_registry import PromptRegistry
+from app.services.word_service import WordService
+
+logger = logging.getLogger(__name__)
+
+
+class KnownWordsPromptCache:
+    """
+    已知词汇提示语片段的缓存。
+
+    每次生成或改写故事都要把 "低于目标级别" 的全部已知词序列化为 JSON，
+    高级别时有数千个词。级别只有几百个，因此按 (词表版本, 级别, 示例数量)
+    缓存序列化后的 JSON 和渲染好的 known_words_section_prompt.txt 片段。
+    词表重新加载 (版本变化) 时缓存整体失效；缓存按最近最少使用淘汰。
+    """
+
+    SECTION_TEMPLATE = "known_words_section_prompt.txt"
+
+    def __init__(
+        self,
+        word_service: WordService,
+        prompt_registry: PromptRegistry,
+        maxsize: int = None,
+    ):
+        """
+        初始化 KnownWordsPromptCache。
+
+        Args:
+            word_service: 提供已知词汇的 WordService。
+            prompt_registry: 渲染 known_words_section_prompt.txt 的提示语模板注册表。
+            maxsize: 最多缓存的片段数，默认使用 Config.KNOWN_WORDS_CACHE_SIZE。
+        """
+        self.word_service = word_service
+        self.prompt_registry = prompt_registry
+        self.maxsize = Config.KNOWN_WORDS_CACHE_SIZE if maxsize is None else maxsize
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_known_words_json(self, level: int, limit: Optional[int] = None) -> str:
+        """
+        获取低于 level 的已知词汇 ([{"word", "part_of_speech"}, ...]) 的 JSON。
+
+        Args:
+            level: 目标级别，不包含这个级别。
+            limit: 最多包含的词数，为空表示全部。
+        Returns:
+            str: JSON 字符串 (ensure_ascii=False)。
+        """
+        return self._get(("json", level, limit), lambda: self._dump(level, limit))
+
+    def get_known_words_section(self, level: int) -> str:
+        """
+        获取渲染好的已知词汇提示语片段 (known_words_section_prompt.txt)。
+
+        Args:
+            level: 目标级别，不包含这个级别。
+        Returns:
+            str: 渲染后的提示语片段。
+        """
+        return self._get(
+            ("section", level),
+            lambda: self.prompt_registry.render(
+                self.SECTION_TEMPLATE,
+                {"vocabulary_level": level, "known_words": self._dump(level, None)},
+            ),
+        )
+
+    def clear(self):
+        """
+        清空缓存。
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key: Hashable, build: Callable[[], str]) -> str:
+        version = self.word_service.snapshot.version
+        with self._lock:
+            if version != self._version:
+                # 词表已重新加载，旧片段全部失效
+                self._entries.clear()
+                self._version = version
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        # 在锁外构建，不阻塞其他级别的请求；并发构建同一片段时结果相同
+        value = build()
+        with self._lock:
+            if version == self._version and self.maxsize > 0:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def _dump(self, level: int, limit: Optional[int]) -> str:
+        known_words = self.word_service.get_words_below_level(level)
+        if limit is not None:
+            known_words = known_words[:limit]
+        logger.debug(f"Serializing {len(known_words)} known words below level {level}")
+        return json.dumps(
+            [
+                {"word": word.word, "part_of_speech": word.part_of_speech}
+                for word in known_words
+            ],
+            ensure_ascii=False,
+        )
@@ -0,0 +1,156 @@
+# app/services/prompt_registry.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    meta,
+)
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PromptRegistry:
+    """
+    进程内共享的提示语模板注册表。
+
+    每个模板只编译一次 (编译结果同时写入磁盘上的字节码缓存，重启后无需重新编译)，
+    不包含任何变量的模板 (例如 initial_prompt.txt) 在编译时渲染一次并缓存结果。
+    每个模板的渲染次数和耗时可以通过 get_render_stats() 查看。
+    """
+
+    def __init__(self, template_dir: str = None, bytecode_cache_dir: str = None):
+        """
+        初始化 PromptRegistry。
+
+        Args:
+            template_dir: 模板目录，默认使用 Config.PROMPTS_DIR。
+            bytecode_cache_dir: 字节码缓存目录，默认使用 Config.PROMPT_BYTECODE_CACHE_DIR，
+                为空表示不使用磁盘缓存。
+        """
+        self.template_dir = template_dir or Config.PROMPTS_DIR
+        if bytecode_cache_dir is None:
+            bytecode_cache_dir = Config.PROMPT_BYTECODE_CACHE_DIR
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        # 模板文件只在部署时变化，关闭 auto_reload 避免每次获取模板都检查修改时间
+        self.env = Environment(
+            loader=FileSystemLoader(self.template_dir),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False,
+        )
+        self._templates: Dict[str, Template] = {}
+        # 不包含变量的模板 -> 渲染结果
+        self._static_prompts: Dict[str, str] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_template(self, name: str) -> Template:
+        """
+        获取编译好的模板。
+
+        Raises:
+            jinja2.TemplateNotFound: 如果模板不存在
+        """
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name)
+                if template is None:
+                    template = self._compile(name)
+        return template
+
+    def preload(self):
+        """
+        编译模板目录中的所有模板，并预先渲染不包含变量的模板。
+        """
+        for name in self.env.list_templates():
+            self.get_template(name)
+
+    def _compile(self, name: str) -> Template:
+        start = time.perf_counter()
+        source, _, _ = self.env.loader.get_source(self.env, name)
+        template = self.env.get_template(name)
+        if not meta.find_undeclared_variables(self.env.parse(source)):
+            self._static_prompts[name] = template.render()
+        self._templates[name] = template
+        logger.debug(
+            f"Compiled prompt template {name} in "
+            f"{(time.perf_counter() - start) * 1000:.2f} ms"
+            + (" (static)" if name in self._static_prompts else "")
+        )
+        return template
+
+    def render(self, name: str, data: Optional[Dict] = None) -> str:
+        """
+        渲染提示语模板。不包含变量的模板直接返回预先渲染的结果。
+
+        Args:
+            name: 模板文件名，例如 "initial_prompt.txt"。
+            data: 模板变量。
+        Returns:
+            str: 渲染后的提示语。
+        Raises:
+            jinja2.TemplateNotFound: 如果模板不存在
+        """
+        start = time.perf_counter()
+        template = self.get_template(name)
+        prompt = self._static_prompts.get(name)
+        if prompt is None:
+            prompt = template.render(data or {})
+        self._record(name, (time.perf_counter() - start) * 1000)
+        return prompt
+
+    def _record(self, name: str, elapsed_ms: float):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def get_render_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取每个模板的渲染统计。
+
+        Returns:
+            Dict: 模板名称 -> {"count", "total_ms", "avg_ms", "max_ms", "static"}。
+        """
+        with self._lock:
+            return {
+                name: {
+                    "count": stats["count"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "static": name in self._static_prompts,
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    获取进程内共享的 PromptRegistry (第一次调用时创建并编译所有模板)。
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = PromptRegistry()
+                registry.preload()
+                _registry = registry
+    return _registry
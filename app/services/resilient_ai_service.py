@@ -0,0 +1,524 @@
+# app/services/resilient_ai_service.py
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, Optional
+import httpx
+import openai
+from google.genai import errors as genai_errors
+from app.config import Config
+from app.services.ai_service import AIService
+from app.utils.rate_limiter import AIRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class AIServiceUnavailableError(Exception):
+    """
+    AI 服务暂时不可用 (熔断或超时)，调用方应稍后重试
+    """
+
+    pass
+
+
+class CircuitOpenError(AIServiceUnavailableError):
+    """
+    AI 服务已熔断，调用没有发出
+    """
+
+    pass
+
+
+class AIServiceTimeoutError(AIServiceUnavailableError):
+    """
+    AI 服务调用超过截止时间
+    """
+
+    pass
+
+
+class AIQueueTimeoutError(AIServiceUnavailableError):
+    """
+    调用在限流队列中等待超过 AI_RATE_LIMIT_MAX_WAIT，没有发出
+    """
+
+    pass
+
+
+class InvalidAIResponseError(Exception):
+    """
+    AI 服务返回的不是有效的 JSON 对象
+    """
+
+    pass
+
+
+# 可以重试的错误: 超时、连接错误、限流、服务端错误和无效的 JSON
+TRANSIENT_ERRORS = (
+    AIServiceTimeoutError,
+    InvalidAIResponseError,
+    json.JSONDecodeError,
+    TimeoutError,
+    ConnectionError,
+    httpx.TransportError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    genai_errors.ServerError,
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    判断错误是否可以重试。AI 服务把原始错误包装成 Exception 重新抛出，
+    所以沿着 __cause__ / __context__ 检查整个异常链。
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        if isinstance(error, genai_errors.ClientError) and error.code == 429:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def estimate_tokens(prompt: str) -> int:
+    """
+    估计一次调用使用的 token 数 (提示语 + 生成的故事)，用于按每分钟 token 数限流。
+    """
+    return math.ceil(len(prompt) / Config.AI_CHARS_PER_TOKEN) + (
+        Config.AI_ESTIMATED_OUTPUT_TOKENS
+    )
+
+
+def is_availability_error(error: BaseException) -> bool:
+    """
+    判断错误是否说明 AI 服务不可用 (超时、连接错误、限流、服务端错误)，只有这些错误计入熔断器。
+    无效的 JSON、参数错误、认证失败等是这次请求本身的问题，不应让其他调用方也被熔断。
+    """
+    return is_transient_error(error) and not _is_invalid_json(error)
+
+
+def _is_invalid_json(error: BaseException) -> bool:
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (InvalidAIResponseError, json.JSONDecodeError)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker:
+    """
+    熔断器: 连续失败 failure_threshold 次后打开，打开期间调用直接失败；
+    reset_timeout 秒后进入半开状态，允许一次试探调用，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化 CircuitBreaker。
+
+        Args:
+            failure_threshold: 连续失败多少次后打开，0 表示从不打开。
+            reset_timeout: 打开后经过多少秒允许试探调用。
+            clock: 时间函数，便于测试。
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CircuitBreaker.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        是否允许发出一次调用 (半开状态下同时只允许一次试探调用)。
+        """
+        with self._lock:
+            now = self.clock()
+            if self.state == CircuitBreaker.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = CircuitBreaker.HALF_OPEN
+                self._probe_started_at = None
+            if self.state == CircuitBreaker.HALF_OPEN:
+                # 试探调用没有结果 (例如调用方放弃了流式响应) 时，超时后允许新的试探
+                if (
+                    self._probe_started_at is not None
+                    and now - self._probe_started_at < self.reset_timeout
+                ):
+                    return False
+                self._probe_started_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CircuitBreaker.CLOSED
+            self.consecutive_failures = 0
+            self._probe_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.failure_threshold <= 0:
+                return
+            if (
+                self.state == CircuitBreaker.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != CircuitBreaker.OPEN:
+                    self.times_opened += 1
+                    logger.warning(
+                        f"Circuit opened after {self.consecutive_failures} "
+                        "consecutive failures"
+                    )
+                self.state = CircuitBreaker.OPEN
+                self._opened_at = self.clock()
+                self._probe_started_at = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+            }
+
+
+class _StartedEvent:
+    """
+    记录同步调用在工作线程中开始运行的时间
+    """
+
+    def __init__(self):
+        self.at: Optional[float] = None
+        self._event = threading.Event()
+
+    def run(self, function, *args):
+        self.at = time.monotonic()
+        self._event.set()
+        return function(*args)
+
+    def wait(self, future):
+        """
+        等待调用开始运行；调用没有运行就结束 (例如线程池关闭时被取消) 时也返回
+        """
+        future.add_done_callback(lambda _: self._event.set())
+        self._event.wait()
+
+
+class ResilientAIService(AIService):
+    """
+    带容错的 AI 服务 (包装另一个 AIService):
+
+    - 每次调用有截止时间 (从调用开始运行时计算，不含排队时间)，超时后不再等待 SDK 自身的超时；
+    - 临时错误 (超时、连接错误、限流、服务端错误、无效 JSON) 按指数退避重试；
+    - 连续的不可用错误 (超时、连接错误、限流、服务端错误) 后熔断，
+      熔断期间直接抛出 CircuitOpenError，不再调用 AI 服务；
+    - 可选的客户端限流 (AIRateLimiter): 每次调用 (包括重试) 发出前按到达顺序排队，
+      排队时间不计入截止时间。
+    """
+
+    def __init__(
+        self,
+        ai_service: AIService,
+        backend: str,
+        timeout: float = None,
+        max_retries: int = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+        circuit_breaker: CircuitBreaker = None,
+        rate_limiter: AIRateLimiter = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        初始化 ResilientAIService，未指定的参数使用 Config.AI_* 配置。
+
+        Args:
+            ai_service: 实际调用的 AI 服务。
+            backend: AI 服务名称，用于日志和指标。
+            timeout: 单次调用的截止时间 (秒)。
+            max_retries: 临时错误的最多重试次数。
+            backoff_base: 第一次重试前的最长等待时间 (秒)，之后每次加倍。
+            backoff_max: 重试等待时间的上限 (秒)。
+            circuit_breaker: 熔断器，默认按配置新建。
+            rate_limiter: 限流器，None 表示不限流。
+            sleep: 重试等待函数，便于测试。
+        """
+        self.ai_service = ai_service
+        self.backend = backend
+        self.model = getattr(ai_service, "model", None)
+        self.timeout = Config.AI_CALL_TIMEOUT if timeout is None else timeout
+        self.max_retries = Config.AI_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = (
+            Config.AI_RETRY_BACKOFF_BASE if backoff_base is None else backoff_base
+        )
+        self.backoff_max = (
+            Config.AI_RETRY_BACKOFF_MAX if backoff_max is None else backoff_max
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            Config.AI_CIRCUIT_FAILURE_THRESHOLD, Config.AI_CIRCUIT_RESET_TIMEOUT
+        )
+        self.rate_limiter = rate_limiter
+        self.sleep = sleep
+        # 同步调用在线程中执行以便按截止时间放弃；超时的调用在线程中继续运行到 SDK 超时
+        # (SDK 的超时不超过 AI_CALL_TIMEOUT，见 app.utils.http_client.get_http_timeout_seconds)
+        # 线程数不少于限流器允许同时进行的调用数，取得名额的调用不需要在线程池中排队
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(
+                Config.AI_CALL_WORKERS,
+                rate_limiter.max_in_flight if rate_limiter is not None else 0,
+            ),
+            thread_name_prefix=f"ai-{backend}",
+        )
+        self._counts = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "invalid_responses": 0,
+            "rejected": 0,
+            "queue_timeouts": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def generate_story(self, prompt: str) -> Dict:
+        """
+        生成故事，超时和临时错误按配置重试
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        Raises:
+            CircuitOpenError: 如果 AI 服务已熔断
+            AIServiceTimeoutError: 如果最后一次调用超过截止时间
+            AIQueueTimeoutError: 如果在限流队列中等待过久
+        """
+        self._count("calls")
+        tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            self._before_attempt()
+            self._acquire(tokens)
+            try:
+                started = _StartedEvent()
+                try:
+                    future = self._executor.submit(
+                        contextvars.copy_context().run,
+                        started.run,
+                        self.ai_service.generate_story,
+                        prompt,
+                    )
+                except BaseException:
+                    self._release()
+                    raise
+                # 超时的调用在线程中继续运行，结束后才释放名额
+                future.add_done_callback(lambda _: self._release())
+                # 截止时间从调用在工作线程中开始运行时计算: 在线程池中排队 (本地过载)
+                # 不算 AI 服务超时，否则没有发出的调用也会计入熔断器
+                started.wait(future)
+                remaining = (
+                    started.at + self.timeout - time.monotonic()
+                    if started.at is not None
+                    else 0.0
+                )
+                try:
+                    response = future.result(timeout=max(0.0, remaining))
+                except FutureTimeoutError:
+                    future.cancel()
+                    raise AIServiceTimeoutError(
+                        f"{self.backend} AI 服务调用超过 {self.timeout:g} 秒"
+                    )
+                return self._on_success(response)
+            except Exception as e:
+                delay = self._on_failure(e, attempt)
+                if delay is None:
+                    raise
+            self.sleep(delay)
+            attempt += 1
+
+    async def agenerate_story(self, prompt: str) -> Dict:
+        """
+        异步生成故事，超时和临时错误按配置重试
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Dict: 包含故事标题、内容和关键词的字典
+        Raises:
+            CircuitOpenError: 如果 AI 服务已熔断
+            AIServiceTimeoutError: 如果最后一次调用超过截止时间
+            AIQueueTimeoutError: 如果在限流队列中等待过久
+        """
+        self._count("calls")
+        tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            self._before_attempt()
+            await self._aacquire(tokens)
+            try:
+                try:
+                    response = await asyncio.wait_for(
+                        self.ai_service.agenerate_story(prompt), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise AIServiceTimeoutError(
+                        f"{self.backend} AI 服务调用超过 {self.timeout:g} 秒"
+                    )
+                finally:
+                    self._release()
+                return self._on_success(response)
+            except Exception as e:
+                delay = self._on_failure(e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def generate_story_stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式生成故事。已经输出的文本不能撤回，所以流式调用不重试，只经过熔断器；
+        限流在开始读取时排队，名额保持到流式响应结束
+        Args:
+            prompt (str): 提示语
+        Returns:
+            Iterator[str]: JSON 文本片段
+        Raises:
+            CircuitOpenError: 如果 AI 服务已熔断 (调用时)
+        """
+        self._count("calls")
+        self._before_attempt()
+        return self._stream(prompt)
+
+    def _stream(self, prompt: str) -> Iterator[str]:
+        self._acquire(estimate_tokens(prompt))
+        try:
+            yield from self.ai_service.generate_story_stream(prompt)
+        except Exception as e:
+            self._on_failure(e, self.max_retries)
+            raise
+        finally:
+            self._release()
+        self._count("succeeded")
+        self.circuit_breaker.record_success()
+
+    def _before_attempt(self):
+        if not self.circuit_breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(
+                f"{self.backend} AI 服务暂时不可用 (已熔断)，请稍后重试"
+            )
+
+    def _acquire(self, tokens: int):
+        if self.rate_limiter is None:
+            return
+        try:
+            self.rate_limiter.acquire(tokens)
+        except TimeoutError as e:
+            raise self._queue_timeout(e)
+
+    async def _aacquire(self, tokens: int):
+        if self.rate_limiter is None:
+            return
+        try:
+            await self.rate_limiter.aacquire(tokens)
+        except TimeoutError as e:
+            raise self._queue_timeout(e)
+
+    def _release(self):
+        if self.rate_limiter is not None:
+            self.rate_limiter.release()
+
+    def _queue_timeout(self, error: TimeoutError) -> AIQueueTimeoutError:
+        self._count("queue_timeouts")
+        return AIQueueTimeoutError(
+            f"{self.backend} AI 服务请求过多 ({error})，请稍后重试"
+        )
+
+    def _on_success(self, response) -> Dict:
+        if not isinstance(response, dict) or not response:
+            raise InvalidAIResponseError(
+                f"{self.backend} AI 服务返回无效的 JSON 格式: {response!r:.200}"
+            )
+        self._count("succeeded")
+        self.circuit_breaker.record_success()
+        return response
+
+    def _on_failure(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        记录失败。
+        Returns:
+            float: 可以重试时返回重试前的等待时间 (秒)，否则返回 None
+        """
+        if isinstance(error, AIServiceTimeoutError):
+            self._count("timeouts")
+        elif _is_invalid_json(error):
+            self._count("invalid_responses")
+        if is_availability_error(error):
+            self.circuit_breaker.record_failure()
+        else:
+            # AI 服务有响应，说明服务可用 (半开状态下的试探调用也算成功)
+            self.circuit_breaker.record_success()
+        if attempt < self.max_retries and is_transient_error(error):
+            self._count("retries")
+            # 带随机抖动的指数退避，避免多个请求同时重试
+            delay = random.uniform(
+                0, min(self.backoff_max, self.backoff_base * 2**attempt)
+            )
+            logger.warning(
+                f"{self.backend} AI 服务调用失败 (第 {attempt + 1} 次): {error}，"
+                f"{delay:.2f} 秒后重试"
+            )
+            return delay
+        self._count("failed")
+        return None
+
+    def get_metrics(self) -> Dict:
+        """
+        获取调用次数、重试、超时、熔断、限流排队等计数。
+        """
+        with self._lock:
+            metrics = dict(self._counts)
+        metrics["circuit"] = self.circuit_breaker.get_stats()
+        if self.rate_limiter is not None:
+            metrics["rate_limit"] = self.rate_limiter.get_stats()
+        return metrics
+
+    def close(self):
+        """
+        释放被包装的 AI 服务的资源，停止调用线程
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.ai_service.close()
+
+    async def aclose(self):
+        """
+        释放被包装的 AI 服务的异步客户端资源
+        """
+        await self.ai_service.aclose()
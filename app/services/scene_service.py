@@ -4,7 +4,7 @@ import logging
 from typing import Dict, List
 from app.config import Config
 from app.models.scene_model import SceneModel
-from app.utils.json_storage import JSONStorage  # 导入 JSONStorage
+from app.utils.storage_factory import StorageFactory
 
 
 class SceneService:
@@ -13,11 +13,13 @@ class SceneService:
     """
 
     def __init__(self):
-        self.storage = JSONStorage(Config.SCENES_FILE_PATH)  # 使用 JSONStorage
+        self.storage = StorageFactory.create_storage(
+            "scenes", Config.SCENES_FILE_PATH
+        )  # 使用 Config.STORAGE_BACKEND 指定的存储引擎
         self.scenes: Dict[str, SceneModel] = {}  # 初始化为空字典
         try:
-            # 直接从 storage.data 加载数据
-            for item in self.storage.data:
+            # 从 storage 加载数据
+            for item in self.storage.get_all():
                 try:
                     scene_model = SceneModel.from_dict(item)
                     self.scenes[scene_model.id] = scene_model
@@ -59,7 +61,7 @@ class SceneService:
 
         scene = SceneModel(name=name, description=description)
         self.scenes[scene.id] = scene
-        self._save_scenes()
+        self._save_scene(scene)
         logging.info(f"Created new scene: ID={scene.id}, Name='{name}'")
         return scene
 
@@ -77,7 +79,7 @@ class SceneService:
         if scene:
             scene.name = name
             scene.description = description
-            self._save_scenes()
+            self._save_scene(scene)
             return scene
         return None
 
@@ -91,7 +93,10 @@ class SceneService:
         """
         if scene_id in self.scenes:
             del self.scenes[scene_id]
-            self._save_scenes()
+            try:
+                self.storage.delete(scene_id)
+            except Exception as e:
+                logging.error(f"Error deleting scene {scene_id} from storage: {e}")
             return True
         return False
 
@@ -129,13 +134,14 @@ class SceneService:
             logging.info(f"Scene with name '{name}' not found. Creating new scene.")
             return self.create_scene(name, description)
 
-    def _save_scenes(self):
+    def _save_scene(self, scene: SceneModel):
         """
-        保存场景数据到文件。
+        保存一个场景到 storage (已存在时更新，否则添加)。
+        Args:
+            scene (SceneModel): 要保存的场景.
         """
         try:
-            self.storage.save(
-                [scene.to_dict() for scene in self.scenes.values()]
-            )  # 保存到 storage
+            if not self.storage.update(scene.id, scene.to_dict()):
+                self.storage.add(scene.to_dict())
         except Exception as e:
-            logging.error(f"Error saving scenes to file: {e}")
+            logging.error(f"Error saving scene {scene.id} to storage: {e}")
@@ -0,0 +1,231 @@
+# app/services/service_container.py
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from flask import current_app
+from app.config import Config
+from app.services.ai_service import AIService
+from app.services.ai_service_factory import AIServiceFactory
+from app.services.batch_story_generator import BatchStoryGenerator
+from app.services.cached_ai_service import CachedAIService
+from app.services.composite_ai_service import CompositeAIService
+from app.services.job_queue import BaseJobQueue, LocalJobQueue
+from app.services.known_words_prompt_cache import KnownWordsPromptCache
+from app.services.prompt_registry import get_prompt_registry
+from app.services.resilient_ai_service import ResilientAIService
+from app.services.scene_service import SceneService
+from app.services.story_service import StoryService
+from app.services.word_service import WordService
+from app.utils.base_storage import BaseStorage
+from app.utils.generation_cache import GenerationCache, GenerationCacheFactory
+from app.utils.literacy_calculator import LiteracyCalculator
+from app.utils.rate_limiter import AIRateLimiter
+from app.utils.storage_factory import StorageFactory
+
+logger = logging.getLogger(__name__)
+
+# 在多个 AI 服务之间自动路由的 AI 服务名称
+AUTO_AI_SERVICE = "auto"
+
+
+class ServiceContainer:
+    """
+    应用级服务容器，在 create_app() 中创建一次并保存在 app.extensions 中。
+
+    WordService、SceneService、LiteracyCalculator、提示语模板注册表、故事存储和任务队列在
+    所有请求之间共享；AI 服务和 StoryService 按 AI 服务名称缓存，
+    第一次使用某个 AI 服务时创建，之后的请求直接复用。
+    """
+
+    def __init__(
+        self,
+        word_service: Optional[WordService] = None,
+        scene_service: Optional[SceneService] = None,
+        story_storage: Optional[BaseStorage] = None,
+        ai_service_factory: Optional[Callable[[str], AIService]] = None,
+        generation_cache: Optional[GenerationCache] = None,
+        job_queue: Optional[BaseJobQueue] = None,
+    ):
+        """
+        初始化 ServiceContainer。
+
+        Args:
+            word_service: 共享的 WordService，默认新建。
+            scene_service: 共享的 SceneService，默认新建。
+            story_storage: 共享的故事存储，默认由 StorageFactory 创建。
+            ai_service_factory: 根据名称创建 AI 服务的函数，
+                默认为 AIServiceFactory.create_ai_service。
+            generation_cache: AI 生成结果缓存，默认由 GenerationCacheFactory 根据配置创建
+                (AI_CACHE_ENABLED 关闭时不使用缓存)。
+            job_queue: 执行异步生成任务的队列，默认为进程内的 LocalJobQueue。
+        """
+        self.word_service = word_service or WordService()
+        self.scene_service = scene_service or SceneService()
+        self.literacy_calculator = LiteracyCalculator(self.word_service)
+        self.prompt_registry = get_prompt_registry()
+        self.template_env = self.prompt_registry.env
+        self.known_words_cache = KnownWordsPromptCache(
+            self.word_service, self.prompt_registry
+        )
+        self.batch_generator = BatchStoryGenerator(
+            self.get_story_service, self.known_words_cache
+        )
+        self.story_storage = story_storage or StorageFactory.create_storage(
+            "stories", Config.STORIES_FILE_PATH
+        )
+        self.ai_service_factory = (
+            ai_service_factory or AIServiceFactory.create_ai_service
+        )
+        self.generation_cache = (
+            generation_cache or GenerationCacheFactory.create_cache()
+        )
+        self.job_queue = job_queue or LocalJobQueue()
+        # 按请求中的 ai_service 名称缓存 (包括生成结果缓存层)
+        self._ai_services: Dict[str, AIService] = {}
+        # 每个实际的 AI 服务 (deepseek、gemini) 一个，auto 与单独使用时共享同一个熔断器
+        self._backends: Dict[str, AIService] = {}
+        self._resilient_ai_services: Dict[str, ResilientAIService] = {}
+        self._composite_ai_service: Optional[CompositeAIService] = None
+        self._story_services: Dict[str, StoryService] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def get_ai_service(self, ai_service_name: str) -> AIService:
+        """
+        获取 (必要时创建) 指定名称的 AI 服务。
+        名称为 auto 时返回在 Config.AI_AUTO_BACKENDS 之间自动路由的 CompositeAIService。
+
+        Raises:
+            ValueError: 如果 AI 服务名称无效
+        """
+        ai_service = self._ai_services.get(ai_service_name)
+        if ai_service is None:
+            with self._lock:
+                ai_service = self._ai_services.get(ai_service_name)
+                if ai_service is None:
+                    if ai_service_name == AUTO_AI_SERVICE:
+                        ai_service = self._create_composite_ai_service()
+                    else:
+                        ai_service = self._get_backend(ai_service_name)
+                    # 缓存在最外层，命中缓存时不经过熔断器和路由
+                    if self.generation_cache is not None:
+                        ai_service = CachedAIService(
+                            ai_service, ai_service_name, self.generation_cache
+                        )
+                    self._ai_services[ai_service_name] = ai_service
+                    logger.info(f"Created AI service: {ai_service_name}")
+        return ai_service
+
+    def _get_backend(self, ai_service_name: str) -> AIService:
+        # 调用方持有 self._lock
+        backend = self._backends.get(ai_service_name)
+        if backend is None:
+            backend = self.ai_service_factory(ai_service_name)
+            if Config.AI_RESILIENCE_ENABLED:
+                # 截止时间、重试、熔断和限流
+                backend = ResilientAIService(
+                    backend,
+                    ai_service_name,
+                    rate_limiter=self._create_rate_limiter(ai_service_name),
+                )
+                self._resilient_ai_services[ai_service_name] = backend
+            self._backends[ai_service_name] = backend
+        return backend
+
+    @staticmethod
+    def _create_rate_limiter(ai_service_name: str) -> Optional[AIRateLimiter]:
+        limits = Config.AI_RATE_LIMITS.get(ai_service_name)
+        if not Config.AI_RATE_LIMIT_ENABLED or not limits:
+            return None
+        return AIRateLimiter(**limits, max_wait=Config.AI_RATE_LIMIT_MAX_WAIT)
+
+    def _create_composite_ai_service(self) -> CompositeAIService:
+        # 调用方持有 self._lock；没有配置 API Key 的 AI 服务不参与路由
+        backends = {}
+        for name in Config.AI_AUTO_BACKENDS:
+            try:
+                backends[name] = self._get_backend(name)
+            except ValueError as e:
+                logger.warning(f"AI service {name} is not available for auto: {e}")
+        if not backends:
+            raise ValueError("没有可用于自动路由 (auto) 的 AI 服务")
+        self._composite_ai_service = CompositeAIService(backends)
+        return self._composite_ai_service
+
+    def get_story_service(self, ai_service_name: str) -> StoryService:
+        """
+        获取 (必要时创建) 使用指定 AI 服务的 StoryService。
+
+        Raises:
+            ValueError: 如果 AI 服务名称无效
+        """
+        story_service = self._story_services.get(ai_service_name)
+        if story_service is None:
+            ai_service = self.get_ai_service(ai_service_name)
+            with self._lock:
+                story_service = self._story_services.get(ai_service_name)
+                if story_service is None:
+                    story_service = StoryService(
+                        word_service=self.word_service,
+                        scene_service=self.scene_service,
+                        literacy_calculator=self.literacy_calculator,
+                        ai_service=ai_service,
+                        story_storage=self.story_storage,
+                        prompt_registry=self.prompt_registry,
+                        known_words_cache=self.known_words_cache,
+                    )
+                    self._story_services[ai_service_name] = story_service
+        return story_service
+
+    def get_ai_metrics(self) -> Dict:
+        """
+        获取已创建的 AI 服务的调用、重试、超时、熔断和限流排队计数，以及生成结果缓存的命中统计。
+        """
+        return {
+            "backends": {
+                name: service.get_metrics()
+                for name, service in self._resilient_ai_services.items()
+            },
+            "auto": (
+                self._composite_ai_service.get_metrics()
+                if self._composite_ai_service is not None
+                else None
+            ),
+            "generation_cache": (
+                self.generation_cache.get_stats()
+                if self.generation_cache is not None
+                else None
+            ),
+        }
+
+    def close(self):
+        """
+        停止词表文件监视、任务队列和批量生成的线程池，并写入故事存储中尚未写入的修改。
+        可以多次调用 (ASGI 应用退出时和进程退出时都会调用)。
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.word_service.stop_watching()
+        self.job_queue.shutdown()
+        self.batch_generator.close()
+        if self._composite_ai_service is not None:
+            self._composite_ai_service.close()
+        self.story_storage.close()
+
+    async def aclose(self):
+        """
+        关闭 AI 服务的异步客户端，然后执行 close()。用于 ASGI 应用退出时。
+        """
+        for ai_service in list(self._backends.values()):
+            await ai_service.aclose()
+        await asyncio.to_thread(self.close)
+
+
+def get_service_container() -> ServiceContainer:
+    """
+    获取当前 Flask 应用的 ServiceContainer。
+    """
+    return current_app.extensions["service_container"]
@@ -1,21 +1,32 @@
 # app/services/story_service.py
+import asyncio
 import json
 import logging
-from typing import List
-from jinja2 import Environment, FileSystemLoader
+import math
+from typing import Dict, Iterator, List, Optional
 from app.config import Config
 from app.models.story_model import StoryModel  
 from app.services.word_service import WordService
 from app.services.scene_service import SceneService
 from app.utils.literacy_calculator import LiteracyCalculator
 from app.services.ai_service import AIService  
+from app.services.known_words_prompt_cache import KnownWordsPromptCache
+from app.services.prompt_registry import PromptRegistry, get_prompt_registry
+from app.services.resilient_ai_service import (
+    AIServiceUnavailableError,
+    estimate_tokens,
+)
 
 # import logging
 from enum import Enum
-from app.utils.json_storage import JSONStorage
+from app.utils.base_storage import BaseStorage
+from app.utils.storage_factory import StorageFactory
 import string
 from app.services.fetch_story_content import get_story_details  # 引入 get_story_details
 
+# 改写故事时最多传递给 AI 的已知词汇数
+REWRITE_KNOWN_WORDS_LIMIT = 800
+
 
 class StoryService:
     """
@@ -28,16 +39,24 @@ class StoryService:
         scene_service: SceneService,
         literacy_calculator: LiteracyCalculator,
         ai_service: AIService,  # 替换 deepseek_client
+        story_storage: BaseStorage = None,
+        prompt_registry: PromptRegistry = None,
+        known_words_cache: KnownWordsPromptCache = None,
     ):
         self.word_service = word_service
         self.scene_service = scene_service
         self.literacy_calculator = literacy_calculator
         self.ai_service = ai_service  # 替换 deepseek_client
-        self.template_env = Environment(
-            loader=FileSystemLoader("app/prompts"),
-            enable_async=True,
+        # 提示语模板在进程内只编译一次；由 ServiceContainer 传入时共享同一个故事存储
+        self.prompt_registry = prompt_registry or get_prompt_registry()
+        self.template_env = self.prompt_registry.env
+        self.story_storage = story_storage or StorageFactory.create_storage(
+            "stories", Config.STORIES_FILE_PATH
+        )
+        # 按级别缓存已知词汇 JSON 和提示语片段，词表重新加载时自动失效
+        self.known_words_cache = known_words_cache or KnownWordsPromptCache(
+            word_service, self.prompt_registry
         )
-        self.story_storage = JSONStorage(Config.STORIES_FILE_PATH)  # 新增
         self.logger = logging.getLogger(__name__)  # 初始化 logger
         self.punctuation = set(
             string.punctuation
@@ -51,9 +70,7 @@ class StoryService:
         FAILED = 4
 
     def get_prompt(self, file_name, data):
-        template = self.template_env.get_template(file_name)
-        prompt = template.render(data)
-        return prompt
+        return self.prompt_registry.render(file_name, data)
 
     def generate_story(
         self,
@@ -64,10 +81,198 @@ class StoryService:
         key_word_ids: List[str] = None,
         new_word_rate_tolerance: float = None,
         story_word_count_tolerance: int = None,
+        max_attempts: int = None,
+        token_budget: int = None,
     ) -> StoryModel:
         """
-        生成故事
+        生成故事。
+
+        每次生成后用 LiteracyCalculator 计算词数和生词率，不在容差范围内时把超出的生词
+        反馈给 AI 服务重新生成，直到满足要求或者用完次数/token 预算；
+        只保存满足要求 (或最接近要求) 的故事。
+        Args:
+            new_word_rate_tolerance: 生词率容差，默认使用 Config.NEW_WORD_RATE_TOLERANCE。
+            story_word_count_tolerance: 词数容差，默认使用 Config.STORY_WORD_COUNT_TOLERANCE。
+            max_attempts: 最多调用 AI 服务的次数，默认使用 Config.STORY_MAX_ATTEMPTS。
+            token_budget: 最多使用的 token 数 (估计值)，默认使用 Config.STORY_TOKEN_BUDGET，
+                0 表示只受次数限制。
+        Returns:
+            StoryModel: 保存的故事，generation 字段记录调用次数、使用的 token 数和每次的结果
+        """
+        scene, prompt = self._build_generate_prompt(
+            vocabulary_level,
+            scene_id,
+            story_word_count,
+            new_word_rate,
+            key_word_ids,
+            story_word_count_tolerance,
+        )
+        attempts = _GenerationAttempts(
+            self,
+            prompt,
+            vocabulary_level=vocabulary_level,
+            scene_id=scene_id,
+            scene=scene,
+            story_word_count=story_word_count,
+            new_word_rate=new_word_rate,
+            new_word_rate_tolerance=new_word_rate_tolerance,
+            story_word_count_tolerance=story_word_count_tolerance,
+            max_attempts=max_attempts,
+            token_budget=token_budget,
+        )
+        try:
+            while not attempts.finished:
+                try:
+                    # 使用 AI 服务生成故事
+                    ai_response = self.ai_service.generate_story(prompt=attempts.prompt)
+                except Exception as e:
+                    if not attempts.stop_on_error(e):
+                        raise
+                    break
+                attempts.record(ai_response)
+            story = attempts.result()
+            self.story_storage.add(story.to_dict())
+            return story
+        except AIServiceUnavailableError:
+            # 熔断或超时: 保留错误类型，API 返回 503
+            raise
+        except Exception as e:
+            self.logger.error(f"AI 服务调用失败: {e}")
+            raise Exception(f"AI 服务调用失败: {e}")
+
+    async def agenerate_story(
+        self,
+        vocabulary_level: int,
+        scene_id: str,
+        story_word_count: int,
+        new_word_rate: float,
+        key_word_ids: List[str] = None,
+        new_word_rate_tolerance: float = None,
+        story_word_count_tolerance: int = None,
+        max_attempts: int = None,
+        token_budget: int = None,
+    ) -> StoryModel:
+        """
+        异步生成故事: 等待 AI 服务时不占用线程，
+        计算生词率和保存故事在线程池中执行，不阻塞事件循环。
+        参数和返回值与 generate_story 相同。
+        """
+        scene, prompt = self._build_generate_prompt(
+            vocabulary_level,
+            scene_id,
+            story_word_count,
+            new_word_rate,
+            key_word_ids,
+            story_word_count_tolerance,
+        )
+        attempts = _GenerationAttempts(
+            self,
+            prompt,
+            vocabulary_level=vocabulary_level,
+            scene_id=scene_id,
+            scene=scene,
+            story_word_count=story_word_count,
+            new_word_rate=new_word_rate,
+            new_word_rate_tolerance=new_word_rate_tolerance,
+            story_word_count_tolerance=story_word_count_tolerance,
+            max_attempts=max_attempts,
+            token_budget=token_budget,
+        )
+        try:
+            while not attempts.finished:
+                try:
+                    ai_response = await self.ai_service.agenerate_story(
+                        prompt=attempts.prompt
+                    )
+                except Exception as e:
+                    if not attempts.stop_on_error(e):
+                        raise
+                    break
+                await asyncio.to_thread(attempts.record, ai_response)
+            story = attempts.result()
+            await asyncio.to_thread(self.story_storage.add, story.to_dict())
+            return story
+        except AIServiceUnavailableError:
+            # 熔断或超时: 保留错误类型，API 返回 503
+            raise
+        except Exception as e:
+            self.logger.error(f"AI 服务调用失败: {e}")
+            raise Exception(f"AI 服务调用失败: {e}")
+
+    def generate_story_stream(
+        self,
+        vocabulary_level: int,
+        scene_id: str,
+        story_word_count: int,
+        new_word_rate: float,
+        key_word_ids: List[str] = None,
+        new_word_rate_tolerance: float = None,
+        story_word_count_tolerance: int = None,
+    ) -> Iterator[Dict]:
+        """
+        流式生成故事: 逐段返回 AI 服务输出的文本，完整的 JSON 返回后计算生词率并保存故事。
+        提示语在调用时组装，AI 服务在开始迭代时调用。参数与 generate_story 相同。
+        Returns:
+            Iterator[Dict]: 事件 {"event": "token", "data": 文本片段}，
+            最后一个事件是 {"event": "scored", "data": StoryModel}
+        Raises:
+            Exception: 如果场景不存在 (调用时)，或 AI 服务调用失败 (迭代时)
         """
+        scene, prompt = self._build_generate_prompt(
+            vocabulary_level,
+            scene_id,
+            story_word_count,
+            new_word_rate,
+            key_word_ids,
+            story_word_count_tolerance,
+        )
+        chunks = self.ai_service.generate_story_stream(prompt=prompt)
+        return self._stream_story_events(chunks, vocabulary_level, scene_id, scene)
+
+    def _stream_story_events(
+        self, chunks: Iterator[str], vocabulary_level: int, scene_id: str, scene
+    ) -> Iterator[Dict]:
+        try:
+            text = []
+            for chunk in chunks:
+                text.append(chunk)
+                yield {"event": "token", "data": chunk}
+            try:
+                ai_response = json.loads("".join(text))
+            except json.JSONDecodeError as e:
+                raise Exception(f"AI 服务返回无效的 JSON 格式: {e}")
+            story = self._save_generated_story(
+                ai_response, vocabulary_level, scene_id, scene
+            )
+        except AIServiceUnavailableError:
+            # 熔断或超时: 保留错误类型，API 返回 503
+            raise
+        except Exception as e:
+            self.logger.error(f"AI 服务调用失败: {e}")
+            raise Exception(f"AI 服务调用失败: {e}")
+        yield {"event": "scored", "data": story}
+
+    def _build_generate_prompt(
+        self,
+        vocabulary_level: int,
+        scene_id: str,
+        story_word_count: int,
+        new_word_rate: float,
+        key_word_ids: List[str] = None,
+        story_word_count_tolerance: int = None,
+    ):
+        """
+        组装生成故事的提示语
+        Args:
+            story_word_count_tolerance: 词数容差，默认使用 Config.STORY_WORD_COUNT_TOLERANCE
+                (与生成-验证循环检查时使用的默认值相同，所有生成接口的提示语一致)。
+        Returns:
+            (scene, prompt): 场景和完整的提示语
+        Raises:
+            Exception: 如果场景不存在
+        """
+        if story_word_count_tolerance is None:
+            story_word_count_tolerance = Config.STORY_WORD_COUNT_TOLERANCE
         # 1. 初始化状态
         messages = []
         key_words = (
@@ -88,28 +293,16 @@ class StoryService:
             "scene_name": scene.name,
             "scene_description": scene.description,
             "vocabulary_level": vocabulary_level,
-            "story_word_count_min": story_word_count - story_word_count_tolerance
-            if story_word_count_tolerance is not None
-            else story_word_count,
-            "story_word_count_max": story_word_count + story_word_count_tolerance
-            if story_word_count_tolerance is not None
-            else story_word_count,
+            "story_word_count_min": story_word_count - story_word_count_tolerance,
+            "story_word_count_max": story_word_count + story_word_count_tolerance,
             "new_word_rate": new_word_rate,
             "key_words": json.dumps(key_words, ensure_ascii=False),
         }
 
-        # 4. 获取已知词汇
-        known_words_list = self.word_service.get_words_below_level(vocabulary_level)
-        if known_words_list:
-            known_words_prompt_data["known_words"] = json.dumps(
-                [
-                    {"word": word.word, "part_of_speech": word.part_of_speech}
-                    for word in known_words_list
-                ],
-                ensure_ascii=False,  # 修改
-            )
-        else:
-            known_words_prompt_data["known_words"] = json.dumps([])
+        # 4. 获取已知词汇 (按级别缓存的已渲染片段)
+        known_words_prompt_data["known_words_section"] = (
+            self.known_words_cache.get_known_words_section(vocabulary_level)
+        )
 
         # 5. 渲染 known_words_prompt 模板
         known_words_prompt = self.get_prompt(
@@ -126,51 +319,90 @@ class StoryService:
             print(message["content"])
         print("====================================")
 
+        return scene, "\n".join([message["content"] for message in messages])
+
+    def _save_generated_story(
+        self, ai_response, vocabulary_level: int, scene_id: str, scene
+    ) -> StoryModel:
+        """
+        根据 AI 服务的返回结果计算生词率并保存故事
+        """
+        story = self._score_story(ai_response, vocabulary_level, scene_id, scene)
+        self.story_storage.add(story.to_dict())
+        return story
+
+    def _score_story(
+        self, ai_response, vocabulary_level: int, scene_id: str, scene
+    ) -> StoryModel:
+        """
+        根据 AI 服务的返回结果计算词数和生词率 (不保存)
+        Raises:
+            Exception: 如果 AI 服务返回的不是有效的故事 JSON
+        """
         try:
-            # 使用 AI 服务生成故事
-            ai_response = self.ai_service.generate_story(
-                prompt="\n".join([message["content"] for message in messages])
+            title = ai_response.get("title")
+            content = ai_response.get("content")
+            ai_key_words_raw = (
+                ai_response.get("key_words") if ai_response.get("key_words") else []
             )
 
-            try:
-                title = ai_response.get("title")
-                content = ai_response.get("content")
-                ai_key_words_raw = (
-                    ai_response.get("key_words") if ai_response.get("key_words") else []
-                )
-                
-                # 调用 LiteracyCalculator 计算词数、生词率和生词列表
-                word_count, new_word_rate, unknown_words_raw = (
-                    self.literacy_calculator.calculate_vocabulary_rate(
-                        content, vocabulary_level
-                    )
-                )
-                
-
-                story = StoryModel(
-                    story_id=None,
-                    title=title,
-                    content=content,
-                    vocabulary_level=vocabulary_level,
-                    scene_id=scene_id,
-                    scene_name=scene.name,
-                    word_count=word_count,
-                    new_word_rate=new_word_rate,
-                    key_words=ai_key_words_raw,  # 直接使用原始列表
-                    unknown_words=unknown_words_raw,  # 直接使用原始列表
-                    created_at=None,
+            # 调用 LiteracyCalculator 计算词数、生词率和生词列表
+            word_count, new_word_rate, unknown_words_raw = (
+                self.literacy_calculator.calculate_vocabulary_rate(
+                    content, vocabulary_level
                 )
+            )
 
-                self.story_storage.add(story.to_dict())
-                return story
+            story = StoryModel(
+                story_id=None,
+                title=title,
+                content=content,
+                vocabulary_level=vocabulary_level,
+                scene_id=scene_id,
+                scene_name=scene.name,
+                word_count=word_count,
+                new_word_rate=new_word_rate,
+                key_words=ai_key_words_raw,  # 直接使用原始列表
+                unknown_words=unknown_words_raw,  # 直接使用原始列表
+                created_at=None,
+            )
+            return story
 
-            except (json.JSONDecodeError, TypeError) as e:
-                self.logger.error(f"AI 服务返回无效的 JSON 格式: {e}")
-                # 不记录故事
-                raise Exception(f"AI 服务返回无效的 JSON 格式: {e}")
-        except Exception as e:
-            self.logger.error(f"AI 服务调用失败: {e}")
-            raise Exception(f"AI 服务调用失败: {e}")
+        except (json.JSONDecodeError, TypeError) as e:
+            self.logger.error(f"AI 服务返回无效的 JSON 格式: {e}")
+            # 不记录故事
+            raise Exception(f"AI 服务返回无效的 JSON 格式: {e}")
+
+    def _validate_story(
+        self,
+        story: StoryModel,
+        new_word_rate: float,
+        new_word_rate_tolerance: float = None,
+        story_word_count: int = None,
+        story_word_count_tolerance: int = None,
+    ) -> bool:
+        """
+        检查故事的生词率和词数是否在容差范围内。
+        Args:
+            story: 已经计算过词数和生词率的故事。
+            new_word_rate: 目标生词率。
+            new_word_rate_tolerance: 生词率容差，默认使用 Config.NEW_WORD_RATE_TOLERANCE。
+            story_word_count: 目标词数，为空时不检查词数。
+            story_word_count_tolerance: 词数容差，默认使用 Config.STORY_WORD_COUNT_TOLERANCE。
+        Returns:
+            bool: 是否满足要求
+        """
+        if new_word_rate_tolerance is None:
+            new_word_rate_tolerance = Config.NEW_WORD_RATE_TOLERANCE
+        if story_word_count_tolerance is None:
+            story_word_count_tolerance = Config.STORY_WORD_COUNT_TOLERANCE
+        if abs(story.new_word_rate - new_word_rate) > new_word_rate_tolerance:
+            return False
+        if story_word_count is not None and (
+            abs(story.word_count - story_word_count) > story_word_count_tolerance
+        ):
+            return False
+        return True
 
     def rewrite_story(
         self,
@@ -209,17 +441,16 @@ class StoryService:
         self.logger.info(f"成功获取原始故事 '{original_title}' (级别:{original_level})")
 
         # 2. 准备 Prompt
-        known_words_list = self.word_service.get_words_below_level(target_level)
-        known_words_sample = [  # 只传递部分示例给 Prompt，避免过长
-            {"word": w.word, "part_of_speech": w.part_of_speech}
-            for w in known_words_list[:800]  # 最多传递 200 个词作为参考
-        ]
+        # 只传递部分示例给 Prompt，避免过长
+        known_words_sample = self.known_words_cache.get_known_words_json(
+            target_level, limit=REWRITE_KNOWN_WORDS_LIMIT
+        )
 
         rewrite_prompt_data = {
             "original_story_text": original_text,
             "original_story_level": original_level,
             "target_level": target_level,
-            "known_words": json.dumps(known_words_sample, ensure_ascii=False),
+            "known_words": known_words_sample,
         }
         rewrite_prompt = self.get_prompt("rerwrite_prompt.txt", rewrite_prompt_data)
 
@@ -312,6 +543,220 @@ class StoryService:
         except json.JSONDecodeError as e:
             self.logger.exception(f"解析 AI 响应 JSON 失败: {e}")
             return None
+        except AIServiceUnavailableError:
+            raise
         except Exception as e:
             self.logger.exception(f"改写过程中发生错误: {e}")
             return None
+
+
+def _used_tokens(prompt: str, ai_response) -> int:
+    """
+    估计一次调用实际使用的 token 数 (提示语 + AI 服务返回的内容)
+    """
+    output = json.dumps(ai_response, ensure_ascii=False, default=str)
+    return math.ceil((len(prompt) + len(output)) / Config.AI_CHARS_PER_TOKEN)
+
+
+class _GenerationAttempts:
+    """
+    生成-验证循环的状态 (generate_story 和 agenerate_story 共用)。
+
+    state 按 StoryService.DialogueState 变化: INIT (第一次生成)、
+    PROVIDE_KNOWN_WORDS (把超出的生词反馈给 AI 服务重新生成)、
+    FINAL_INSTRUCTION (满足要求) 或 FAILED (用完次数/token 预算，使用最接近要求的故事)。
+    """
+
+    def __init__(
+        self,
+        story_service: StoryService,
+        prompt: str,
+        vocabulary_level: int,
+        scene_id: str,
+        scene,
+        story_word_count: int,
+        new_word_rate: float,
+        new_word_rate_tolerance: float = None,
+        story_word_count_tolerance: int = None,
+        max_attempts: int = None,
+        token_budget: int = None,
+    ):
+        self.story_service = story_service
+        self.base_prompt = prompt
+        self.prompt = prompt  # 下一次调用 AI 服务的提示语
+        self.vocabulary_level = vocabulary_level
+        self.scene_id = scene_id
+        self.scene = scene
+        self.story_word_count = story_word_count
+        self.new_word_rate = new_word_rate
+        self.new_word_rate_tolerance = (
+            Config.NEW_WORD_RATE_TOLERANCE
+            if new_word_rate_tolerance is None
+            else new_word_rate_tolerance
+        )
+        self.story_word_count_tolerance = (
+            Config.STORY_WORD_COUNT_TOLERANCE
+            if story_word_count_tolerance is None
+            else story_word_count_tolerance
+        )
+        self.max_attempts = max(1, max_attempts or Config.STORY_MAX_ATTEMPTS)
+        self.token_budget = (
+            Config.STORY_TOKEN_BUDGET if token_budget is None else token_budget
+        )
+        self.state = StoryService.DialogueState.INIT
+        self.stop_reason: Optional[str] = None
+        self.history: List[Dict] = []
+        self.tokens = 0
+        self.best: Optional[StoryModel] = None
+        self._best_distance = math.inf
+        self._error: Optional[Exception] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (
+            StoryService.DialogueState.FINAL_INSTRUCTION,
+            StoryService.DialogueState.FAILED,
+        )
+
+    def record(self, ai_response):
+        """
+        计算一次生成结果的词数和生词率，决定是否需要重新生成
+        """
+        attempt = len(self.history) + 1
+        self.tokens += _used_tokens(self.prompt, ai_response)
+        try:
+            story = self.story_service._score_story(
+                ai_response, self.vocabulary_level, self.scene_id, self.scene
+            )
+        except Exception as e:
+            # 无效的 JSON: 用原始提示语重新生成
+            self._error = e
+            self.history.append({"attempt": attempt, "valid": False})
+            self._next(self.base_prompt)
+            return
+
+        converged = self.story_service._validate_story(
+            story,
+            self.new_word_rate,
+            new_word_rate_tolerance=self.new_word_rate_tolerance,
+            story_word_count=self.story_word_count,
+            story_word_count_tolerance=self.story_word_count_tolerance,
+        )
+        self.history.append(
+            {
+                "attempt": attempt,
+                "valid": True,
+                "word_count": story.word_count,
+                "new_word_rate": story.new_word_rate,
+                "converged": converged,
+            }
+        )
+        self.story_service.logger.info(
+            f"第 {attempt} 次生成: 词数 {story.word_count}，生词率 {story.new_word_rate}，"
+            f"{'满足要求' if converged else '不满足要求'}"
+        )
+        distance = self._distance(story)
+        if distance < self._best_distance:
+            self.best, self._best_distance = story, distance
+        if converged:
+            self._finish(StoryService.DialogueState.FINAL_INSTRUCTION, "converged")
+        else:
+            self._next(self._revision_prompt(story, attempt))
+
+    def stop_on_error(self, error: Exception) -> bool:
+        """
+        AI 服务调用失败。已经有可用的故事时停止并使用它，返回 True；否则返回 False (调用方抛出错误)
+        """
+        if self.best is None:
+            return False
+        self.story_service.logger.warning(
+            f"第 {len(self.history) + 1} 次生成失败，使用之前的故事: {error}"
+        )
+        self._finish(StoryService.DialogueState.FAILED, "error")
+        return True
+
+    def result(self) -> StoryModel:
+        """
+        满足要求 (或最接近要求) 的故事，generation 字段记录生成过程
+        Raises:
+            Exception: 如果每次生成都没有返回有效的故事
+        """
+        if self.best is None:
+            raise self._error or Exception("AI 服务没有返回有效的故事")
+        self.best.generation = {
+            "attempts": len(self.history),
+            "max_attempts": self.max_attempts,
+            "tokens": self.tokens,
+            "token_budget": self.token_budget,
+            "converged": self.state == StoryService.DialogueState.FINAL_INSTRUCTION,
+            "stop_reason": self.stop_reason,
+            "history": self.history,
+        }
+        return self.best
+
+    def _next(self, prompt: str):
+        if len(self.history) >= self.max_attempts:
+            self._finish(StoryService.DialogueState.FAILED, "max_attempts")
+        elif self.token_budget and (
+            self.tokens + estimate_tokens(prompt) > self.token_budget
+        ):
+            self._finish(StoryService.DialogueState.FAILED, "token_budget")
+        else:
+            self.state = StoryService.DialogueState.PROVIDE_KNOWN_WORDS
+            self.prompt = prompt
+
+    def _finish(self, state, reason: str):
+        self.state = state
+        self.stop_reason = reason
+
+    def _distance(self, story: StoryModel) -> float:
+        # 与目标的差距 (以容差为单位)，用于在不满足要求时选择最接近的故事
+        return abs(story.new_word_rate - self.new_word_rate) / max(
+            self.new_word_rate_tolerance, 1e-6
+        ) + abs(story.word_count - self.story_word_count) / max(
+            self.story_word_count_tolerance, 1
+        )
+
+    def _revision_prompt(self, story: StoryModel, attempt: int) -> str:
+        new_word_rate_max = self.new_word_rate + self.new_word_rate_tolerance
+        new_word_rate_min = max(0, self.new_word_rate - self.new_word_rate_tolerance)
+        story_word_count_max = self.story_word_count + self.story_word_count_tolerance
+        story_word_count_min = self.story_word_count - self.story_word_count_tolerance
+
+        unknown_words = []
+        if story.new_word_rate > new_word_rate_max:
+            # 重点词汇是要求包含的生词，不反馈
+            key_words = {
+                key_word.get("word")
+                for key_word in story.key_words
+                if isinstance(key_word, dict)
+            }
+            for unknown_word in story.unknown_words:
+                word = unknown_word.get("word")
+                if word and word not in key_words and word not in unknown_words:
+                    unknown_words.append(word)
+            unknown_words = unknown_words[: Config.STORY_FEEDBACK_MAX_WORDS]
+
+        revision_prompt = self.story_service.get_prompt(
+            "revision_prompt.txt",
+            {
+                "attempt": attempt,
+                "previous_content": story.content,
+                "vocabulary_level": self.vocabulary_level,
+                "word_count": story.word_count,
+                "word_count_issue": not (
+                    story_word_count_min <= story.word_count <= story_word_count_max
+                ),
+                "story_word_count_min": story_word_count_min,
+                "story_word_count_max": story_word_count_max,
+                "new_word_rate": round(story.new_word_rate, 3),
+                "new_word_rate_issue": not (
+                    new_word_rate_min <= story.new_word_rate <= new_word_rate_max
+                ),
+                "new_word_rate_min": round(new_word_rate_min, 3),
+                "new_word_rate_max": round(new_word_rate_max, 3),
+                "unknown_words": "、".join(unknown_words),
+                "too_few_new_words": story.new_word_rate < new_word_rate_min,
+            },
+        )
+        return f"{self.base_prompt}\n{revision_prompt}"
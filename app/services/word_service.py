@@ -1,20 +1,164 @@
 # app/services/word_service.py
 import json
 import logging
-from typing import Dict, List, Set
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set
 from app.config import Config
 from app.models.word_model import WordModel
+from app.utils import vocabulary_cache
+
+
+class VocabularySnapshot:
+    """
+    词表及其所有派生索引的不可变快照。
+
+    重新加载词表时在旁边构建新的快照，再整体替换 WordService 持有的快照；
+    已经拿到旧快照的请求在整个计算过程中看到的是一致的数据。
+    """
+
+    def __init__(self, words: Dict[str, WordModel], version: int = 0):
+        """
+        初始化快照并构建索引。
+        Args:
+            words: 词表，key 是 word_id， value 是 WordModel 对象。
+            version: 快照版本号，每次替换词表时递增。
+        """
+        self.words = words
+        self.version = version
+        self.surface_index = self._build_surface_index(words)
+        self._build_level_index(words)
+
+    def _build_level_index(self, words: Dict[str, WordModel]):
+        """
+        构建按级别分桶的索引，以及 "低于级别 L" 的前缀视图和计数。
+
+        words_by_level 是所有整数级别的词按级别排序 (级别相同时按词表顺序) 的列表，
+        below_level_offsets[L] 是其中级别小于 L 的词的个数，
+        因此 "低于级别 L" 的词就是 words_by_level[:offset]。
+        """
+        self.all_words: List[WordModel] = list(words.values())
+        self.level_buckets: Dict[int, List[WordModel]] = {}
+        for word_model in self.all_words:
+            self.level_buckets.setdefault(word_model.chaotong_level, []).append(
+                word_model
+            )
+        int_levels = sorted(
+            level for level in self.level_buckets if isinstance(level, int)
+        )
+        self.words_by_level: List[WordModel] = []
+        self.below_level_offsets: Dict[int, int] = {}
+        if int_levels:
+            for level in range(int_levels[0], int_levels[-1] + 1):
+                self.below_level_offsets[level] = len(self.words_by_level)
+                if level in self.level_buckets:
+                    self.words_by_level.extend(self.level_buckets[level])
+            self.below_level_offsets[int_levels[-1] + 1] = len(self.words_by_level)
+        self.min_level = int_levels[0] if int_levels else None
+
+    def below_level_offset(self, level: int) -> int:
+        """
+        级别小于 level 的词的个数 (O(1))
+        """
+        if level is None or self.min_level is None or level <= self.min_level:
+            return 0
+        return self.below_level_offsets.get(level, len(self.words_by_level))
+
+    @staticmethod
+    def _build_surface_index(words: Dict[str, WordModel]) -> Dict[str, List[WordModel]]:
+        """
+        构建小写词形 -> WordModel 列表 (按词表顺序) 的索引
+        """
+        surface_index: Dict[str, List[WordModel]] = {}
+        for word_model in words.values():
+            if word_model.word:
+                surface_index.setdefault(word_model.word.lower(), []).append(word_model)
+        return surface_index
+
+    def get_words_by_surface(
+        self, word: str, part_of_speech: str = None
+    ) -> List[WordModel]:
+        """
+        根据词形获取词语 (不区分大小写)，参见 WordService.get_words_by_surface。
+        """
+        word_models = self.surface_index.get(word.lower(), [])
+        if part_of_speech is not None:
+            word_models = [
+                word_model
+                for word_model in word_models
+                if word_model.part_of_speech == part_of_speech
+            ]
+        return word_models
 
 
 class WordService:
     """
     词语服务，提供词语相关的业务逻辑。
+
+    词表和索引保存在一个 VocabularySnapshot 中，reload() 或文件监视线程
+    在不重启进程的情况下整体替换它。
     """
 
     def __init__(self):
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+        self._source_signature = self._stat_source()
         self.words = self._load_words()
         logging.info(f"Loaded {len(self.words)} words from {Config.WORDS_FILE_PATH}")
 
+    def __getstate__(self):
+        # 进程池等场景下只复制词表快照，不复制锁和监视线程
+        return {"snapshot": self.snapshot}
+
+    def __setstate__(self, state):
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self._source_signature = None
+        self.snapshot = state["snapshot"]
+
+    @property
+    def words(self) -> Dict[str, WordModel]:
+        """
+        词表，key 是 word_id， value 是 WordModel 对象
+        """
+        return self.snapshot.words
+
+    @words.setter
+    def words(self, words: Dict[str, WordModel]):
+        # 替换词表时构建新的快照 (包含所有索引)
+        current = getattr(self, "snapshot", None)
+        self.snapshot = VocabularySnapshot(
+            words, version=current.version + 1 if current else 0
+        )
+
+    def _read_words(self) -> Dict[str, WordModel]:
+        """
+        读取并解析 words.json (优先使用预编译缓存)
+        Returns:
+           一个字典， key 是 word_id， value 是 WordModel 对象
+        Raises:
+            FileNotFoundError: 词表文件不存在
+            json.JSONDecodeError: 词表文件不是有效的 JSON
+        """
+        with open(Config.WORDS_FILE_PATH, "r", encoding="utf-8") as f:
+            content = f.read()
+        # words.json 内容未变化时直接使用预编译的缓存，跳过 JSON 解析和模型构建
+        cache_key = vocabulary_cache.source_key(content, Config.WORDS_FILE_PATH)
+        rows = vocabulary_cache.load(Config.WORDS_CACHE_PATH, cache_key)
+        if rows is not None:
+            word_models = [WordModel.from_row(row) for row in rows]
+        else:
+            word_models = [WordModel.from_dict(item) for item in json.loads(content)]
+            vocabulary_cache.save(
+                Config.WORDS_CACHE_PATH,
+                cache_key,
+                [word_model.to_row() for word_model in word_models],
+            )
+        return {word_model.id: word_model for word_model in word_models}
+
     def _load_words(self) -> Dict[str, WordModel]:
         """
         加载词语数据
@@ -22,13 +166,7 @@ class WordService:
            一个字典， key 是 word_id， value 是 WordModel 对象
         """
         try:
-            with open(Config.WORDS_FILE_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                words = {}
-                for item in data:
-                    word_model = WordModel.from_dict(item)
-                    words[word_model.id] = word_model
-                return words
+            return self._read_words()
         except FileNotFoundError:
             logging.error(f"File not found: {Config.WORDS_FILE_PATH}")
             return {}
@@ -36,6 +174,87 @@ class WordService:
             logging.error(f"JSON decode error: {Config.WORDS_FILE_PATH}")
             return {}
 
+    def reload(self) -> Dict:
+        """
+        重新加载 words.json：在旁边构建新的词表和索引，然后原子地替换快照。
+        加载失败时保留当前词表。
+        Returns:
+            Dict: 包含 version、word_count 和 reload_ms (耗时，毫秒) 的字典.
+        Raises:
+            FileNotFoundError: 词表文件不存在
+            json.JSONDecodeError: 词表文件不是有效的 JSON
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            signature = self._stat_source()
+            snapshot = VocabularySnapshot(
+                self._read_words(), version=self.snapshot.version + 1
+            )
+            self.snapshot = snapshot
+            self._source_signature = signature
+            reload_ms = (time.perf_counter() - start) * 1000
+        logging.info(
+            f"Reloaded {len(snapshot.words)} words from {Config.WORDS_FILE_PATH} "
+            f"(version {snapshot.version}) in {reload_ms:.1f} ms"
+        )
+        return {
+            "version": snapshot.version,
+            "word_count": len(snapshot.words),
+            "reload_ms": round(reload_ms, 3),
+        }
+
+    @staticmethod
+    def _stat_source():
+        try:
+            stat = os.stat(Config.WORDS_FILE_PATH)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def reload_if_changed(self) -> Optional[Dict]:
+        """
+        words.json 的修改时间或大小变化时重新加载。
+        Returns:
+            Dict: reload() 的结果，文件没有变化时返回 None.
+        """
+        signature = self._stat_source()
+        if signature is None or signature == self._source_signature:
+            return None
+        return self.reload()
+
+    def start_watching(self, interval: float = None):
+        """
+        启动后台线程，每隔 interval 秒检查 words.json 是否变化并自动重新加载。
+        Args:
+            interval (float, optional): 检查间隔 (秒)，默认使用 Config.WORDS_WATCH_INTERVAL.
+        """
+        interval = Config.WORDS_WATCH_INTERVAL if interval is None else interval
+        if interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._watcher_stop.clear()
+
+        def watch():
+            while not self._watcher_stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    # 文件可能正在被写入，下一次检查时重试
+                    logging.error(f"Failed to reload {Config.WORDS_FILE_PATH}: {e}")
+
+        self._watcher = threading.Thread(
+            target=watch, name="words-json-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        """
+        停止文件监视线程。
+        """
+        self._watcher_stop.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
     def get_word_by_id(self, word_id: str) -> WordModel:
         """
         根据ID获取词语信息。
@@ -46,6 +265,19 @@ class WordService:
         """
         return self.words.get(word_id)
 
+    def get_words_by_surface(
+        self, word: str, part_of_speech: str = None
+    ) -> List[WordModel]:
+        """
+        根据词形获取词语 (不区分大小写)，同一个词可能有多个词性和级别。
+        Args:
+            word (str): 词语.
+            part_of_speech (str, optional): 词性，如果指定则只返回该词性的词语.
+        Returns:
+            List[WordModel]: 词语模型对象列表 (按词表顺序)，不存在则返回空列表.
+        """
+        return self.snapshot.get_words_by_surface(word, part_of_speech)
+
     def get_words(
         self,
         chaotong_level: int = None,
@@ -61,12 +293,11 @@ class WordService:
         Returns:
             List[WordModel]: 词语模型对象列表.
         """
-        filtered_words = list(self.words.values())
-
+        snapshot = self.snapshot
         if chaotong_level is not None:
-            filtered_words = [
-                word for word in filtered_words if word.chaotong_level == chaotong_level
-            ]
+            filtered_words = snapshot.level_buckets.get(chaotong_level, [])
+        else:
+            filtered_words = snapshot.all_words
 
         start = (page - 1) * page_size
         end = start + page_size
@@ -80,14 +311,10 @@ class WordService:
         Returns:
             int: 词语总数.
         """
-        filtered_words = list(self.words.values())
-
+        snapshot = self.snapshot
         if chaotong_level is not None:
-            filtered_words = [
-                word for word in filtered_words if word.chaotong_level == chaotong_level
-            ]
-
-        return len(filtered_words)
+            return len(snapshot.level_buckets.get(chaotong_level, []))
+        return len(snapshot.all_words)
 
     def get_words_below_level(self, level: int) -> List[WordModel]:
         """
@@ -95,16 +322,21 @@ class WordService:
         Args:
            level (int): 目标级别, 不包含这个级别
         Returns:
-            List[WordModel]:  词语模型对象列表
-        """
-        filtered_words = [
-            word
-            for word in self.words.values()
-            if level is not None
-            and isinstance(word.chaotong_level, int)
-            and word.chaotong_level < level  # 确保只获取小于目标级别的词汇
-        ]
-        return filtered_words
+            List[WordModel]:  词语模型对象列表 (按级别排序)
+        """
+        snapshot = self.snapshot
+        # 确保只获取小于目标级别的词汇
+        return snapshot.words_by_level[: snapshot.below_level_offset(level)]
+
+    def count_words_below_level(self, level: int) -> int:
+        """
+        获取指定级别以下的词汇数量 (不复制词表)
+        Args:
+           level (int): 目标级别, 不包含这个级别
+        Returns:
+            int: 词汇数量
+        """
+        return self.snapshot.below_level_offset(level)
 
     def get_key_words_by_ids(self, key_word_ids: List[str]) -> List[Dict]:
         """
@@ -6,6 +6,24 @@ from app.config import get_api_key_from_config
 import logging
 
 
+def check_api_key(authorization):
+    """
+    检查 Authorization 请求头中的 API Key
+    Args:
+        authorization: Authorization 请求头的值 (Bearer <API Key>)，可以为 None
+    Returns:
+        str: 认证失败时返回错误信息，通过时返回 None
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        logging.warning("API Key missing")
+        return "API Key missing"
+    api_key = authorization[7:]  # Remove "Bearer " prefix
+    if api_key != get_api_key_from_config():
+        logging.warning("Invalid API Key")
+        return "Invalid API Key"
+    return None
+
+
 def api_key_required(func):
     """
     API Key 认证装饰器
@@ -13,14 +31,9 @@ def api_key_required(func):
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        api_key = request.headers.get("Authorization")
-        if not api_key or not api_key.startswith("Bearer "):
-            logging.warning("API Key missing")
-            return handle_error(401, "API Key missing")
-        api_key = api_key[7:]  # Remove "Bearer " prefix
-        if api_key != get_api_key_from_config():
-            logging.warning("Invalid API Key")
-            return handle_error(401, "Invalid API Key")
+        error_message = check_api_key(request.headers.get("Authorization"))
+        if error_message:
+            return handle_error(401, error_message)
         return func(*args, **kwargs)
 
     return wrapper
@@ -0,0 +1,137 @@
+# app/utils/base_storage.py
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+class BaseStorage(ABC):
+    """
+    存储引擎抽象基类，定义 StoryService / SceneService 使用的存取接口。
+
+    每个存储保存一组字典项，id_field 指定主键字段 (例如 'story_id')，
+    index_fields 声明需要建立索引的查询字段 (例如 'vocabulary_level')。
+    """
+
+    id_field: str = "id"
+
+    @abstractmethod
+    def add(self, item: Dict[str, Any]):
+        """
+        添加一个新项。
+        Args:
+            item: 要添加的字典项。
+        """
+        pass
+
+    @abstractmethod
+    def get_all(self) -> List[Dict[str, Any]]:
+        """
+        按插入顺序获取所有项。
+        """
+        pass
+
+    @abstractmethod
+    def find_by_id(
+        self, item_id: str, id_field: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        根据 ID 查找项。
+        Args:
+            item_id: 要查找的 ID。
+            id_field: 用作 ID 的键名 (默认为存储的主键字段)。
+        Returns:
+            找到的字典项，如果未找到则返回 None。
+        """
+        pass
+
+    @abstractmethod
+    def find_by(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """
+        查找 field == value 的所有项 (按插入顺序)。
+        """
+        pass
+
+    @abstractmethod
+    def update(
+        self, item_id: str, updated_item: Dict[str, Any], id_field: Optional[str] = None
+    ) -> bool:
+        """
+        根据 ID 更新一个项。
+        Returns:
+            如果找到并更新成功则返回 True，否则返回 False。
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, item_id: str, id_field: Optional[str] = None) -> bool:
+        """
+        根据 ID 删除项。
+        Returns:
+            如果找到并删除成功则返回 True，否则返回 False。
+        """
+        pass
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        按字段等值过滤、排序并分页查询。
+
+        默认实现用 find_by 取第一个过滤条件的候选集，再在内存中过滤和排序；
+        支持原生查询的存储引擎应覆盖此方法。
+
+        Args:
+            filters: 字段等值条件，例如 {"vocabulary_level": 10, "scene_id": "..."}。
+            order_by: 排序字段，例如 'created_at'；为空时按插入顺序。
+            descending: 是否降序。
+            limit: 最多返回的条数。
+            offset: 跳过的条数。
+        Returns:
+            匹配的字典项列表。
+        """
+        filters = filters or {}
+        if filters:
+            first_field, first_value = next(iter(filters.items()))
+            items = self.find_by(first_field, first_value)
+            items = [
+                item
+                for item in items
+                if all(item.get(field) == value for field, value in filters.items())
+            ]
+        else:
+            items = list(self.get_all())
+        if order_by:
+            # None 值排在最前 (升序时)
+            items.sort(
+                key=lambda item: (
+                    item.get(order_by) is not None,
+                    item.get(order_by) if item.get(order_by) is not None else 0,
+                ),
+                reverse=descending,
+            )
+        end = offset + limit if limit is not None else None
+        return items[offset:end]
+
+    def flush(self) -> bool:
+        """
+        把尚未写入的修改写入磁盘。
+        """
+        return True
+
+    def close(self):
+        """
+        写入剩余修改并释放资源。
+        """
+        self.flush()
+
+    @contextmanager
+    def batch(self):
+        """
+        上下文管理器：其中的所有修改在退出时一次性写入。
+        """
+        yield self
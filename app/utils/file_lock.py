@@ -0,0 +1,101 @@
+# app/utils/file_lock.py
+import os
+import threading
+import time
+from typing import Optional
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    基于锁文件的跨进程互斥锁 (POSIX 使用 flock，Windows 使用 msvcrt.locking)。
+
+    同一个 FileLock 对象在同一线程内可重入；不同进程 (例如多个 gunicorn worker)
+    或同一进程内的不同 FileLock 对象之间互斥。
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        """
+        初始化 FileLock。
+
+        Args:
+            path: 锁文件路径，不存在时自动创建。
+            timeout: 获取锁的最长等待时间 (秒)，None 表示一直等待。
+        """
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(self, fd: int):
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def acquire(self):
+        """
+        获取锁。
+
+        Raises:
+            TimeoutError: 在 timeout 秒内没有获取到锁。
+        """
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                deadline = (
+                    time.monotonic() + self.timeout
+                    if self.timeout is not None
+                    else None
+                )
+                while not self._try_lock(fd):
+                    if deadline is not None and time.monotonic() >= deadline:
+                        os.close(fd)
+                        raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                    time.sleep(0.01)
+                self._fd = fd
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        """
+        释放锁。
+        """
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                self._unlock(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,284 @@
+# app/utils/generation_cache.py
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache(ABC):
+    """
+    AI 生成结果缓存的抽象基类。key 由 CachedAIService 计算，value 是 AI 服务返回的字典。
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        获取缓存的生成结果。
+        Returns:
+            Dict: 生成结果，不存在或已过期时返回 None。
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict):
+        """
+        保存生成结果。
+        """
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """
+        清空缓存。
+        """
+        pass
+
+    def _count(self, value: Optional[Dict]) -> Optional[Dict]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get_stats(self) -> Dict:
+        """
+        获取命中统计。
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class MemoryGenerationCache(GenerationCache):
+    """
+    进程内缓存: 按最近最少使用淘汰，条目超过 ttl 秒后过期。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return self._count(entry[1] if entry else None)
+
+    def set(self, key: str, value: Dict):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskGenerationCache(GenerationCache):
+    """
+    磁盘缓存: 每个条目一个 JSON 文件 (<directory>/<key 前两位>/<key>.json)，
+    进程重启后仍然有效，多个工作进程可以共享。条目超过 ttl 秒后过期。
+
+    每写入 sweep_every 个条目清理一次目录: 删除过期的文件，条目数超过 max_entries 时
+    按文件修改时间删除最早写入的条目 (两次清理之间最多超出 sweep_every 个)。
+    """
+
+    def __init__(
+        self, directory: str, ttl: float, max_entries: int = 0, sweep_every: int = 16
+    ):
+        """
+        初始化 DiskGenerationCache。
+
+        Args:
+            directory: 缓存目录。
+            ttl: 条目有效期 (秒)。
+            max_entries: 最多保存的条目数，0 表示不限制。
+            sweep_every: 每写入多少个条目清理一次 (启动后第一次写入时也会清理)。
+        """
+        super().__init__()
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_every = max(1, sweep_every)
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return self._count(None)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable generation cache entry {path}: {e}")
+            return self._count(None)
+        if entry.get("expires_at", 0) <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return self._count(None)
+        return self._count(entry.get("response"))
+
+    def set(self, key: str, value: Dict):
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"expires_at": time.time() + self.ttl, "response": value},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            # 缓存写入失败不影响生成结果
+            logger.warning(f"Failed to write generation cache entry {path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            sweep = self._writes % self.sweep_every == 0
+            self._writes += 1
+        if sweep:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """
+        删除过期的条目，条目数超过 max_entries 时删除最早写入的条目。
+        文件修改时间即写入时间，不需要读取文件内容。
+        Returns:
+            int: 删除的条目数
+        """
+        now = time.time()
+        entries = []  # (修改时间, 路径)
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass  # 已被其他进程删除
+        entries.sort()
+        expired = [path for mtime, path in entries if mtime + self.ttl <= now]
+        live = [path for mtime, path in entries if mtime + self.ttl > now]
+        if self.max_entries > 0 and len(live) > self.max_entries:
+            expired.extend(live[: len(live) - self.max_entries])
+        removed = 0
+        for path in expired:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["evictions"] = self.evictions
+        return stats
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+
+class TieredGenerationCache(GenerationCache):
+    """
+    两级缓存: 先查进程内缓存，未命中再查磁盘缓存，磁盘命中的条目提升到进程内缓存。
+    """
+
+    def __init__(self, memory: GenerationCache, disk: GenerationCache):
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Dict]:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return self._count(value)
+
+    def set(self, key: str, value: Dict):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats["memory"] = self.memory.get_stats()
+        stats["disk"] = self.disk.get_stats()
+        return stats
+
+
+class GenerationCacheFactory:
+    """
+    根据配置创建 AI 生成结果缓存
+    """
+
+    @staticmethod
+    def create_cache() -> Optional[GenerationCache]:
+        """
+        根据 Config.AI_CACHE_* 创建缓存。
+        Returns:
+            GenerationCache: 缓存对象，AI_CACHE_ENABLED 关闭时返回 None。
+        """
+        if not Config.AI_CACHE_ENABLED:
+            return None
+        memory = MemoryGenerationCache(Config.AI_CACHE_MAX_ENTRIES, Config.AI_CACHE_TTL)
+        if not Config.AI_CACHE_DIR:
+            return memory
+        return TieredGenerationCache(
+            memory,
+            DiskGenerationCache(
+                Config.AI_CACHE_DIR,
+                Config.AI_CACHE_TTL,
+                max_entries=Config.AI_CACHE_DISK_MAX_ENTRIES,
+                sweep_every=Config.AI_CACHE_DISK_SWEEP_EVERY,
+            ),
+        )
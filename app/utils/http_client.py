@@ -0,0 +1,45 @@
+# app/utils/http_client.py
+import httpx
+from app.config import Config
+
+
+def get_http_limits() -> httpx.Limits:
+    """
+    根据配置返回 AI 服务 HTTP 连接池的大小和 keep-alive 设置。
+    """
+    return httpx.Limits(
+        max_connections=Config.AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.AI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.AI_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_timeout_seconds() -> float:
+    """
+    AI 服务请求的超时时间 (秒)。
+
+    开启容错时不超过单次调用的截止时间 AI_CALL_TIMEOUT: 超过截止时间的同步调用仍在线程中
+    运行到 SDK 超时，如果 SDK 超时更长，重试时同一个故事会被生成 (并付费) 两次，
+    同时占用两个限流名额。
+    """
+    timeout = Config.AI_HTTP_TIMEOUT
+    if Config.AI_RESILIENCE_ENABLED and Config.AI_CALL_TIMEOUT > 0:
+        timeout = min(timeout, Config.AI_CALL_TIMEOUT)
+    return timeout
+
+
+def get_http_timeout() -> httpx.Timeout:
+    """
+    根据配置返回 AI 服务请求的超时设置。
+    """
+    return httpx.Timeout(
+        get_http_timeout_seconds(), connect=Config.AI_HTTP_CONNECT_TIMEOUT
+    )
+
+
+def get_sdk_max_retries() -> int:
+    """
+    SDK 自身的重试次数: 开启容错时由 ResilientAIService 重试 (每次重试都经过截止时间、
+    熔断器和限流)，SDK 不再重试；否则使用 OpenAI SDK 的默认值。
+    """
+    return 0 if Config.AI_RESILIENCE_ENABLED else 2
@@ -1,31 +1,359 @@
+import atexit
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from app.config import Config
+from app.utils.base_storage import BaseStorage
+from app.utils.file_lock import FileLock
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class JSONStorage:
+# 存储模式
+MODE_SNAPSHOT = "snapshot"  # 每次修改都完整重写 JSON 文件
+MODE_JOURNAL = "journal"  # 追加写 JSON-lines 日志，定期压缩为快照
+STORAGE_MODES = (MODE_SNAPSHOT, MODE_JOURNAL)
+
+# 持久化级别
+DURABILITY_STRICT = "strict"  # 每次修改立即写入并 fsync
+DURABILITY_BATCHED = "batched"  # 合并短时间窗口内的修改，一次写入并 fsync
+DURABILITY_RELAXED = "relaxed"  # 合并写入，不调用 fsync，由操作系统决定落盘时机
+DURABILITY_MODES = (DURABILITY_STRICT, DURABILITY_BATCHED, DURABILITY_RELAXED)
+
+# 所有未关闭的存储，进程退出时统一 flush，避免丢失合并中的修改
+_open_storages: "weakref.WeakSet[JSONStorage]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_storages():
+    for storage in list(_open_storages):
+        storage.close()
+
+
+def _fsync_directory(directory: str):
+    """
+    fsync 目录，确保 rename 本身已经落盘 (Windows 不支持对目录 fsync，直接跳过)。
+    """
+    if os.name != "posix":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JSONStorage(BaseStorage):
     """
     一个通用的 JSON 文件存储类，用于加载、添加和保存字典列表。
+
+    支持两种存储模式：
+    * snapshot: 每次 add/update/delete 都把整个列表重写到 JSON 文件。
+    * journal: 每次修改只向 `<filepath>.journal` 追加一行操作记录 (JSON-lines)，
+      启动时加载快照并重放日志；日志条数达到阈值后压缩回快照文件。
+      快照文件的格式与 snapshot 模式完全一致，两种模式可以随时切换。
+
+    快照总是先写入临时文件、fsync 后再 rename 覆盖，崩溃不会留下半截文件。
+    durability 为 batched/relaxed 时，flush_interval 秒内的多次修改会合并为一次写入；
+    调用 flush() 可立即写入，close() 会写入剩余修改并停止后台定时器。
+
+    多个进程 (例如多个 gunicorn worker) 可以共享同一个文件：所有写入都在
+    `<filepath>.lock` 文件锁内进行，并且在写入前合并其他进程的修改；读取前通过
+    快照和日志文件的 (inode, size, mtime) 检测变化，只有其他进程真正修改过文件时才重新读取，
+    journal 模式下只读取日志新增的部分。
     """
 
-    def __init__(self, filepath: str):
+    def __init__(
+        self,
+        filepath: str,
+        mode: Optional[str] = None,
+        compact_threshold: Optional[int] = None,
+        id_field: str = "id",
+        index_fields: Optional[Iterable[str]] = None,
+        durability: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+    ):
         """
         初始化 JSONStorage。
 
         Args:
             filepath: JSON 文件的路径。
+            mode: 存储模式 ("snapshot" 或 "journal")，默认使用 Config.STORAGE_MODE。
+            compact_threshold: journal 模式下触发压缩的日志条数，默认使用
+                Config.STORAGE_JOURNAL_COMPACT_THRESHOLD。
+            id_field: 用作主键的字段名 (例如 'story_id', 'scene_id', 'word_id')，
+                会为其维护哈希索引。
+            index_fields: 需要维护二级索引的字段名列表 (例如 'vocabulary_level')。
+            durability: 持久化级别 ("strict", "batched" 或 "relaxed")，默认使用
+                Config.STORAGE_DURABILITY。
+            flush_interval: 合并写入的时间窗口 (秒)，默认使用 Config.STORAGE_FLUSH_INTERVAL。
         """
         self.filepath = filepath
-        self.data: List[Dict[str, Any]] = self._load()
+        self.id_field = id_field
+        self.index_fields = tuple(index_fields or ())
+        # 数据以内部序号为键保存在有序字典中，删除无需复制列表
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._next_seq = 0
+        # 主键索引: id -> 序号列表 (通常只有一个元素，兼容重复 id 的历史数据)
+        self._id_index: Dict[Any, List[int]] = {}
+        # 二级索引: 字段名 -> 字段值 -> 序号集合 (用 dict 保持插入顺序)
+        self._secondary_indexes: Dict[str, Dict[Any, Dict[int, None]]] = {
+            field: {} for field in self.index_fields
+        }
+        self._data_view: Optional[List[Dict[str, Any]]] = None
+        self.mode = mode or Config.STORAGE_MODE
+        if self.mode not in STORAGE_MODES:
+            raise ValueError(f"无效的存储模式: {self.mode}")
+        self.compact_threshold = (
+            compact_threshold
+            if compact_threshold is not None
+            else Config.STORAGE_JOURNAL_COMPACT_THRESHOLD
+        )
+        self.journal_path = f"{filepath}.journal"
+        # 压缩过程中使用的临时文件，见 compact()
+        self._next_snapshot_path = f"{filepath}.next"
+        self._compacting_journal_path = f"{self.journal_path}.compacting"
+        self._journal_entries = 0  # 当前日志中的操作条数
+
+        self.durability = durability or Config.STORAGE_DURABILITY
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"无效的持久化级别: {self.durability}")
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else Config.STORAGE_FLUSH_INTERVAL
+        )
+        self._lock = threading.RLock()
+        self._pending_operations: List[Dict[str, Any]] = []  # 尚未写入磁盘的修改
+        self._flush_timer: Optional[threading.Timer] = None
+        self._batch_depth = 0
+
+        # 跨进程协调
+        self._file_lock = FileLock(
+            f"{filepath}.lock", timeout=Config.STORAGE_LOCK_TIMEOUT
+        )
+        self._disk_signature: Optional[Tuple] = None  # 最近一次读写后磁盘文件的签名
+        self._journal_offset = 0  # 已经应用到内存的日志字节数
+
+        with self._file_lock:
+            self._reload()
+            if (
+                self.mode == MODE_JOURNAL
+                and self._journal_entries >= self.compact_threshold
+            ):
+                self._compact()
         logger.info(
-            f"Initialized JSONStorage for {filepath}. Loaded {len(self.data)} items."
+            f"Initialized JSONStorage for {filepath} (mode={self.mode}, durability={self.durability}). Loaded {len(self._items)} items."
+        )
+        _open_storages.add(self)
+
+    @property
+    def data(self) -> List[Dict[str, Any]]:
+        """
+        按插入顺序返回所有项的列表。列表在两次修改之间被缓存复用。
+        """
+        if self._data_view is None:
+            self._data_view = list(self._items.values())
+        return self._data_view
+
+    @data.setter
+    def data(self, items: List[Dict[str, Any]]):
+        """
+        整体替换数据并重建所有索引。
+        """
+        self._items = {}
+        self._next_seq = 0
+        self._id_index = {}
+        self._secondary_indexes = {field: {} for field in self.index_fields}
+        self._data_view = None
+        for item in items:
+            self._insert(item)
+
+    @staticmethod
+    def _is_hashable(value: Any) -> bool:
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    def _index_item(self, seq: int, item: Dict[str, Any]):
+        """
+        把一项加入主键索引和二级索引。
+        """
+        item_id = item.get(self.id_field)
+        if item_id is not None and self._is_hashable(item_id):
+            self._id_index.setdefault(item_id, []).append(seq)
+        for field, index in self._secondary_indexes.items():
+            value = item.get(field)
+            if self._is_hashable(value):
+                index.setdefault(value, {})[seq] = None
+
+    def _unindex_item(self, seq: int, item: Dict[str, Any]):
+        """
+        把一项从主键索引和二级索引中移除。
+        """
+        item_id = item.get(self.id_field)
+        if item_id is not None and self._is_hashable(item_id):
+            seqs = self._id_index.get(item_id)
+            if seqs is not None:
+                seqs.remove(seq)
+                if not seqs:
+                    del self._id_index[item_id]
+        for field, index in self._secondary_indexes.items():
+            value = item.get(field)
+            if self._is_hashable(value):
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.pop(seq, None)
+                    if not bucket:
+                        del index[value]
+
+    def _insert(self, item: Dict[str, Any]):
+        seq = self._next_seq
+        self._next_seq += 1
+        self._items[seq] = item
+        self._index_item(seq, item)
+        self._data_view = None
+
+    def _replace(self, seq: int, item: Dict[str, Any]):
+        self._unindex_item(seq, self._items[seq])
+        self._items[seq] = item  # 原位替换，保持插入顺序
+        self._index_item(seq, item)
+        self._data_view = None
+
+    def _remove(self, seq: int):
+        item = self._items.pop(seq)
+        self._unindex_item(seq, item)
+        self._data_view = None
+
+    def _find_seqs(self, item_id: Any, id_field: str) -> List[int]:
+        """
+        查找 id_field == item_id 的所有项的序号，优先使用索引。
+        """
+        if id_field == self.id_field and self._is_hashable(item_id):
+            return list(self._id_index.get(item_id, ()))
+        if id_field in self._secondary_indexes and self._is_hashable(item_id):
+            return sorted(self._secondary_indexes[id_field].get(item_id, ()))
+        # 未建索引的字段退化为线性扫描
+        return [
+            seq for seq, item in self._items.items() if item.get(id_field) == item_id
+        ]
+
+    @staticmethod
+    def _stat_signature(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _current_signature(self) -> Tuple:
+        return (
+            self._stat_signature(self.filepath),
+            (
+                self._stat_signature(self.journal_path)
+                if self.mode == MODE_JOURNAL
+                else None
+            ),
         )
 
+    def _reload(self):
+        """
+        从磁盘重新加载全部数据，然后重新应用本进程尚未写入的修改。调用方必须持有文件锁。
+        """
+        if self.mode == MODE_JOURNAL:
+            self._recover_compaction()
+        self.data = self._load()
+        self._journal_offset = 0
+        if self.mode == MODE_JOURNAL:
+            self._replay_journal()
+        self._disk_signature = self._current_signature()
+        for operation in self._pending_operations:
+            self._apply(operation)
+
+    def _refresh_if_changed(self) -> bool:
+        """
+        如果其他进程修改过文件，则把修改合并到内存中。
+
+        Returns:
+            是否读取了新的数据。
+        """
+        with self._lock:
+            signature = self._current_signature()
+            if signature == self._disk_signature:
+                return False
+            snapshot_signature, journal_signature = signature
+            old_snapshot_signature, old_journal_signature = self._disk_signature
+            if (
+                self.mode == MODE_JOURNAL
+                and not self._pending_operations
+                and snapshot_signature == old_snapshot_signature
+                and journal_signature is not None
+                and (
+                    old_journal_signature is None
+                    or journal_signature[0] == old_journal_signature[0]
+                )
+                and journal_signature[1] >= self._journal_offset
+            ):
+                # 快照未变，其他进程只追加了日志：只读取新增的记录
+                self._read_journal_tail()
+            else:
+                with self._file_lock:
+                    self._reload()
+            logger.debug(f"Reloaded {self.filepath} after change by another process.")
+            return True
+
+    def reload_if_changed(self) -> bool:
+        """
+        检查文件是否被其他进程修改，如有则重新读取。
+
+        Returns:
+            是否读取了新的数据。
+        """
+        return self._refresh_if_changed()
+
+    def _read_journal_tail(self):
+        """
+        从上次读到的位置继续读取日志，只应用完整的记录 (其他进程可能正在追加)。
+        """
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        break
+                    try:
+                        operation = json.loads(raw_line.decode("utf-8"))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        logger.error(
+                            f"Corrupted record in {self.journal_path} at offset {self._journal_offset}"
+                        )
+                        break
+                    self._apply(operation)
+                    self._journal_entries += 1
+                    self._journal_offset += len(raw_line)
+        except IOError as e:
+            logger.exception(f"IOError reading journal {self.journal_path}: {e}")
+            return
+        self._disk_signature = (
+            self._disk_signature[0],
+            self._stat_signature(self.journal_path),
+        )
+        # 读取时文件可能仍在增长，签名与偏移量不一致时下次检查会继续读取
+        if (
+            self._disk_signature[1]
+            and self._disk_signature[1][1] != self._journal_offset
+        ):
+            self._disk_signature = (self._disk_signature[0], None)
+
     def _load(self) -> List[Dict[str, Any]]:
         """
         从文件加载数据。如果文件不存在、为空或格式无效，则返回空列表。
@@ -57,12 +385,13 @@ class JSONStorage:
                         logger.error(
                             f"Invalid format in {self.filepath}: Expected a list, got {type(loaded_data)}. Initializing with empty list."
                         )
-                        return []
                 except json.JSONDecodeError:
                     logger.exception(
                         f"Failed to decode JSON from {self.filepath}. File content might be corrupted. Initializing with empty list."
                     )
-                    return []
+            # 文件损坏：先移到一边保留现场，避免下一次保存把它覆盖掉
+            self._quarantine_corrupted_file()
+            return []
         except IOError as e:
             logger.exception(
                 f"IOError reading file {self.filepath}: {e}. Initializing with empty list."
@@ -74,22 +403,302 @@ class JSONStorage:
             )
             return []
 
-    def _save(self):
+    def _quarantine_corrupted_file(self):
         """
-        将当前数据完整保存回文件，覆盖原有内容。
+        把无法解析的数据文件重命名为 `<filepath>.corrupt-<时间戳>`。
         """
+        corrupt_path = f"{self.filepath}.corrupt-{int(time.time())}"
+        try:
+            os.replace(self.filepath, corrupt_path)
+            logger.error(f"Moved corrupted file {self.filepath} to {corrupt_path}")
+        except OSError as e:
+            logger.exception(f"Failed to move corrupted file {self.filepath}: {e}")
+
+    @property
+    def _fsync_enabled(self) -> bool:
+        return self.durability != DURABILITY_RELAXED
+
+    def _write_json_file(self, path: str):
+        """
+        把当前数据写入指定路径，并根据持久化级别 fsync。
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            if self._fsync_enabled:
+                os.fsync(f.fileno())
+
+    def _save(self) -> bool:
+        """
+        将当前数据完整保存回文件：写入临时文件后原子替换，写入中途崩溃不会损坏原文件。
+
+        Returns:
+            是否保存成功。
+        """
+        directory = os.path.dirname(self.filepath)
+        temp_path = f"{self.filepath}.{os.getpid()}.tmp"
         try:
             # 确保目录存在
-            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=4)
+            os.makedirs(directory, exist_ok=True)
+            self._write_json_file(temp_path)
+            os.replace(temp_path, self.filepath)
+            if self._fsync_enabled:
+                _fsync_directory(directory)
             logger.debug(
-                f"Successfully saved {len(self.data)} items to {self.filepath}"
+                f"Successfully saved {len(self._items)} items to {self.filepath}"
             )
+            return True
         except IOError as e:
             logger.exception(f"IOError writing file {self.filepath}: {e}")
         except Exception as e:  # 捕获其他可能的异常
             logger.exception(f"Unexpected error saving file {self.filepath}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+    def _persist(self, operation: Dict[str, Any]):
+        """
+        记录一次修改并按持久化级别写入：strict 立即写入，其他级别在
+        flush_interval 秒后合并写入。snapshot 模式重写整个文件，journal 模式只追加操作记录。
+
+        Args:
+            operation: 操作记录，例如 {"op": "add", "item": {...}}。
+        """
+        with self._lock:
+            self._pending_operations.append(operation)
+            if self._batch_depth:
+                return
+            if self.durability == DURABILITY_STRICT or self.flush_interval <= 0:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> bool:
+        """
+        立即把所有尚未写入的修改写入磁盘。
+
+        Returns:
+            是否写入成功 (没有待写入的修改时也返回 True)。写入失败时修改会保留，
+            下次 flush 时重试。
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_operations:
+                return True
+            try:
+                with self._file_lock:
+                    # 先合并其他进程的修改，避免覆盖它们写入的数据
+                    self._refresh_if_changed()
+                    if self.mode == MODE_JOURNAL:
+                        saved = self._append_journal(self._pending_operations)
+                    else:
+                        saved = self._save()
+                    if saved:
+                        self._pending_operations = []
+                        if self.mode == MODE_JOURNAL:
+                            self._journal_offset = os.path.getsize(self.journal_path)
+                            if (
+                                self.compact_threshold
+                                and self._journal_entries >= self.compact_threshold
+                            ):
+                                self._compact()
+                        self._disk_signature = self._current_signature()
+            except TimeoutError as e:
+                logger.error(f"Failed to flush {self.filepath}: {e}")
+                return False
+            return saved
+
+    def close(self):
+        """
+        写入剩余修改并停止后台定时器。
+        """
+        self.flush()
+        _open_storages.discard(self)
+
+    @contextmanager
+    def batch(self):
+        """
+        上下文管理器：其中的所有修改在退出时一次性写入。
+
+        Example:
+            with storage.batch():
+                for story in stories:
+                    storage.update(story["story_id"], story)
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def _append_journal(self, operations: List[Dict[str, Any]]) -> bool:
+        """
+        向日志文件追加操作记录 (一次 write)，写入量只与这些记录的大小有关。
+
+        Returns:
+            是否写入成功。
+        """
+        try:
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            lines = "".join(
+                json.dumps(operation, ensure_ascii=False) + "\n"
+                for operation in operations
+            )
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                if self._fsync_enabled:
+                    os.fsync(f.fileno())
+            self._journal_entries += len(operations)
+            return True
+        except IOError as e:
+            logger.exception(f"IOError appending to journal {self.journal_path}: {e}")
+        except Exception as e:  # 捕获其他可能的异常
+            logger.exception(
+                f"Unexpected error appending to journal {self.journal_path}: {e}"
+            )
+        return False
+
+    def _apply(self, operation: Dict[str, Any]) -> bool:
+        """
+        在内存中应用一条操作记录 (用于重放日志)，不做任何持久化。
+
+        Returns:
+            操作是否被成功应用。
+        """
+        op = operation.get("op")
+        if op == "add":
+            self._insert(operation["item"])
+            return True
+        id_field = operation.get("id_field", self.id_field)
+        seqs = self._find_seqs(operation.get("id"), id_field)
+        if op == "update":
+            if not seqs:
+                return False
+            self._replace(seqs[0], operation["item"])
+            return True
+        if op == "delete":
+            for seq in seqs:
+                self._remove(seq)
+            return bool(seqs)
+        logger.warning(f"Unknown journal operation in {self.journal_path}: {op}")
+        return False
+
+    def _replay_journal(self):
+        """
+        重放日志文件中的操作。进程在追加过程中崩溃可能留下不完整的最后一行，
+        此时截断到最后一条完整记录，避免后续追加的记录与残行拼接。
+        """
+        self._journal_entries = 0
+        if not os.path.exists(self.journal_path):
+            return
+
+        valid_offset = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        logger.warning(
+                            f"Incomplete trailing record in {self.journal_path}, discarding it."
+                        )
+                        break
+                    try:
+                        operation = json.loads(raw_line.decode("utf-8"))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        logger.error(
+                            f"Corrupted record in {self.journal_path} at offset {valid_offset}, "
+                            f"ignoring it and everything after it."
+                        )
+                        break
+                    self._apply(operation)
+                    self._journal_entries += 1
+                    valid_offset += len(raw_line)
+            if valid_offset < os.path.getsize(self.journal_path):
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_offset)
+            self._journal_offset = valid_offset
+        except IOError as e:
+            logger.exception(f"IOError reading journal {self.journal_path}: {e}")
+            return
+
+        logger.info(
+            f"Replayed {self._journal_entries} journal records from {self.journal_path}."
+        )
+
+    def compact(self):
+        """
+        把当前数据压缩成新的快照并清空日志。
+
+        压缩按以下顺序进行，任何一步崩溃后都可以在下次启动时恢复:
+        1. 把完整数据写入 `<filepath>.next`;
+        2. 把日志重命名为 `<journal>.compacting` (提交点);
+        3. 用 `<filepath>.next` 替换快照文件;
+        4. 删除 `<journal>.compacting`。
+        """
+        if self.mode != MODE_JOURNAL:
+            self.flush()
+            return
+        with self._lock:
+            # 先把合并中的修改写入日志，保证压缩前日志与内存一致
+            if self._pending_operations and not self.flush():
+                return
+            with self._file_lock:
+                self._refresh_if_changed()
+                self._compact()
+                self._disk_signature = self._current_signature()
+
+    def _compact(self):
+        """
+        执行压缩。调用方必须持有文件锁。
+        """
+        directory = os.path.dirname(self.filepath)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._write_json_file(self._next_snapshot_path)
+            if os.path.exists(self.journal_path):
+                os.replace(self.journal_path, self._compacting_journal_path)
+            os.replace(self._next_snapshot_path, self.filepath)
+            if os.path.exists(self._compacting_journal_path):
+                os.remove(self._compacting_journal_path)
+            if self._fsync_enabled:
+                _fsync_directory(directory)
+            logger.info(
+                f"Compacted {self._journal_entries} journal records into {self.filepath}."
+            )
+            self._journal_entries = 0
+            self._journal_offset = 0
+        except IOError as e:
+            logger.exception(f"IOError compacting {self.filepath}: {e}")
+        except Exception as e:  # 捕获其他可能的异常
+            logger.exception(f"Unexpected error compacting {self.filepath}: {e}")
+
+    def _recover_compaction(self):
+        """
+        根据 compact() 留下的临时文件，把中断的压缩补完或回滚。调用方必须持有文件锁。
+        """
+        try:
+            if os.path.exists(self._compacting_journal_path):
+                # 已越过提交点：新快照要么已经生效，要么还在 .next 中
+                if os.path.exists(self._next_snapshot_path):
+                    os.replace(self._next_snapshot_path, self.filepath)
+                os.remove(self._compacting_journal_path)
+                logger.warning(f"Finished interrupted compaction of {self.filepath}.")
+            elif os.path.exists(self._next_snapshot_path):
+                # 未到提交点：旧快照 + 日志仍然完整，丢弃未完成的新快照
+                os.remove(self._next_snapshot_path)
+                logger.warning(
+                    f"Rolled back interrupted compaction of {self.filepath}."
+                )
+        except OSError as e:
+            logger.exception(f"Error recovering compaction of {self.filepath}: {e}")
 
     def add(self, item: Dict[str, Any]):
         """
@@ -102,36 +711,57 @@ class JSONStorage:
             logger.error(f"Attempted to add non-dict item: {type(item)}")
             return
 
-        self.data.append(item)
-        self._save()
-        logger.info(f"Added new item to {self.filepath}. Total items: {len(self.data)}")
+        with self._lock:
+            self._refresh_if_changed()
+            self._insert(item)
+            self._persist({"op": "add", "item": item})
+            logger.info(
+                f"Added new item to {self.filepath}. Total items: {len(self._items)}"
+            )
 
     def get_all(self) -> List[Dict[str, Any]]:
         """
         获取所有存储的项。
         """
-        return self.data
+        with self._lock:
+            self._refresh_if_changed()
+            return self.data
 
     def find_by_id(
-        self, item_id: str, id_field: str = "id"
+        self, item_id: str, id_field: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         根据 ID 查找项。
 
         Args:
             item_id: 要查找的 ID。
-            id_field: 字典中用作 ID 的键名 (默认为 'id')。
+            id_field: 字典中用作 ID 的键名 (默认为存储的主键字段)。
 
         Returns:
             找到的字典项，如果未找到则返回 None。
         """
-        for item in self.data:
-            if item.get(id_field) == item_id:
-                return item
-        return None
+        with self._lock:
+            self._refresh_if_changed()
+            seqs = self._find_seqs(item_id, id_field or self.id_field)
+            return self._items[seqs[0]] if seqs else None
+
+    def find_by(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """
+        查找 field == value 的所有项 (按插入顺序)。对已声明二级索引的字段为 O(结果数)。
+
+        Args:
+            field: 字段名，例如 'vocabulary_level'。
+            value: 字段值。
+
+        Returns:
+            匹配的字典项列表。
+        """
+        with self._lock:
+            self._refresh_if_changed()
+            return [self._items[seq] for seq in self._find_seqs(value, field)]
 
     def update(
-        self, item_id: str, updated_item: Dict[str, Any], id_field: str = "id"
+        self, item_id: str, updated_item: Dict[str, Any], id_field: Optional[str] = None
     ) -> bool:
         """
         根据 ID 更新一个项，并立即保存。
@@ -139,43 +769,57 @@ class JSONStorage:
         Args:
             item_id: 要更新的项的 ID。
             updated_item: 包含更新后数据的字典。
-            id_field: 字典中用作 ID 的键名 (默认为 'id')。
+            id_field: 字典中用作 ID 的键名 (默认为存储的主键字段)。
 
         Returns:
             如果找到并更新成功则返回 True，否则返回 False。
         """
-        for i, item in enumerate(self.data):
-            if item.get(id_field) == item_id:
+        with self._lock:
+            self._refresh_if_changed()
+            id_field = id_field or self.id_field
+            seqs = self._find_seqs(item_id, id_field)
+            if seqs:
                 # 确保更新后的项仍然包含 ID 字段
                 if id_field not in updated_item:
                     updated_item[id_field] = item_id
-                self.data[i] = updated_item
-                self._save()
+                self._replace(seqs[0], updated_item)
+                self._persist(
+                    {
+                        "op": "update",
+                        "id_field": id_field,
+                        "id": item_id,
+                        "item": updated_item,
+                    }
+                )
                 logger.info(f"Updated item {item_id} in {self.filepath}.")
                 return True
-        logger.warning(
-            f"Item with {id_field}={item_id} not found for update in {self.filepath}."
-        )
-        return False
+            logger.warning(
+                f"Item with {id_field}={item_id} not found for update in {self.filepath}."
+            )
+            return False
 
-    def delete(self, item_id: str, id_field: str = "id") -> bool:
+    def delete(self, item_id: str, id_field: Optional[str] = None) -> bool:
         """
         根据 ID 删除一个项，并立即保存。
 
         Args:
             item_id: 要删除的项的 ID。
-            id_field: 字典中用作 ID 的键名 (默认为 'id')。
+            id_field: 字典中用作 ID 的键名 (默认为存储的主键字段)。
 
         Returns:
             如果找到并删除成功则返回 True，否则返回 False。
         """
-        original_length = len(self.data)
-        self.data = [item for item in self.data if item.get(id_field) != item_id]
-        if len(self.data) < original_length:
-            self._save()
-            logger.info(f"Deleted item {item_id} from {self.filepath}.")
-            return True
-        logger.warning(
-            f"Item with {id_field}={item_id} not found for deletion in {self.filepath}."
-        )
-        return False
+        with self._lock:
+            self._refresh_if_changed()
+            id_field = id_field or self.id_field
+            seqs = self._find_seqs(item_id, id_field)
+            if seqs:
+                for seq in seqs:
+                    self._remove(seq)
+                self._persist({"op": "delete", "id_field": id_field, "id": item_id})
+                logger.info(f"Deleted item {item_id} from {self.filepath}.")
+                return True
+            logger.warning(
+                f"Item with {id_field}={item_id} not found for deletion in {self.filepath}."
+            )
+            return False
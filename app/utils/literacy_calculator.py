@@ -1,6 +1,7 @@
 # app/utils/literacy_calculator.py
 import re
-from typing import List, Tuple, Set, Dict, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Set, Dict, Union, Iterable, Optional
 import logging
 import string
 
@@ -39,6 +40,77 @@ class LiteracyCalculator:
         }
         # 添加反向词性映射 (中文 -> 英文缩写)
         self.inverse_pos_mapping = {v: k for k, v in self.pos_mapping.items()}
+        # 预先计算的查找表，首次计算生词率时构建，词表被替换时重建
+        self._level_index = None
+
+    def _build_level_index(self, words) -> Tuple[Dict, Union[Tuple, None]]:
+        """
+        遍历一次词表，预先计算按级别判断已知词所需的查找表。
+        Args:
+            words: word_service.words (word_id -> WordModel)。
+        Returns:
+            (known_levels, missing_pos):
+            known_levels 为 (word, 英文词性缩写) -> 最低 chaotong_level；
+            missing_pos 为缺少词性的词中级别最低的 (chaotong_level, word)，没有则为 None。
+        """
+        known_levels: Dict[Tuple[str, str], int] = {}
+        missing_pos = None
+        for word_model in words.values():
+            level = word_model.chaotong_level
+            if level is None or not isinstance(level, int):
+                continue
+            if not word_model.part_of_speech:
+                if missing_pos is None or level < missing_pos[0]:
+                    missing_pos = (level, word_model.word)
+                continue
+            # 将中文词性转换为英文缩写
+            pos_abbreviation = self.inverse_pos_mapping.get(word_model.part_of_speech)
+            if not pos_abbreviation:
+                self.logger.error(
+                    f"无法将词性 '{word_model.part_of_speech}' (来自词 '{word_model.word}') 映射为英文缩写。"
+                )
+                continue  # 跳过无法映射的词性
+            key = (word_model.word, pos_abbreviation)
+            if key not in known_levels or level < known_levels[key]:
+                known_levels[key] = level
+        self.logger.debug(
+            f"Built literacy level index: {len(known_levels)} (word, pos) entries"
+        )
+        return known_levels, missing_pos
+
+    def _vocabulary(self):
+        """
+        获取当前词表快照。一次计算中只读取一次，词表在计算过程中被重新加载时
+        仍然使用同一个快照，结果保持一致。
+        Returns:
+            带有 words 和 get_words_by_surface() 的词表快照 (没有快照时为 word_service 本身)。
+        """
+        return getattr(self.word_service, "snapshot", self.word_service)
+
+    def _get_level_index(
+        self, target_level: int, vocabulary=None
+    ) -> Dict[Tuple[str, str], int]:
+        """
+        获取预先计算的 (word, 英文词性缩写) -> 最低级别 查找表。
+        词表对象被替换 (例如重新加载) 时自动重建。
+        Args:
+            target_level: 目标级别。
+            vocabulary: 词表快照，默认为当前快照。
+        Raises:
+            ValueError: 如果 words.json 文件中存在低于目标级别的词，但是没有词性。
+        """
+        vocabulary = vocabulary or self._vocabulary()
+        words = vocabulary.words
+        index = self._level_index
+        if index is None or index[0] is not words:
+            # 整体替换元组，并发请求不会看到构建到一半的查找表
+            index = (words,) + self._build_level_index(words)
+            self._level_index = index
+        _, known_levels, missing_pos = index
+        if missing_pos is not None and missing_pos[0] < target_level:
+            self.logger.error(f"word {missing_pos[1]} 不存在词性")
+            raise ValueError(f"词 {missing_pos[1]} 缺少词性，请检查 words.json 文件")
+        return known_levels
 
     def _load_known_words(self, target_level: int) -> Set[Tuple[str, str]]:
         """
@@ -50,54 +122,23 @@ class LiteracyCalculator:
         Raises:
             ValueError: 如果 words.json 文件中存在词，但是没有词性或词性无法映射。
         """
-        known_words: Set[Tuple[str, str]] = set()
-        if not self.word_service.words:
-            return known_words
-
-        for word_model in self.word_service.words.values():
-            if (
-                word_model.chaotong_level is not None  # 增加判断
-                and isinstance(word_model.chaotong_level, int)  # 增加判断
-                and word_model.chaotong_level < target_level
-            ):  # **已改回 < target_level**
-                if not word_model.part_of_speech:
-                    self.logger.error(f"word {word_model.word} 不存在词性")
-                    raise ValueError(
-                        f"词 {word_model.word} 缺少词性，请检查 words.json 文件"
-                    )
-                # 将中文词性转换为英文缩写
-                pos_abbreviation = self.inverse_pos_mapping.get(
-                    word_model.part_of_speech
-                )
-                if not pos_abbreviation:
-                    self.logger.error(
-                        f"无法将词性 '{word_model.part_of_speech}' (来自词 '{word_model.word}') 映射为英文缩写。"
-                    )
-                    # 可以选择抛出错误或记录并跳过
-                    # raise ValueError(f"无法映射词性: {word_model.part_of_speech}")
-                    continue  # 跳过无法映射的词性
-
-                known_words.add((word_model.word, pos_abbreviation))  # 存储英文缩写
+        vocabulary = self._vocabulary()
+        if not vocabulary.words:
+            return set()
+        known_levels = self._get_level_index(target_level, vocabulary)
+        return {key for key, level in known_levels.items() if level < target_level}
 
-        self.logger.debug(
-            f"target_level: {target_level}, loaded known_words count: {len(known_words)}"
-        )
-        # self.logger.debug(f"Sample known_words: {list(known_words)[:10]}") # 可选：打印样本以供调试
-        return known_words
-
-    def calculate_vocabulary_rate(
-        self, text: str, target_level: int
-    ) -> Tuple[int, float, List[Dict[str, Union[str, int, None]]]]:
+    def _tokenize(self, text: str) -> List[Tuple[str, str]]:
         """
-        计算文本的词数、生词率，并返回生词列表（包含英文词性缩写）。
+        把带词性标注的文本切分为 (小写词, 英文词性缩写) 列表，跳过标点符号。
+        Args:
+            text: 形如 "你好(PHR) |，|请问(V)" 的文本。
+        Returns:
+            按出现顺序排列的 (word, pos) 列表。
         """
         # 使用正则表达式分词，匹配中文词语和英文单词，并提取词性和词语
         tokens = re.findall(r"([\w]+)\(([A-Z]+)\)|([^\w\s])", text, re.UNICODE)
-        word_count = 0
-        unknown_words: List[Dict[str, Union[str, int, None]]] = []
-        known_words = self._load_known_words(target_level)
-        unknown_word_count = 0
-
+        words: List[Tuple[str, str]] = []
         for token in tokens:
             # token 结构为 (word, pos, symbol), 每次只match 一种，另外两种为 ""
             word, pos, symbol = token
@@ -113,49 +154,151 @@ class LiteracyCalculator:
                 if not word or not pos:
                     self.logger.warning(f"无效的词语或词性: {token}")
                     continue
-                word_count += 1
-
-                # 直接使用英文缩写 pos 与 known_words 集合比较
-                if (word, pos) not in known_words:
-                    # 获取词汇信息
-                    word_model = next(
-                        (
-                            wm
-                            for wm in self.word_service.words.values()
-                            if wm.word.lower() == word
-                        ),
-                        None,
-                    )
-
-                    if word_model:
-                        chaotong_level = word_model.chaotong_level
-                    else:
-                        chaotong_level = None
-
-                    # 只添加大于等于 target_level 的词汇，或者 words.json 中不存在的词汇
-                    if (
-                        chaotong_level is not None and chaotong_level >= target_level
-                    ) or chaotong_level is None:
-                        # 去重机制 (现在基于 word 和英文 pos)
-                        if not any(
-                            d["word"] == word and d["pos"] == pos for d in unknown_words
-                        ):
-                            unknown_words.append(
-                                {
-                                    "word": word,
-                                    "pos": pos,  # 存储英文缩写
-                                    "level": chaotong_level,
-                                }
-                            )
-                            unknown_word_count += 1
-                else:
-                    # mapped_pos = self.pos_mapping.get(pos, "UNKNOWN") # 如果需要中文词性，在这里映射
-                    self.logger.debug(
-                        f"已知词：{word}, 词性: {pos}"
-                    )  # 日志记录英文缩写
-
-        new_word_rate = unknown_word_count / word_count if word_count else 0.0
+                words.append((word, pos))
+        return words
+
+    def _score_tokens(
+        self,
+        tokens: List[Tuple[str, str]],
+        target_level: int,
+        known_levels: Dict[Tuple[str, str], int],
+        vocabulary=None,
+    ) -> Tuple[int, float, List[Dict[str, Union[str, int, None]]]]:
+        """
+        根据预先计算的查找表计算已分词文本的词数、生词率和生词列表。
+        """
+        vocabulary = vocabulary or self._vocabulary()
+        unknown_words: List[Dict[str, Union[str, int, None]]] = []
+        # 生词去重 (基于 word 和英文 pos)
+        seen_unknown_words: Set[Tuple[str, str]] = set()
+        for word, pos in tokens:
+            # (word, 英文缩写 pos) 的最低级别低于目标级别即为已知词
+            known_level = known_levels.get((word, pos))
+            if known_level is not None and known_level < target_level:
+                continue
+            if (word, pos) in seen_unknown_words:
+                continue
+            # 获取词汇信息 (词形索引中按词表顺序的第一个同形词)
+            word_models = vocabulary.get_words_by_surface(word)
+            chaotong_level = word_models[0].chaotong_level if word_models else None
+
+            # 只添加大于等于 target_level 的词汇，或者 words.json 中不存在的词汇
+            if chaotong_level is None or chaotong_level >= target_level:
+                seen_unknown_words.add((word, pos))
+                unknown_words.append(
+                    {
+                        "word": word,
+                        "pos": pos,  # 存储英文缩写
+                        "level": chaotong_level,
+                    }
+                )
+
+        word_count = len(tokens)
+        new_word_rate = len(unknown_words) / word_count if word_count else 0.0
+        return word_count, new_word_rate, unknown_words
+
+    def calculate_vocabulary_rate(
+        self, text: str, target_level: int
+    ) -> Tuple[int, float, List[Dict[str, Union[str, int, None]]]]:
+        """
+        计算文本的词数、生词率，并返回生词列表（包含英文词性缩写）。
+        """
+        vocabulary = self._vocabulary()
+        known_levels = (
+            self._get_level_index(target_level, vocabulary) if vocabulary.words else {}
+        )
+        word_count, new_word_rate, unknown_words = self._score_tokens(
+            self._tokenize(text), target_level, known_levels, vocabulary
+        )
         self.logger.debug(
             f"text: {text}, target_level: {target_level}, word_count: {word_count}, new_word_rate: {new_word_rate}, unknown_words: {unknown_words}"
         )
         return word_count, new_word_rate, unknown_words
+
+    def calculate_vocabulary_rates(
+        self,
+        items: Iterable[Tuple[str, int]],
+        processes: Optional[int] = None,
+        chunksize: int = 50,
+    ) -> List[Tuple[int, float, List[Dict[str, Union[str, int, None]]]]]:
+        """
+        批量计算多个文本的词数、生词率和生词列表。
+
+        文本按目标级别分组，同一级别共用一次查找表检查；每个文本只分词一次。
+        指定 processes 时把各组分块后交给进程池并行计算。
+        Args:
+            items: (text, target_level) 列表。
+            processes: 进程池大小，为空或小于 2 时在当前进程中计算。
+            chunksize: 使用进程池时每个任务包含的文本数。
+        Returns:
+            与 items 顺序一致的 (word_count, new_word_rate, unknown_words) 列表。
+        Raises:
+            ValueError: 如果 words.json 文件中存在低于某个目标级别的词，但是没有词性。
+        """
+        items = list(items)
+        groups: Dict[int, List[int]] = {}
+        for position, (_, target_level) in enumerate(items):
+            groups.setdefault(target_level, []).append(position)
+
+        results: List = [None] * len(items)
+        if processes is None or processes < 2:
+            for target_level, positions in groups.items():
+                for position, result in zip(
+                    positions,
+                    self._score_group(target_level, [items[i][0] for i in positions]),
+                ):
+                    results[position] = result
+            return results
+
+        chunks = [
+            (target_level, positions[start : start + chunksize])
+            for target_level, positions in groups.items()
+            for start in range(0, len(positions), chunksize)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker, initargs=(self,)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _score_group_in_worker,
+                    target_level,
+                    [items[i][0] for i in positions],
+                )
+                for target_level, positions in chunks
+            ]
+            for (_, positions), future in zip(chunks, futures):
+                for position, result in zip(positions, future.result()):
+                    results[position] = result
+        return results
+
+    def _score_group(
+        self, target_level: int, texts: List[str]
+    ) -> List[Tuple[int, float, List[Dict[str, Union[str, int, None]]]]]:
+        """
+        计算同一目标级别的一组文本。
+        """
+        vocabulary = self._vocabulary()
+        known_levels = (
+            self._get_level_index(target_level, vocabulary) if vocabulary.words else {}
+        )
+        return [
+            self._score_tokens(
+                self._tokenize(text), target_level, known_levels, vocabulary
+            )
+            for text in texts
+        ]
+
+
+# 进程池中每个工作进程持有的 LiteracyCalculator 副本
+_worker_calculator: Optional[LiteracyCalculator] = None
+
+
+def _init_worker(calculator: LiteracyCalculator):
+    global _worker_calculator
+    _worker_calculator = calculator
+
+
+def _score_group_in_worker(
+    target_level: int, texts: List[str]
+) -> List[Tuple[int, float, List[Dict[str, Union[str, int, None]]]]]:
+    return _worker_calculator._score_group(target_level, texts)
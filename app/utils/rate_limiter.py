@@ -0,0 +1,282 @@
+# app/utils/rate_limiter.py
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+class QueueWait:
+    """
+    一个请求在限流队列中等待的总时间 (一个请求可能调用多次 AI 服务，例如重试和对冲请求)
+    """
+
+    def __init__(self):
+        self._waits: List[float] = []
+
+    def add(self, seconds: float):
+        self._waits.append(seconds)  # list.append 是原子操作，多个线程可以同时记录
+
+    @property
+    def seconds(self) -> float:
+        return sum(self._waits)
+
+    @property
+    def milliseconds(self) -> int:
+        return round(self.seconds * 1000)
+
+
+# 当前请求的排队时间 (每个请求/线程独立；复制的上下文共享同一个 QueueWait)
+_queue_wait: ContextVar[Optional[QueueWait]] = ContextVar("queue_wait", default=None)
+
+
+@contextmanager
+def track_queue_wait() -> Iterator[QueueWait]:
+    """
+    记录 with 代码块内所有 AIRateLimiter 的排队时间。
+
+    Yields:
+        QueueWait: 代码块结束后读取 seconds / milliseconds。
+    """
+    queue_wait = QueueWait()
+    token = _queue_wait.set(queue_wait)
+    try:
+        yield queue_wait
+    finally:
+        _queue_wait.reset(token)
+
+
+class TokenBucket:
+    """
+    令牌桶: 每分钟补充 rate_per_minute 个令牌，最多存 capacity 个 (允许的突发量)。
+    不是线程安全的，由 AIRateLimiter 加锁使用。
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: float = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self.clock = clock
+        self.tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        """
+        还需要等待多少秒才有 amount 个令牌。超过容量的请求按容量计算，否则永远等不到。
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Waiter:
+    def __init__(self, tokens: int, loop: asyncio.AbstractEventLoop = None):
+        self.tokens = tokens
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def wake(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class AIRateLimiter:
+    """
+    一个 AI 服务的客户端限流: 每分钟请求数、每分钟 token 数和同时进行的调用数。
+
+    超过限制的调用按到达顺序排队 (先到先得，大请求不会被后面的小请求一直插队)，
+    而不是发出后收到 AI 服务的 429 错误。同步和异步调用共享同一个队列。
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_in_flight: int = 0,
+        max_wait: float = None,
+    ):
+        """
+        初始化 AIRateLimiter，0 表示不限制。
+
+        Args:
+            requests_per_minute: 每分钟最多发出的调用数。
+            tokens_per_minute: 每分钟最多发送的 token 数 (按调用方的估计值)。
+            max_in_flight: 最多同时进行的调用数。
+            max_wait: 最长排队时间 (秒)，超过时 acquire 抛出 TimeoutError；None 表示一直等待。
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self._request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        )
+        self._waiters: Deque[_Waiter] = deque()
+        self._in_flight = 0
+        self._counts = {"acquired": 0, "timeouts": 0}
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        排队等待一次调用的名额，调用结束后必须调用 release()。
+
+        Args:
+            tokens: 这次调用估计使用的 token 数。
+        Returns:
+            float: 排队时间 (秒)
+        Raises:
+            TimeoutError: 如果排队超过 max_wait
+        """
+        start = time.monotonic()
+        waiter = self._enqueue(_Waiter(tokens))
+        try:
+            while True:
+                granted, timeout = self._poll(waiter, start)
+                if granted:
+                    break
+                waiter.event.wait(timeout)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return self._granted(start)
+
+    async def aacquire(self, tokens: int = 1) -> float:
+        """
+        异步排队等待一次调用的名额，等待时不占用线程。参数和返回值与 acquire 相同。
+        """
+        start = time.monotonic()
+        waiter = self._enqueue(_Waiter(tokens, asyncio.get_running_loop()))
+        try:
+            while True:
+                granted, timeout = self._poll(waiter, start)
+                if granted:
+                    break
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return self._granted(start)
+
+    def release(self):
+        """
+        一次调用结束，把名额交给排在最前面的调用。
+        """
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_head()
+
+    def _enqueue(self, waiter: _Waiter) -> _Waiter:
+        with self._lock:
+            self._waiters.append(waiter)
+        return waiter
+
+    def _poll(self, waiter: _Waiter, start: float) -> Tuple[bool, Optional[float]]:
+        """
+        尝试取得名额。
+        Returns:
+            (granted, timeout): 没有取得名额时 timeout 是下次检查前最多等待的时间 (秒)，
+            None 表示等到被唤醒 (排到最前面或有调用结束) 为止。
+        """
+        with self._lock:
+            waiter.event.clear()
+            delay = self._try_grant(waiter)
+        if delay == 0:
+            return True, None
+        if self.max_wait is None:
+            return False, delay
+        remaining = start + self.max_wait - time.monotonic()
+        if remaining <= 0:
+            with self._lock:
+                self._counts["timeouts"] += 1
+            raise TimeoutError(f"排队超过 {self.max_wait:g} 秒")
+        return False, remaining if delay is None else min(delay, remaining)
+
+    def _try_grant(self, waiter: _Waiter) -> Optional[float]:
+        # 调用方持有 self._lock。返回 0 表示取得名额，None 表示等待唤醒，否则为等待的秒数
+        if self._waiters[0] is not waiter:
+            return None
+        if self.max_in_flight and self._in_flight >= self.max_in_flight:
+            return None
+        delay = 0.0
+        if self._request_bucket is not None:
+            delay = max(delay, self._request_bucket.delay(1))
+        if self._token_bucket is not None:
+            delay = max(delay, self._token_bucket.delay(waiter.tokens))
+        if delay > 0:
+            return delay
+        if self._request_bucket is not None:
+            self._request_bucket.consume(1)
+        if self._token_bucket is not None:
+            self._token_bucket.consume(waiter.tokens)
+        self._waiters.popleft()
+        self._in_flight += 1
+        self._wake_head()
+        return 0
+
+    def _wake_head(self):
+        # 调用方持有 self._lock
+        if self._waiters:
+            self._waiters[0].wake()
+
+    def _abandon(self, waiter: _Waiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._wake_head()
+
+    def _granted(self, start: float) -> float:
+        wait = time.monotonic() - start
+        with self._lock:
+            self._counts["acquired"] += 1
+            self._total_wait += wait
+            self._max_wait_seen = max(self._max_wait_seen, wait)
+        queue_wait = _queue_wait.get()
+        if queue_wait is not None:
+            queue_wait.add(wait)
+        return wait
+
+    def get_stats(self) -> Dict:
+        """
+        获取当前排队数、进行中的调用数和排队时间统计。
+        """
+        with self._lock:
+            acquired = self._counts["acquired"]
+            return {
+                "queued": len(self._waiters),
+                "in_flight": self._in_flight,
+                "acquired": acquired,
+                "timeouts": self._counts["timeouts"],
+                "avg_wait_ms": (
+                    round(self._total_wait / acquired * 1000) if acquired else 0
+                ),
+                "max_wait_ms": round(self._max_wait_seen * 1000),
+            }
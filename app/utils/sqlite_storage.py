@@ -0,0 +1,373 @@
+# app/utils/sqlite_storage.py
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.config import Config
+from app.utils.base_storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    基于 SQLite (WAL 模式) 的存储引擎，与 JSONStorage 提供相同的接口。
+
+    每个存储对应一张表：完整的字典项以 JSON 保存在 data 列，主键和 index_fields
+    中的字段额外保存在带索引的列中，按这些字段查询、排序和分页都在数据库中完成，
+    请求延迟不再随数据量线性增长。多个进程可以同时访问同一个数据库文件。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        table: str,
+        id_field: str = "id",
+        index_fields: Optional[Iterable[str]] = None,
+        durability: Optional[str] = None,
+        busy_timeout: Optional[float] = None,
+    ):
+        """
+        初始化 SQLiteStorage。
+
+        Args:
+            db_path: SQLite 数据库文件路径。
+            table: 表名，例如 'stories'。
+            id_field: 用作主键的字段名。
+            index_fields: 需要建立索引的字段名列表。
+            durability: 持久化级别 ("strict" 对应 synchronous=FULL，"batched" 对应
+                NORMAL，"relaxed" 对应 OFF)，默认使用 Config.STORAGE_DURABILITY。
+            busy_timeout: 等待其他进程释放写锁的最长时间 (秒)，默认使用
+                Config.STORAGE_LOCK_TIMEOUT。
+        """
+        self.index_fields = tuple(index_fields or ())
+        for name in (table, id_field) + self.index_fields:
+            if not _IDENTIFIER_PATTERN.match(name):
+                raise ValueError(f"无效的表名或字段名: {name}")
+        self.db_path = db_path
+        self.table = table
+        self.id_field = id_field
+        self.durability = durability or Config.STORAGE_DURABILITY
+        self.busy_timeout = (
+            busy_timeout if busy_timeout is not None else Config.STORAGE_LOCK_TIMEOUT
+        )
+        # sqlite3 连接不能跨线程共享，每个线程使用自己的连接
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._ensure_schema()
+        logger.info(
+            f"Initialized SQLiteStorage for {db_path} (table={table}, durability={self.durability})."
+        )
+
+    @staticmethod
+    def _column(field: str) -> str:
+        return f"idx_{field}"
+
+    @staticmethod
+    def _column_value(value: Any) -> Any:
+        """
+        把字段值转换为可以存入索引列的标量。
+        """
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # isolation_level=None: 由本类显式管理事务
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            synchronous = {"strict": "FULL", "batched": "NORMAL", "relaxed": "OFF"}.get(
+                self.durability, "FULL"
+            )
+            connection.execute(f"PRAGMA synchronous={synchronous}")
+            self._local.connection = connection
+            self._local.batch_depth = 0
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """
+        写事务。在 batch() 中时复用外层事务。
+        """
+        connection = self._connect()
+        if self._local.batch_depth:
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @contextmanager
+    def batch(self):
+        """
+        上下文管理器：其中的所有修改在同一个事务中提交。
+        """
+        connection = self._connect()
+        outermost = self._local.batch_depth == 0
+        if outermost:
+            connection.execute("BEGIN IMMEDIATE")
+        self._local.batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.batch_depth -= 1
+            if outermost:
+                connection.execute("ROLLBACK")
+            raise
+        self._local.batch_depth -= 1
+        if outermost:
+            connection.execute("COMMIT")
+
+    def _ensure_schema(self):
+        """
+        创建表和索引；已有表缺少新声明的索引列时自动补列并回填。
+        """
+        with self._transaction() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "item_id, "
+                "data TEXT NOT NULL"
+                + "".join(f", {self._column(field)}" for field in self.index_fields)
+                + ")"
+            )
+            existing_columns = {
+                row[1] for row in connection.execute(f"PRAGMA table_info({self.table})")
+            }
+            missing_fields = [
+                field
+                for field in self.index_fields
+                if self._column(field) not in existing_columns
+            ]
+            for field in missing_fields:
+                connection.execute(
+                    f"ALTER TABLE {self.table} ADD COLUMN {self._column(field)}"
+                )
+            if missing_fields:
+                rows = connection.execute(
+                    f"SELECT seq, data FROM {self.table}"
+                ).fetchall()
+                for seq, data in rows:
+                    item = json.loads(data)
+                    connection.execute(
+                        f"UPDATE {self.table} SET "
+                        + ", ".join(
+                            f"{self._column(field)} = ?" for field in missing_fields
+                        )
+                        + " WHERE seq = ?",
+                        [
+                            self._column_value(item.get(field))
+                            for field in missing_fields
+                        ]
+                        + [seq],
+                    )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_item_id ON {self.table} (item_id)"
+            )
+            for field in self.index_fields:
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_{field} "
+                    f"ON {self.table} ({self._column(field)})"
+                )
+
+    def _row_values(self, item: Dict[str, Any]) -> List[Any]:
+        return [
+            self._column_value(item.get(self.id_field)),
+            json.dumps(item, ensure_ascii=False),
+        ] + [self._column_value(item.get(field)) for field in self.index_fields]
+
+    def _indexed_column(self, field: str) -> Optional[str]:
+        if field == self.id_field:
+            return "item_id"
+        if field in self.index_fields:
+            return self._column(field)
+        return None
+
+    def _find_rows(
+        self, field: str, value: Any, limit: Optional[int] = None
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        查找 field == value 的行，返回 (seq, item) 列表。未建索引的字段退化为全表扫描。
+        """
+        connection = self._connect()
+        column = self._indexed_column(field)
+        if column is None:
+            rows = []
+            for seq, data in connection.execute(
+                f"SELECT seq, data FROM {self.table} ORDER BY seq"
+            ):
+                item = json.loads(data)
+                if item.get(field) == value:
+                    rows.append((seq, item))
+                    if limit is not None and len(rows) >= limit:
+                        break
+            return rows
+        sql = f"SELECT seq, data FROM {self.table} WHERE {column} IS ? ORDER BY seq"
+        parameters: List[Any] = [self._column_value(value)]
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [
+            (seq, json.loads(data)) for seq, data in connection.execute(sql, parameters)
+        ]
+
+    def add(self, item: Dict[str, Any]):
+        """
+        添加一个新项。
+        Args:
+            item: 要添加的字典项。
+        """
+        if not isinstance(item, dict):
+            logger.error(f"Attempted to add non-dict item: {type(item)}")
+            return
+        columns = ["item_id", "data"] + [
+            self._column(field) for field in self.index_fields
+        ]
+        with self._transaction() as connection:
+            connection.execute(
+                f"INSERT INTO {self.table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                self._row_values(item),
+            )
+        logger.info(f"Added new item to {self.db_path}:{self.table}.")
+
+    def get_all(self) -> List[Dict[str, Any]]:
+        """
+        按插入顺序获取所有项。
+        """
+        connection = self._connect()
+        return [
+            json.loads(data)
+            for (data,) in connection.execute(
+                f"SELECT data FROM {self.table} ORDER BY seq"
+            )
+        ]
+
+    def find_by_id(
+        self, item_id: str, id_field: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        根据 ID 查找项。
+        """
+        rows = self._find_rows(id_field or self.id_field, item_id, limit=1)
+        return rows[0][1] if rows else None
+
+    def find_by(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        """
+        查找 field == value 的所有项 (按插入顺序)。
+        """
+        return [item for _, item in self._find_rows(field, value)]
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        按字段等值过滤、排序并分页查询。过滤和排序字段都已建索引时完全在 SQLite 中执行。
+        """
+        filters = filters or {}
+        fields = list(filters) + ([order_by] if order_by else [])
+        if any(self._indexed_column(field) is None for field in fields):
+            return super().query(filters, order_by, descending, limit, offset)
+
+        sql = f"SELECT data FROM {self.table}"
+        parameters: List[Any] = []
+        if filters:
+            sql += " WHERE " + " AND ".join(
+                f"{self._indexed_column(field)} IS ?" for field in filters
+            )
+            parameters.extend(self._column_value(value) for value in filters.values())
+        direction = "DESC" if descending else "ASC"
+        if order_by:
+            sql += f" ORDER BY {self._indexed_column(order_by)} {direction}, seq {direction}"
+        else:
+            sql += " ORDER BY seq"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            parameters.extend([limit if limit is not None else -1, offset])
+        connection = self._connect()
+        return [json.loads(data) for (data,) in connection.execute(sql, parameters)]
+
+    def update(
+        self, item_id: str, updated_item: Dict[str, Any], id_field: Optional[str] = None
+    ) -> bool:
+        """
+        根据 ID 更新一个项。
+        """
+        id_field = id_field or self.id_field
+        with self._transaction() as connection:
+            rows = self._find_rows(id_field, item_id, limit=1)
+            if not rows:
+                logger.warning(
+                    f"Item with {id_field}={item_id} not found for update in {self.db_path}:{self.table}."
+                )
+                return False
+            # 确保更新后的项仍然包含 ID 字段
+            if id_field not in updated_item:
+                updated_item[id_field] = item_id
+            columns = ["item_id", "data"] + [
+                self._column(field) for field in self.index_fields
+            ]
+            connection.execute(
+                f"UPDATE {self.table} SET "
+                + ", ".join(f"{column} = ?" for column in columns)
+                + " WHERE seq = ?",
+                self._row_values(updated_item) + [rows[0][0]],
+            )
+        logger.info(f"Updated item {item_id} in {self.db_path}:{self.table}.")
+        return True
+
+    def delete(self, item_id: str, id_field: Optional[str] = None) -> bool:
+        """
+        根据 ID 删除项。
+        """
+        id_field = id_field or self.id_field
+        with self._transaction() as connection:
+            seqs = [seq for seq, _ in self._find_rows(id_field, item_id)]
+            connection.executemany(
+                f"DELETE FROM {self.table} WHERE seq = ?", [(seq,) for seq in seqs]
+            )
+        if seqs:
+            logger.info(f"Deleted item {item_id} from {self.db_path}:{self.table}.")
+            return True
+        logger.warning(
+            f"Item with {id_field}={item_id} not found for deletion in {self.db_path}:{self.table}."
+        )
+        return False
+
+    def close(self):
+        """
+        关闭所有线程打开的数据库连接。
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
@@ -0,0 +1,56 @@
+# app/utils/storage_factory.py
+from typing import Optional
+from app.config import Config
+from app.utils.base_storage import BaseStorage
+from app.utils.json_storage import JSONStorage
+from app.utils.sqlite_storage import SQLiteStorage
+
+# 各业务存储的主键字段和索引字段
+STORE_SCHEMAS = {
+    "stories": {
+        "id_field": "story_id",
+        "index_fields": ("vocabulary_level", "scene_id", "created_at"),
+    },
+    "scenes": {"id_field": "scene_id", "index_fields": ()},
+}
+
+
+class StorageFactory:
+    """
+    存储引擎工厂类
+    """
+
+    @staticmethod
+    def create_storage(
+        store_name: str, filepath: str, backend: Optional[str] = None
+    ) -> BaseStorage:
+        """
+        创建存储对象
+        Args:
+            store_name (str): 存储名称 (例如 stories, scenes)，决定主键、索引字段和 SQLite 表名
+            filepath (str): JSON 存储使用的文件路径
+            backend (str, optional): 存储引擎名称 (json 或 sqlite)，默认使用 Config.STORAGE_BACKEND
+        Returns:
+            BaseStorage: 存储对象
+        Raises:
+            ValueError: 如果存储名称或存储引擎名称无效
+        """
+        schema = STORE_SCHEMAS.get(store_name)
+        if schema is None:
+            raise ValueError(f"无效的存储名称: {store_name}")
+        backend = backend or Config.STORAGE_BACKEND
+        if backend == "json":
+            return JSONStorage(
+                filepath,
+                id_field=schema["id_field"],
+                index_fields=schema["index_fields"],
+            )
+        elif backend == "sqlite":
+            return SQLiteStorage(
+                Config.SQLITE_DB_PATH,
+                table=store_name,
+                id_field=schema["id_field"],
+                index_fields=schema["index_fields"],
+            )
+        else:
+            raise ValueError(f"无效的存储引擎名称: {backend}")
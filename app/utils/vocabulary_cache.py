@@ -0,0 +1,83 @@
+# app/utils/vocabulary_cache.py
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式变化时递增，旧缓存自动失效
+CACHE_FORMAT_VERSION = 1
+
+
+def source_key(content: str, source_path: str) -> Dict[str, Any]:
+    """
+    计算源文件 (words.json) 的缓存键: 内容的 SHA-256 和文件的修改时间。
+    Args:
+        content: 源文件内容。
+        source_path: 源文件路径，用于读取修改时间。
+    Returns:
+        缓存键字典。
+    """
+    try:
+        mtime_ns = os.stat(source_path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        "mtime_ns": mtime_ns,
+    }
+
+
+def load(cache_path: Optional[str], key: Dict[str, Any]) -> Optional[Any]:
+    """
+    读取与缓存键匹配的缓存数据。
+    Args:
+        cache_path: 缓存文件路径，为空表示不使用缓存。
+        key: source_key() 返回的缓存键。
+    Returns:
+        缓存的数据，缓存不存在、已损坏或与缓存键不匹配时返回 None。
+    """
+    if not cache_path:
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable vocabulary cache {cache_path}: {e}")
+        return None
+    if cached_key != key:
+        logger.info(f"Vocabulary cache {cache_path} is stale, rebuilding.")
+        return None
+    return payload
+
+
+def save(cache_path: Optional[str], key: Dict[str, Any], payload: Any):
+    """
+    原子地写入缓存文件 (先写临时文件再替换)。写入失败只记录警告。
+    Args:
+        cache_path: 缓存文件路径，为空表示不使用缓存。
+        key: source_key() 返回的缓存键。
+        payload: 要缓存的数据。
+    """
+    if not cache_path:
+        return
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(temp_path, "wb") as f:
+            pickle.dump((key, payload), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+        logger.info(f"Wrote vocabulary cache {cache_path}.")
+    except OSError as e:
+        logger.warning(f"Failed to write vocabulary cache {cache_path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
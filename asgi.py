@@ -0,0 +1,7 @@
+# asgi.py
+from app.asgi import create_asgi_app
+
+# 创建 ASGI 应用实例 (与 app.py 的 WSGI 应用并列)，例如:
+#   uvicorn asgi:application --workers 1
+# 生成故事的请求在事件循环中异步等待 AI 服务，一个工作进程可以同时处理多个生成请求
+application = create_asgi_app()
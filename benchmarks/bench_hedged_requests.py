@@ -0,0 +1,93 @@
+# benchmarks/bench_hedged_requests.py
+"""
+比较单个 AI 服务和 auto (CompositeAIService，对冲请求) 的尾延迟。
+
+两个进程内的假 AI 服务，耗时有长尾: 大部分调用 --fast 秒，--tail-rate 的调用 --slow 秒。
+auto 在第一个服务超过 p95 耗时仍未返回时调用另一个服务，采用先返回的结果。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_hedged_requests --requests 400
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+
+logging.disable(logging.WARNING)
+
+from app.services.ai_service import AIService
+from app.services.composite_ai_service import CompositeAIService
+
+
+class LongTailAIService(AIService):
+    def __init__(self, name, fast, slow, tail_rate, rng):
+        self.model = name
+        self.fast = fast
+        self.slow = slow
+        self.tail_rate = tail_rate
+        self.rng = rng
+        self.calls = 0
+
+    def generate_story(self, prompt):
+        self.calls += 1
+        tail = self.rng.random() < self.tail_rate
+        time.sleep(self.slow if tail else self.fast * self.rng.uniform(0.8, 1.2))
+        return {"title": self.model}
+
+
+def run(service, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        service.generate_story("提示语")
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "max": latencies[-1],
+    }
+
+
+def report(label, result, calls, requests):
+    print(
+        f"{label:<10} p50 {result['p50'] * 1000:7.1f} ms  "
+        f"p95 {result['p95'] * 1000:7.1f} ms  p99 {result['p99'] * 1000:7.1f} ms  "
+        f"max {result['max'] * 1000:7.1f} ms  AI 调用 {calls / requests:.2f} 次/请求"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--fast", type=float, default=0.01)
+    parser.add_argument("--slow", type=float, default=0.3)
+    parser.add_argument("--tail-rate", type=float, default=0.03)
+    args = parser.parse_args()
+
+    def backend(name, seed):
+        return LongTailAIService(
+            name, args.fast, args.slow, args.tail_rate, random.Random(seed)
+        )
+
+    single = backend("gemini", 1)
+    report("single", run(single, args.requests), single.calls, args.requests)
+
+    backends = {"gemini": backend("gemini", 2), "deepseek": backend("deepseek", 3)}
+    composite = CompositeAIService(
+        backends, hedge=True, hedge_percentile=0.95, hedge_min_delay=0.0
+    )
+    run(composite, CompositeAIService.HEDGE_MIN_SAMPLES * 2)  # 预热耗时统计
+    for service in backends.values():
+        service.calls = 0
+    result = run(composite, args.requests)
+    calls = sum(service.calls for service in backends.values())
+    report("auto", result, calls, args.requests)
+    metrics = composite.get_metrics()
+    print(
+        f"对冲请求 {metrics['hedged']} 次，其中 {metrics['hedge_wins']} 次采用对冲结果"
+    )
+    composite.close()
@@ -0,0 +1,64 @@
+# benchmarks/bench_known_words_prompt.py
+"""
+比较每次重新序列化已知词汇与使用 KnownWordsPromptCache 时构建已知词汇提示语片段的耗时。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_known_words_prompt --requests 200
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+
+logging.disable(logging.INFO)
+
+from app.services.known_words_prompt_cache import KnownWordsPromptCache
+from app.services.prompt_registry import PromptRegistry
+from app.services.word_service import WordService
+
+
+def serialize_uncached(word_service: WordService, level: int) -> str:
+    # 与缓存之前的 StoryService.generate_story 相同: 每次请求都序列化全部已知词汇
+    known_words_list = word_service.get_words_below_level(level)
+    return json.dumps(
+        [
+            {"word": word.word, "part_of_speech": word.part_of_speech}
+            for word in known_words_list
+        ],
+        ensure_ascii=False,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    word_service = WordService()
+    prompt_registry = PromptRegistry()
+    template = prompt_registry.get_template(KnownWordsPromptCache.SECTION_TEMPLATE)
+    cache = KnownWordsPromptCache(word_service, prompt_registry)
+    levels = sorted({word.chaotong_level for word in word_service.words.values()})
+    random.seed(0)
+    requested = [random.choice(levels) for _ in range(args.requests)]
+
+    start = time.perf_counter()
+    for level in requested:
+        template.render(
+            vocabulary_level=level, known_words=serialize_uncached(word_service, level)
+        )
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for level in requested:
+        cache.get_known_words_section(level)
+    cached = time.perf_counter() - start
+
+    print(f"vocabulary: {len(word_service.words)} words, {len(levels)} levels")
+    print(f"uncached: {uncached / args.requests * 1000:.3f} ms/request")
+    print(
+        f"cached:   {cached / args.requests * 1000:.3f} ms/request "
+        f"({cache.hits} hits, {cache.misses} misses)"
+    )
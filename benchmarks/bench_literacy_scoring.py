@@ -0,0 +1,51 @@
+# benchmarks/bench_literacy_scoring.py
+"""
+对 app/data/stories.json 中的所有故事计算生词率，测量 LiteracyCalculator 的评分速度。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_literacy_scoring --repeat 5
+"""
+
+import argparse
+import json
+import logging
+import time
+
+logging.disable(logging.ERROR)
+
+from app.config import Config
+from app.services.word_service import WordService
+from app.utils.literacy_calculator import LiteracyCalculator
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(Config.STORIES_FILE_PATH, "r", encoding="utf-8") as f:
+        stories = [
+            story
+            for story in json.load(f)
+            if story.get("content") and isinstance(story.get("vocabulary_level"), int)
+        ]
+    word_service = WordService()
+    literacy_calculator = LiteracyCalculator(word_service)
+    # 预热: 构建查找表
+    literacy_calculator.calculate_vocabulary_rate("", 1)
+
+    token_count = 0
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for story in stories:
+            word_count, _, _ = literacy_calculator.calculate_vocabulary_rate(
+                story["content"], story["vocabulary_level"]
+            )
+            token_count += word_count
+    elapsed = time.perf_counter() - start
+
+    scored = len(stories) * args.repeat
+    print(f"vocabulary: {len(word_service.words)} words")
+    print(f"scored {scored} stories ({token_count} tokens) in {elapsed:.3f}s")
+    print(
+        f"{elapsed / scored * 1000:.3f} ms/story, {token_count / elapsed:,.0f} tokens/s"
+    )
@@ -0,0 +1,105 @@
+# benchmarks/bench_prompt_assembly.py
+"""
+比较 generate_story 组装提示语 (initial + known_words + final_instruction) 的耗时:
+
+- before: 每个 StoryService 新建 Jinja Environment (enable_async)，每次请求获取并渲染模板；
+- after: 使用进程内共享的 PromptRegistry 和 KnownWordsPromptCache。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_prompt_assembly --requests 500
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+
+logging.disable(logging.INFO)
+
+from jinja2 import Environment, FileSystemLoader
+from app.services.known_words_prompt_cache import KnownWordsPromptCache
+from app.services.prompt_registry import get_prompt_registry
+from app.services.word_service import WordService
+
+PROMPT_DATA = {
+    "scene_name": "问路",
+    "scene_description": "学习如何用中文问路。",
+    "story_word_count_min": 80,
+    "story_word_count_max": 120,
+    "new_word_rate": 0.1,
+    "key_words": "[]",
+}
+
+
+def assemble_before(word_service: WordService, level: int) -> str:
+    template_env = Environment(
+        loader=FileSystemLoader("app/prompts"), enable_async=True
+    )
+    known_words = json.dumps(
+        [
+            {"word": word.word, "part_of_speech": word.part_of_speech}
+            for word in word_service.get_words_below_level(level)
+        ],
+        ensure_ascii=False,
+    )
+    section = template_env.get_template(KnownWordsPromptCache.SECTION_TEMPLATE).render(
+        vocabulary_level=level, known_words=known_words
+    )
+    return "\n".join(
+        [
+            template_env.get_template("initial_prompt.txt").render({}),
+            template_env.get_template("known_words_prompt.txt").render(
+                dict(PROMPT_DATA, vocabulary_level=level, known_words_section=section)
+            ),
+            template_env.get_template("final_instruction_prompt.txt").render({}),
+        ]
+    )
+
+
+def assemble_after(registry, cache: KnownWordsPromptCache, level: int) -> str:
+    return "\n".join(
+        [
+            registry.render("initial_prompt.txt", {}),
+            registry.render(
+                "known_words_prompt.txt",
+                dict(
+                    PROMPT_DATA,
+                    vocabulary_level=level,
+                    known_words_section=cache.get_known_words_section(level),
+                ),
+            ),
+            registry.render("final_instruction_prompt.txt", {}),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    word_service = WordService()
+    registry = get_prompt_registry()
+    cache = KnownWordsPromptCache(word_service, registry)
+    levels = sorted({word.chaotong_level for word in word_service.words.values()})
+    random.seed(0)
+    requested = [random.choice(levels) for _ in range(args.requests)]
+    # 预热: 所有级别的已知词汇片段
+    for level in levels:
+        cache.get_known_words_section(level)
+
+    start = time.perf_counter()
+    for level in requested:
+        assemble_before(word_service, level)
+    before = (time.perf_counter() - start) / args.requests * 1000
+
+    start = time.perf_counter()
+    for level in requested:
+        assemble_after(registry, cache, level)
+    after = (time.perf_counter() - start) / args.requests * 1000
+
+    print(f"before: {before:.3f} ms/request")
+    print(f"after:  {after:.3f} ms/request")
+    for name, stats in sorted(registry.get_render_stats().items()):
+        print(f"  {name:<32} {stats['avg_ms']:.3f} ms avg ({stats['count']} renders)")
@@ -0,0 +1,93 @@
+# benchmarks/bench_rate_limit_burst.py
+"""
+比较突发请求在有/没有客户端限流 (AIRateLimiter) 时收到的 429 和失败数。
+
+本地假 LLM 服务 (模拟 Deepseek) 同时只处理 --provider-concurrency 个调用，超过时返回 429；
+--burst 个请求同时调用 ResilientAIService.generate_story:
+
+- 不限流: 超过并发数的调用收到 429，容错层重试，重试用完后失败；
+- 限流 (max_in_flight 与 AI 服务的并发数相同): 多出的调用在客户端按到达顺序排队。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_rate_limit_burst --burst 40 --latency 0.5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logging.disable(logging.ERROR)
+
+from benchmarks.fake_llm_server import FakeLLMServer
+
+
+def burst(service, count: int):
+    """
+    同时发出 count 个调用，返回 (成功数, 每个请求的排队时间, 总耗时)
+    """
+
+    def call(_):
+        with track_queue_wait() as queue_wait:
+            try:
+                service.generate_story("提示语")
+                succeeded = True
+            except Exception:
+                succeeded = False
+        return succeeded, queue_wait.seconds
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        results = list(executor.map(call, range(count)))
+    elapsed = time.perf_counter() - start
+    return sum(ok for ok, _ in results), [wait for _, wait in results], elapsed
+
+
+def report(label, server, succeeded, waits, elapsed, count):
+    print(
+        f"{label:<8} {succeeded}/{count} ok in {elapsed:5.2f}s, "
+        f"{server.rate_limited:3d} x 429 from provider, "
+        f"queue wait avg {statistics.mean(waits) * 1000:6.0f} ms "
+        f"max {max(waits) * 1000:6.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--provider-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.latency, max_concurrency=args.provider_concurrency)
+    server.start()
+    os.environ.update(
+        {
+            "DEEPSEEK_API_KEY": "benchmark",
+            "DEEPSEEK_BASE_URL": f"http://127.0.0.1:{server.port}",
+            "AI_HTTP_MAX_CONNECTIONS": str(args.burst),
+            "AI_HTTP_MAX_KEEPALIVE_CONNECTIONS": str(args.burst),
+        }
+    )
+
+    from app.services.deepseek_service import DeepseekService
+    from app.services.resilient_ai_service import ResilientAIService
+    from app.utils.rate_limiter import AIRateLimiter, track_queue_wait
+
+    for label, rate_limiter in (
+        ("no limit", None),
+        ("limited", AIRateLimiter(max_in_flight=args.provider_concurrency)),
+    ):
+        service = ResilientAIService(
+            DeepseekService(),
+            "deepseek",
+            timeout=60,
+            backoff_base=0.1,
+            backoff_max=0.5,
+            rate_limiter=rate_limiter,
+        )
+        server.reset()
+        report(label, server, *burst(service, args.burst), args.burst)
+        service.close()
@@ -0,0 +1,77 @@
+# benchmarks/bench_service_setup.py
+"""
+比较 /api/v1/stories/generate 每个请求的服务初始化开销：
+
+- before: 每个请求新建 LiteracyCalculator、StoryService (新的 Jinja Environment
+  和重新解析 stories.json 的存储) 以及 AI 客户端；
+- after: 从 ServiceContainer 获取按 AI 服务缓存的 StoryService。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_service_setup --iterations 200
+"""
+
+import argparse
+import logging
+import os
+import time
+
+# 基准测试不会真正调用 AI 服务，只需要能创建客户端
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+# 部分模块在导入时就会加载数据并输出日志
+logging.disable(logging.WARNING)
+
+from app.config import Config
+from app.services.ai_service_factory import AIServiceFactory
+from app.services.scene_service import SceneService
+from app.services.service_container import ServiceContainer
+from app.services.story_service import StoryService
+from app.services.word_service import WordService
+from app.utils.literacy_calculator import LiteracyCalculator
+
+
+def setup_per_request(word_service, scene_service, ai_service_name):
+    literacy_calculator = LiteracyCalculator(word_service)
+    return StoryService(
+        word_service=word_service,
+        scene_service=scene_service,
+        literacy_calculator=literacy_calculator,
+        ai_service=AIServiceFactory.create_ai_service(ai_service_name),
+    )
+
+
+def measure(label, func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    per_request_us = elapsed / iterations * 1_000_000
+    print(f"{label:<10} {per_request_us:12.1f} us/request ({iterations} iterations)")
+    return per_request_us
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--ai-service", default="deepseek")
+    args = parser.parse_args()
+
+    word_service = WordService()
+    scene_service = SceneService()
+    container = ServiceContainer(word_service=word_service, scene_service=scene_service)
+
+    # 容器只在第一次使用某个 AI 服务时创建 StoryService，之后都是缓存命中
+    container.get_story_service(args.ai_service)
+
+    print(f"stories file: {Config.STORIES_FILE_PATH}")
+    before = measure(
+        "before",
+        lambda: setup_per_request(word_service, scene_service, args.ai_service),
+        args.iterations,
+    )
+    after = measure(
+        "after",
+        lambda: container.get_story_service(args.ai_service),
+        args.iterations,
+    )
+    print(f"speedup    {before / after:10.0f}x")
@@ -0,0 +1,115 @@
+# benchmarks/bench_stream_first_byte.py
+"""
+比较 /api/v1/stories/generate 和 /api/v1/stories/generate/stream 的首字节时间。
+
+使用本地假 LLM 服务 (模拟 Deepseek，总延迟 --latency 秒，流式输出分 --chunks 段):
+
+- generate: 等待完整的 JSON，计算生词率并保存后才返回响应；
+- stream: 立即返回响应头，模型输出的文本以 SSE token 事件转发，最后发送 scored 事件。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_stream_first_byte --requests 5 --latency 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+logging.disable(logging.ERROR)
+
+from benchmarks.fake_llm_server import FakeLLMServer
+
+API_KEY = "benchmark"
+
+
+def measure(client, path: str, body: bytes):
+    """
+    发送请求并逐块读取响应，返回 (首字节, 首个 token 事件, 完成) 的耗时 (秒)
+    """
+    start = time.perf_counter()
+    response = client.post(
+        path,
+        data=body,
+        content_type="application/json",
+        headers={"Authorization": f"Bearer {API_KEY}"},
+        buffered=False,
+    )
+    first_byte = first_token = None
+    for chunk in response.response:
+        now = time.perf_counter() - start
+        if first_byte is None:
+            first_byte = now
+        if first_token is None and b"event: token" in chunk:
+            first_token = now
+    response.close()
+    assert response.status_code == 200, response.status_code
+    return first_byte, first_token, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=10)
+    parser.add_argument("--chunks", type=int, default=50)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.latency, stream_chunks=args.chunks)
+    server.start()
+    temp_dir = tempfile.mkdtemp(prefix="storypal-stream-bench-")
+    os.environ.update(
+        {
+            "API_KEY": API_KEY,
+            "DEEPSEEK_API_KEY": "benchmark",
+            "GEMINI_API_KEY": "benchmark",
+            "DEEPSEEK_BASE_URL": f"http://127.0.0.1:{server.port}",
+            "STORIES_FILE_PATH": os.path.join(temp_dir, "stories.json"),
+            "AI_CACHE_ENABLED": "False",
+            "WORDS_WATCH_INTERVAL": "0",
+        }
+    )
+
+    from app import create_app
+
+    flask_app = create_app()
+    scene_id = next(
+        iter(flask_app.extensions["service_container"].scene_service.scenes)
+    )
+    body = json.dumps(
+        {
+            "vocabulary_level": 100,
+            "scene_id": scene_id,
+            "story_word_count": 100,
+            "new_word_rate": 0.1,
+            "ai_service": "deepseek",
+        }
+    ).encode("utf-8")
+
+    client = flask_app.test_client()
+    results = {"generate": [], "stream": []}
+    # generate_story 会打印完整的提示语，基准测试时不输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.requests):
+            results["generate"].append(
+                measure(client, "/api/v1/stories/generate", body)
+            )
+            results["stream"].append(
+                measure(client, "/api/v1/stories/generate/stream", body)
+            )
+
+    print(
+        f"fake LLM latency {args.latency:.1f}s in {args.chunks} chunks, "
+        f"{args.requests} requests each (median seconds)"
+    )
+    for mode, samples in results.items():
+        first_byte, first_token, total = zip(*samples)
+        tokens = f"{statistics.median(first_token):.3f}" if all(first_token) else "-"
+        print(
+            f"{mode:>8}: first byte {statistics.median(first_byte):.3f}, "
+            f"first token {tokens}, complete {statistics.median(total):.3f}"
+        )
@@ -0,0 +1,153 @@
+# benchmarks/bench_word_models.py
+"""
+用合成词表 (默认 10 万个词) 比较 WordService 加载词表的内存占用和耗时：
+
+- legacy: 变更前的 WordModel (普通对象 + __dict__，每个词调用 datetime.now())；
+- current: 当前的 WordModel (__slots__、共享的词性/级别对象、延迟生成 created_at)，
+  分别测量不使用预编译缓存 (cold，解析 JSON) 和命中缓存 (warm) 的加载。
+
+缓存写入临时目录，不会覆盖 app/data/words.cache；写入缓存的耗时单独输出。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.bench_word_models --words 100000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+logging.disable(logging.WARNING)
+
+from app.config import Config
+from app.services.word_service import WordService
+
+PARTS_OF_SPEECH = ["名词", "动词", "形容词", "副词", "代词", "量词", "短语", "介词"]
+
+
+class LegacyWordModel:
+    """
+    变更前的 WordModel 表示 (BaseModel + WordModel 的属性布局)，仅用于对比。
+    """
+
+    def __init__(
+        self,
+        word_id=None,
+        word=None,
+        chaotong_level=None,
+        hsk_level=None,
+        part_of_speech=None,
+        created_at=None,
+    ):
+        self.id = word_id if word_id else str(uuid.uuid4())
+        self.created_at = (
+            created_at if created_at else datetime.now(timezone.utc).isoformat()
+        )
+        self.word = word
+        self.chaotong_level = chaotong_level
+        self.hsk_level = hsk_level
+        self.part_of_speech = part_of_speech
+
+    @classmethod
+    def from_dict(cls, data):
+        chaotong_level = data.get("chaotong_level")
+        if chaotong_level is not None:
+            chaotong_level = int(chaotong_level)
+        return cls(
+            word_id=data.get("word_id"),
+            word=data.get("word"),
+            chaotong_level=chaotong_level,
+            hsk_level=data.get("hsk_level"),
+            part_of_speech=data.get("part_of_speech"),
+            created_at=data.get("created_at"),
+        )
+
+
+def generate_words(count):
+    rng = random.Random(0)
+    return [
+        {
+            "word_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "word": "".join(
+                chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(1, 4))
+            ),
+            "chaotong_level": 1 + index * 350 // count,
+            "hsk_level": float(rng.randint(1, 9)),
+            "part_of_speech": rng.choice(PARTS_OF_SPEECH),
+        }
+        for index in range(count)
+    ]
+
+
+def load_legacy(path):
+    with open(path, "r", encoding="utf-8") as f:
+        words = {}
+        for item in json.load(f):
+            word_model = LegacyWordModel.from_dict(item)
+            words[word_model.id] = word_model
+        return words
+
+
+def load_current(path, cache_path=None):
+    # cache_path 为 None 时不读写预编译缓存
+    with patch.multiple(Config, WORDS_FILE_PATH=path, WORDS_CACHE_PATH=cache_path):
+        return WordService().words
+
+
+def load_cold(path):
+    return load_current(path)
+
+
+def build_cache(path, cache_path):
+    # 第一次加载解析 JSON 并写入缓存，返回耗时
+    start = time.perf_counter()
+    load_current(path, cache_path)
+    return time.perf_counter() - start
+
+
+def measure(label, loader, path):
+    # 耗时和内存分开测量，避免 tracemalloc 的开销影响耗时
+    gc.collect()
+    start = time.perf_counter()
+    words = loader(path)
+    elapsed = time.perf_counter() - start
+    del words
+    gc.collect()
+    tracemalloc.start()
+    words = loader(path)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<8} {len(words):>8} words  load {elapsed:7.3f}s  "
+        f"retained {retained / 2**20:7.1f} MiB  peak {peak / 2**20:7.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "words.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(generate_words(args.words), f, ensure_ascii=False, indent=4)
+        print(f"synthetic words.json: {os.path.getsize(path) / 2**20:.1f} MiB")
+        measure("legacy", load_legacy, path)
+        measure("cold", load_cold, path)
+        cache_path = os.path.join(directory, "words.cache")
+        elapsed = build_cache(path, cache_path)
+        print(
+            f"words.cache: {os.path.getsize(cache_path) / 2**20:.1f} MiB, "
+            f"first load + write {elapsed:.3f}s"
+        )
+        measure("warm", lambda path: load_current(path, cache_path), path)
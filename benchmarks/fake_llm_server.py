@@ -0,0 +1,162 @@
+# benchmarks/fake_llm_server.py
+"""
+本地假 LLM 服务，供负载测试和流式生成基准测试使用。
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+
+FAKE_STORY = {
+    "title": "问路",
+    "content": "我想去学校。请问，学校在哪儿？一直往前走，然后左拐就到了。谢谢你！",
+    "key_words": ["学校"],
+}
+
+
+class FakeLLMServer:
+    """
+    模拟 OpenAI 兼容的 /chat/completions 接口 (支持 keep-alive)，记录同时处理的调用数。
+
+    每次调用在 latency 秒后返回 FAKE_STORY；"stream": true 的请求把内容分成
+    stream_chunks 段，以 SSE 逐段返回，总耗时同样是 latency 秒。
+    设置 max_concurrency 时，超过这个并发数的调用像真实的 AI 服务一样立即返回 429。
+    """
+
+    def __init__(
+        self, latency: float, stream_chunks: int = 20, max_concurrency: int = 0
+    ):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.rate_limited = 0
+        self.loop = asyncio.new_event_loop()
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(
+                asyncio.start_server(self._handle, sock=self.sock, backlog=1024)
+            )
+            ready.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+
+    def reset(self):
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.rate_limited = 0
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                content_length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        content_length = int(value.strip())
+                request = json.loads(await reader.readexactly(content_length) or b"{}")
+
+                self.calls += 1
+                if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                    self.rate_limited += 1
+                    await self._rate_limited_response(writer)
+                    continue
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                try:
+                    if request.get("stream"):
+                        await self._stream_response(writer)
+                    else:
+                        await asyncio.sleep(self.latency)
+                        await self._json_response(writer)
+                finally:
+                    self.in_flight -= 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _completion(self, object_type: str, choice: dict) -> dict:
+        return {
+            "id": f"chatcmpl-{self.calls}",
+            "object": object_type,
+            "created": int(time.time()),
+            "model": "deepseek-chat",
+            "choices": [dict(choice, index=0)],
+        }
+
+    async def _json_response(self, writer):
+        content = json.dumps(FAKE_STORY, ensure_ascii=False)
+        body = json.dumps(
+            self._completion(
+                "chat.completion",
+                {
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                },
+            ),
+            ensure_ascii=False,
+        ).encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    async def _rate_limited_response(self, writer):
+        body = json.dumps(
+            {"error": {"message": "Rate limit reached", "type": "rate_limit"}}
+        ).encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 429 Too Many Requests\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    async def _stream_response(self, writer):
+        def write_chunk(data: bytes):
+            writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        content = json.dumps(FAKE_STORY, ensure_ascii=False)
+        size = -(-len(content) // self.stream_chunks)
+        for start in range(0, len(content), size):
+            await asyncio.sleep(self.latency / self.stream_chunks)
+            chunk = self._completion(
+                "chat.completion.chunk",
+                {
+                    "finish_reason": None,
+                    "delta": {"content": content[start : start + size]},
+                },
+            )
+            write_chunk(
+                f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+            )
+            await writer.drain()
+        write_chunk(b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
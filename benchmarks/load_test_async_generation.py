@@ -0,0 +1,155 @@
+# benchmarks/load_test_async_generation.py
+"""
+负载测试: 一个工作进程同时能处理多少个 /api/v1/stories/generate 请求。
+
+本地启动一个模拟 Deepseek (OpenAI 兼容) 的假 LLM 服务，每次调用固定延迟后返回故事，
+统计假服务同时处理的调用数 (in-flight) 的峰值:
+
+- sync: 一个同步 WSGI 工作进程 (Flask)，请求依次处理，同时只有一个 AI 调用；
+- async: 一个 ASGI 工作进程 (asgi.py)，所有请求同时到达，在事件循环中等待 AI 服务。
+
+用法 (在项目根目录运行):
+    python -m benchmarks.load_test_async_generation --requests 50 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+
+logging.disable(logging.ERROR)
+
+from benchmarks.fake_llm_server import FakeLLMServer
+
+API_KEY = "load-test"
+
+
+async def call_asgi(application, body: bytes):
+    """
+    在进程内调用 ASGI 应用，返回 (status, response body)。
+    """
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/stories/generate",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"authorization", f"Bearer {API_KEY}".encode("latin-1")),
+        ],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": None, "body": b""}
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        else:
+            response["body"] += message.get("body", b"")
+
+    await application(scope, receive, send)
+    return response["status"], response["body"]
+
+
+def report(mode: str, peak_in_flight: int, statuses, elapsed: float):
+    succeeded = sum(1 for status in statuses if status == 200)
+    print(
+        f"{mode:>5}: {len(statuses)} requests ({succeeded} ok) in {elapsed:.2f}s, "
+        f"{len(statuses) / elapsed:.1f} req/s, "
+        f"peak in-flight LLM calls {peak_in_flight}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.latency)
+    server.start()
+
+    # 在导入 app 之前配置: 使用假 LLM 服务、临时故事文件，关闭生成结果缓存和客户端限流
+    temp_dir = tempfile.mkdtemp(prefix="storypal-load-test-")
+    os.environ.update(
+        {
+            "API_KEY": API_KEY,
+            "DEEPSEEK_API_KEY": "load-test",
+            "GEMINI_API_KEY": "load-test",
+            "DEEPSEEK_BASE_URL": f"http://127.0.0.1:{server.port}",
+            "STORIES_FILE_PATH": os.path.join(temp_dir, "stories.json"),
+            "STORAGE_DURABILITY": "relaxed",
+            "AI_CACHE_ENABLED": "False",
+            "AI_RATE_LIMIT_ENABLED": "False",
+            "AI_HTTP_MAX_CONNECTIONS": str(args.requests),
+            "AI_HTTP_MAX_KEEPALIVE_CONNECTIONS": str(args.requests),
+            "WORDS_WATCH_INTERVAL": "0",
+        }
+    )
+
+    from app import create_app
+    from app.asgi import create_asgi_app
+
+    flask_app = create_app()
+    application = create_asgi_app(flask_app)
+    container = flask_app.extensions["service_container"]
+    scene_id = next(iter(container.scene_service.scenes))
+    body = json.dumps(
+        {
+            "vocabulary_level": 100,
+            "scene_id": scene_id,
+            "story_word_count": 100,
+            "new_word_rate": 0.1,
+            "ai_service": "deepseek",
+        }
+    ).encode("utf-8")
+
+    # generate_story 会打印完整的提示语，负载测试时不输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = flask_app.test_client()
+        client.post(
+            "/api/v1/stories/generate",
+            data=body,
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {API_KEY}"},
+        )  # 预热: 创建 AI 客户端和已知词汇片段
+        server.reset()
+        start = time.perf_counter()
+        statuses = [
+            client.post(
+                "/api/v1/stories/generate",
+                data=body,
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {API_KEY}"},
+            ).status_code
+            for _ in range(args.requests)
+        ]
+        sync_result = (server.peak_in_flight, statuses, time.perf_counter() - start)
+
+        async def run_async():
+            await call_asgi(application, body)  # 预热: 创建异步 AI 客户端
+            server.reset()
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(call_asgi(application, body) for _ in range(args.requests))
+            )
+            elapsed = time.perf_counter() - start
+            await container.aclose()
+            return server.peak_in_flight, [status for status, _ in results], elapsed
+
+        async_result = asyncio.run(run_async())
+
+    print(
+        f"{args.requests} concurrent requests, fake LLM latency {args.latency:.2f}s, "
+        "1 worker"
+    )
+    report("sync", *sync_result)
+    report("async", *async_result)
@@ -0,0 +1,177 @@
+# tests/api/test_asgi.py
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from flask import Flask
+from app.api.story_api import story_api
+from app.asgi import AsgiApplication
+
+
+class SlowStoryService:
+    """
+    异步生成故事的 StoryService，记录同时进行的生成数
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def agenerate_story(self, **kwargs):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return MagicMock(to_dict=MagicMock(return_value={"title": "异步故事"}))
+
+
+@pytest.fixture
+def story_service():
+    return SlowStoryService()
+
+
+@pytest.fixture
+def container(story_service):
+    container = MagicMock()
+    container.get_story_service.return_value = story_service
+    container.word_service.get_words.return_value = []
+    container.word_service.count_words_below_level.return_value = 100
+    container.job_queue.get_metrics.return_value = {"queue_depth": 0}
+    container.aclose = AsyncMock()
+    return container
+
+
+@pytest.fixture
+def application(container):
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.extensions["service_container"] = container
+    app.register_blueprint(story_api)
+    return AsgiApplication(app)
+
+
+@pytest.fixture(autouse=True)
+def api_key():
+    with patch(
+        "app.utils.api_key_auth.get_api_key_from_config", return_value="test_key"
+    ):
+        yield
+
+
+GENERATE_REQUEST = {
+    "vocabulary_level": 10,
+    "scene_id": "scene1",
+    "story_word_count": 50,
+    "new_word_rate": 0.1,
+    "ai_service": "deepseek",
+}
+
+
+async def call(application, method, path, body=None, api_key="test_key"):
+    """
+    调用 ASGI 应用，返回 (status, 响应头, 响应体)
+    """
+    headers = [(b"content-type", b"application/json")]
+    if api_key:
+        headers.append((b"authorization", f"Bearer {api_key}".encode()))
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": headers,
+    }
+    messages = [
+        {
+            "type": "http.request",
+            "body": json.dumps(body).encode() if body is not None else b"",
+        }
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    start = sent[0]
+    assert start["type"] == "http.response.start"
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], dict(start["headers"]), body
+
+
+def test_generate_story_is_native_async(application, story_service):
+    """
+    测试生成故事的请求在事件循环中同时处理
+    """
+
+    async def generate_many():
+        return await asyncio.gather(
+            *(
+                call(application, "POST", "/api/v1/stories/generate", GENERATE_REQUEST)
+                for _ in range(5)
+            )
+        )
+
+    for status, headers, body in asyncio.run(generate_many()):
+        assert status == 200
+        assert headers[b"content-type"] == b"application/json"
+        assert headers[b"x-queue-wait-ms"] == b"0"
+        assert json.loads(body)["data"] == {"title": "异步故事"}
+    assert story_service.peak_in_flight == 5
+
+
+def test_generate_story_validation_and_auth(application):
+    """
+    测试原生异步的生成请求和 Flask 视图的认证和参数验证相同
+    """
+    status, _, body = asyncio.run(
+        call(application, "POST", "/api/v1/stories/generate", GENERATE_REQUEST, "bad")
+    )
+    assert status == 401
+    assert json.loads(body)["message"] == "Invalid API Key"
+
+    status, _, body = asyncio.run(
+        call(
+            application,
+            "POST",
+            "/api/v1/stories/generate",
+            dict(GENERATE_REQUEST, vocabulary_level="10"),
+        )
+    )
+    assert status == 400
+    assert "vocabulary_level" in json.loads(body)["message"]
+
+
+def test_other_requests_are_handled_by_flask(application, container):
+    """
+    测试其它请求交给 Flask 应用处理
+    """
+    status, _, body = asyncio.run(
+        call(application, "GET", "/api/v1/stories/jobs/metrics")
+    )
+    assert status == 200
+    assert json.loads(body)["data"] == {"queue_depth": 0}
+
+    status, _, _ = asyncio.run(call(application, "GET", "/api/v1/stories/missing"))
+    assert status == 404
+
+
+def test_lifespan_shutdown_closes_container(application, container):
+    """
+    测试 ASGI 应用退出时关闭服务容器
+    """
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(application({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    container.aclose.assert_awaited_once()
@@ -0,0 +1,328 @@
+# tests/api/test_stories_api.py
+import json
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from app.api.story_api import story_api
+from app.services.batch_story_generator import BatchStoryGenerator
+from app.services.job_queue import Job, LocalJobQueue
+from app.services.resilient_ai_service import CircuitOpenError
+from app.utils.rate_limiter import AIRateLimiter
+
+
+@pytest.fixture
+def story_service():
+    """
+    模拟的 StoryService
+    """
+    service = MagicMock()
+    service.rewrite_story.return_value.to_dict.return_value = {"title": "改写的故事"}
+    return service
+
+
+@pytest.fixture
+def container(story_service):
+    """
+    使用真实 LocalJobQueue 的模拟服务容器
+    """
+    container = MagicMock(job_queue=LocalJobQueue(workers=1, max_queued=5))
+    container.get_story_service.return_value = story_service
+    container.word_service.get_words.return_value = [MagicMock(id="w1")]
+    container.word_service.count_words_below_level.return_value = 100
+    container.batch_generator = BatchStoryGenerator(
+        container.get_story_service, MagicMock(), concurrency_per_backend=2
+    )
+    yield container
+    container.job_queue.shutdown()
+    container.batch_generator.close()
+
+
+@pytest.fixture
+def client(container):
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.extensions["service_container"] = container
+    app.register_blueprint(story_api)
+    return app.test_client()
+
+
+@pytest.fixture
+def headers():
+    with patch(
+        "app.utils.api_key_auth.get_api_key_from_config", return_value="test_key"
+    ):
+        yield {"Authorization": "Bearer test_key"}
+
+
+def poll(client, headers, status_url, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        data = client.get(status_url, headers=headers).get_json()["data"]
+        if data["status"] in (Job.SUCCEEDED, Job.FAILED):
+            return data
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+
+
+def test_rewrite_async_job(client, headers, story_service):
+    """
+    测试异步改写: 立即返回任务 ID，轮询得到结果
+    """
+    response = client.post(
+        "/api/v1/stories/rewrite",
+        json={"original_story_id": "1", "target_level": 10, "async": True},
+        headers=headers,
+    )
+    assert response.status_code == 202
+    submitted = response.get_json()["data"]
+    assert submitted["status_url"] == f"/api/v1/stories/jobs/{submitted['job_id']}"
+
+    job = poll(client, headers, submitted["status_url"])
+    assert job["status"] == Job.SUCCEEDED
+    assert job["result"] == {"title": "改写的故事"}
+    story_service.rewrite_story.assert_called_once_with(
+        original_story_id="1", target_level=10, story_type=2
+    )
+
+    metrics = client.get("/api/v1/stories/jobs/metrics", headers=headers)
+    assert metrics.get_json()["data"]["succeeded"] == 1
+
+
+def test_rewrite_async_job_failure(client, headers, story_service):
+    """
+    测试改写失败时任务状态为 failed
+    """
+    story_service.rewrite_story.return_value = None
+    response = client.post(
+        "/api/v1/stories/rewrite",
+        json={"original_story_id": "1", "target_level": 10, "async": True},
+        headers=headers,
+    )
+    job = poll(client, headers, response.get_json()["data"]["status_url"])
+    assert job["status"] == Job.FAILED
+    assert job["error"] == "Failed to rewrite story"
+
+
+def test_queue_full(client, headers, container):
+    """
+    测试任务队列已满时返回 429
+    """
+    container.job_queue.max_queued = 0
+    response = client.post(
+        "/api/v1/stories/rewrite",
+        json={"original_story_id": "1", "target_level": 10, "async": True},
+        headers=headers,
+    )
+    assert response.status_code == 429
+
+
+def test_invalid_async_flag(client, headers):
+    """
+    测试 async 参数必须是布尔值
+    """
+    response = client.post(
+        "/api/v1/stories/rewrite",
+        json={"original_story_id": "1", "target_level": 10, "async": "yes"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+def test_unknown_job(client, headers):
+    """
+    测试不存在的任务返回 404
+    """
+    response = client.get("/api/v1/stories/jobs/unknown", headers=headers)
+    assert response.status_code == 404
+
+
+def test_generate_batch(client, headers, story_service):
+    """
+    测试批量生成: 按 NDJSON 逐项返回结果，无效项单独报错
+    """
+    story_service.generate_story.side_effect = lambda **kwargs: MagicMock(
+        to_dict=lambda: {"vocabulary_level": kwargs["vocabulary_level"]}
+    )
+    item = {
+        "scene_id": "scene1",
+        "story_word_count": 50,
+        "new_word_rate": 0.1,
+        "key_word_ids": ["w1"],
+    }
+    response = client.post(
+        "/api/v1/stories/generate/batch",
+        json={
+            "items": [
+                dict(item, vocabulary_level=10),
+                dict(item, vocabulary_level=20),
+                dict(item, vocabulary_level="high"),
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    results = {line["index"]: line for line in lines if "index" in line}
+    assert results[0]["data"] == {"vocabulary_level": 10}
+    assert results[1]["data"] == {"vocabulary_level": 20}
+    assert results[2]["status"] == "failed"
+    assert "vocabulary_level" in results[2]["error"]
+    assert lines[-1] == {"status": "done", "total": 3, "succeeded": 2, "failed": 1}
+
+
+@pytest.mark.parametrize("body", [{"items": []}, {"items": "x"}, [{"a": 1}]])
+def test_generate_batch_invalid_items(client, headers, body):
+    """
+    测试 items 不是非空列表时返回 400
+    """
+    response = client.post("/api/v1/stories/generate/batch", json=body, headers=headers)
+    assert response.status_code == 400
+
+
+def parse_sse(text):
+    """
+    解析 SSE 响应体，返回 [(event, data), ...]
+    """
+    events = []
+    for block in text.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+GENERATE_ITEM = {
+    "vocabulary_level": 10,
+    "scene_id": "scene1",
+    "story_word_count": 50,
+    "new_word_rate": 0.1,
+}
+
+
+def test_generate_stream(client, headers, story_service):
+    """
+    测试流式生成: 先转发 token 事件，最后发送 scored 事件
+    """
+    story = MagicMock(to_dict=MagicMock(return_value={"title": "流式故事"}))
+    story_service.generate_story_stream.return_value = iter(
+        [
+            {"event": "token", "data": '{"title": '},
+            {"event": "token", "data": '"流式故事"}'},
+            {"event": "scored", "data": story},
+        ]
+    )
+    response = client.post(
+        "/api/v1/stories/generate/stream", json=GENERATE_ITEM, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert parse_sse(response.get_data(as_text=True)) == [
+        ("token", {"text": '{"title": '}),
+        ("token", {"text": '"流式故事"}'}),
+        ("scored", {"title": "流式故事"}),
+    ]
+    story_service.generate_story_stream.assert_called_once()
+
+
+def test_generate_stream_error_event(client, headers, story_service):
+    """
+    测试流式生成失败时发送 error 事件，参数无效时直接返回 400
+    """
+
+    def failing_events():
+        yield {"event": "token", "data": "{"}
+        raise Exception("AI 服务调用失败: 超时")
+
+    story_service.generate_story_stream.return_value = failing_events()
+    response = client.post(
+        "/api/v1/stories/generate/stream", json=GENERATE_ITEM, headers=headers
+    )
+    assert parse_sse(response.get_data(as_text=True))[-1] == (
+        "error",
+        {"message": "AI 服务调用失败: 超时"},
+    )
+
+    response = client.post(
+        "/api/v1/stories/generate/stream",
+        json=dict(GENERATE_ITEM, **{"async": True}),
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+def test_generate_returns_503_when_circuit_is_open(client, headers, story_service):
+    """
+    测试 AI 服务熔断时返回 503 而不是 500
+    """
+    story_service.generate_story.side_effect = CircuitOpenError("deepseek 已熔断")
+    response = client.post(
+        "/api/v1/stories/generate", json=GENERATE_ITEM, headers=headers
+    )
+    assert response.status_code == 503
+    assert response.get_json()["message"] == "deepseek 已熔断"
+
+
+def test_ai_metrics(client, headers, container):
+    """
+    测试获取 AI 服务的容错计数
+    """
+    container.get_ai_metrics.return_value = {"backends": {"gemini": {"calls": 3}}}
+    response = client.get("/api/v1/stories/ai/metrics", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["data"]["backends"]["gemini"]["calls"] == 3
+
+
+def test_generate_reports_queue_wait(client, headers, story_service):
+    """
+    测试生成故事的响应头包含在 AI 服务限流队列中等待的时间
+    """
+
+    def generate_story(**kwargs):
+        limiter = AIRateLimiter(requests_per_minute=600)
+        limiter._request_bucket.tokens = 0  # 等待约 0.1 秒
+        limiter.acquire()
+        return MagicMock(to_dict=MagicMock(return_value={"title": "故事"}))
+
+    story_service.generate_story.side_effect = generate_story
+    response = client.post(
+        "/api/v1/stories/generate", json=GENERATE_ITEM, headers=headers
+    )
+    assert response.status_code == 200
+    assert int(response.headers["X-Queue-Wait-Ms"]) >= 90
+
+
+def test_generate_max_attempts(client, headers, story_service):
+    """
+    测试 max_attempts 传给生成服务；超出范围返回 400，流式生成不支持多次生成
+    """
+    story_service.generate_story.return_value = MagicMock(
+        to_dict=MagicMock(return_value={"title": "故事"})
+    )
+    response = client.post(
+        "/api/v1/stories/generate",
+        json=dict(GENERATE_ITEM, max_attempts=3),
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert story_service.generate_story.call_args.kwargs["max_attempts"] == 3
+
+    for max_attempts in (0, 100, True, "3"):
+        response = client.post(
+            "/api/v1/stories/generate",
+            json=dict(GENERATE_ITEM, max_attempts=max_attempts),
+            headers=headers,
+        )
+        assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/stories/generate/stream",
+        json=dict(GENERATE_ITEM, max_attempts=2),
+        headers=headers,
+    )
+    assert response.status_code == 400
+    story_service.generate_story_stream.assert_not_called()
@@ -0,0 +1,69 @@
+# tests/api/test_words_api.py
+import pytest
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from app.api.word_api import word_api
+
+
+@pytest.fixture
+def word_service():
+    """
+    模拟的 WordService
+    """
+    return MagicMock()
+
+
+@pytest.fixture
+def client(word_service):
+    """
+    注册 word_api 并使用模拟服务容器的测试客户端
+    """
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.extensions["service_container"] = MagicMock(word_service=word_service)
+    app.register_blueprint(word_api)
+    return app.test_client()
+
+
+@pytest.fixture
+def headers():
+    with patch(
+        "app.utils.api_key_auth.get_api_key_from_config", return_value="test_key"
+    ):
+        yield {"Authorization": "Bearer test_key"}
+
+
+def test_reload_words(client, headers, word_service):
+    """
+    测试重新加载词表接口返回新版本和耗时
+    """
+    word_service.reload.return_value = {
+        "version": 2,
+        "word_count": 3,
+        "reload_ms": 1.5,
+    }
+    response = client.post("/api/v1/words/reload", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {
+        "version": 2,
+        "word_count": 3,
+        "reload_ms": 1.5,
+    }
+
+
+def test_reload_words_failure(client, headers, word_service):
+    """
+    测试重新加载失败时返回 500
+    """
+    word_service.reload.side_effect = FileNotFoundError("words.json")
+    response = client.post("/api/v1/words/reload", headers=headers)
+    assert response.status_code == 500
+
+
+def test_reload_words_requires_api_key(client, word_service):
+    """
+    测试重新加载词表需要 API Key
+    """
+    response = client.post("/api/v1/words/reload")
+    assert response.status_code == 401
+    word_service.reload.assert_not_called()
@@ -1,6 +1,19 @@
 # tests/conftest.py
 import pytest
 from datetime import datetime
+from app.config import Config
+
+
+@pytest.fixture(autouse=True)
+def isolated_words_cache(tmp_path, monkeypatch):
+    """
+    测试中使用临时的词表缓存、模板字节码缓存和 AI 生成结果缓存，避免写入 app/data
+    """
+    monkeypatch.setattr(Config, "WORDS_CACHE_PATH", str(tmp_path / "words.cache"))
+    monkeypatch.setattr(
+        Config, "PROMPT_BYTECODE_CACHE_DIR", str(tmp_path / "prompt_cache")
+    )
+    monkeypatch.setattr(Config, "AI_CACHE_DIR", str(tmp_path / "ai_cache"))
 
 
 @pytest.fixture
@@ -240,3 +240,68 @@ class TestWordService(unittest.TestCase):
 
 if __name__ == "__main__":
     unittest.main()
+
+
+class TestWordModel(unittest.TestCase):
+    """
+    测试词语数据模型 (WordModel) 的紧凑表示。
+    """
+
+    def test_slots(self):
+        """
+        测试 WordModel 不使用 __dict__
+        """
+        word = WordModel(word_id="w1", word="你好", chaotong_level=1)
+        self.assertFalse(hasattr(word, "__dict__"))
+        with self.assertRaises(AttributeError):
+            word.unknown_field = 1
+
+    def test_shared_values(self):
+        """
+        测试词性和级别在不同词语之间共享同一个对象
+        """
+        first = WordModel.from_dict(
+            json.loads(
+                '{"word": "喜欢", "chaotong_level": 300, "part_of_speech": "动词"}'
+            )
+        )
+        second = WordModel.from_dict(
+            json.loads(
+                '{"word": "跑步", "chaotong_level": 300, "part_of_speech": "动词"}'
+            )
+        )
+        self.assertIs(first.part_of_speech, second.part_of_speech)
+        self.assertIs(first.chaotong_level, second.chaotong_level)
+        # 1 和 1.0 不会被合并
+        self.assertIsInstance(
+            WordModel(chaotong_level=1, hsk_level=1.0).hsk_level, float
+        )
+
+    def test_created_at_is_lazy(self):
+        """
+        测试 created_at 在第一次访问时生成，之后保持不变
+        """
+        word = WordModel(word_id="w1", word="你好")
+        self.assertIsNone(word._created_at)
+        created_at = word.to_dict()["created_at"]
+        self.assertIsNotNone(created_at)
+        self.assertEqual(word.created_at, created_at)
+        self.assertEqual(
+            WordModel(word_id="w2", created_at="2025-01-01").created_at, "2025-01-01"
+        )
+
+    def test_pickle_round_trip(self):
+        """
+        测试 WordModel 可以被 pickle (用于进程池和词表缓存)
+        """
+        import pickle
+
+        word = WordModel(
+            word_id="w1",
+            word="你好",
+            chaotong_level=1,
+            hsk_level=1.0,
+            created_at="2025-01-01",
+        )
+        restored = pickle.loads(pickle.dumps(word))
+        self.assertEqual(restored.to_dict(), word.to_dict())
@@ -0,0 +1,92 @@
+# tests/services/test_ai_service_factory.py
+import threading
+import pytest
+from app.config import Config
+from app.services.ai_service_factory import AIServiceFactory
+from app.services.deepseek_service import DeepseekService
+from app.services.gemini_service import GeminiService
+
+
+@pytest.fixture(autouse=True)
+def api_keys(monkeypatch):
+    """
+    设置测试用的 API Key，并在测试前后清空工厂缓存的 AI 服务
+    """
+    monkeypatch.setattr(Config, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "GEMINI_API_KEY", "test-key")
+    AIServiceFactory.close_all()
+    yield
+    AIServiceFactory.close_all()
+
+
+def test_create_ai_service_returns_shared_instance():
+    """
+    测试同一个 AI 服务名称返回同一个实例
+    """
+    deepseek = AIServiceFactory.create_ai_service("deepseek")
+    assert isinstance(deepseek, DeepseekService)
+    assert AIServiceFactory.create_ai_service("deepseek") is deepseek
+    gemini = AIServiceFactory.create_ai_service("gemini")
+    assert isinstance(gemini, GeminiService)
+    assert AIServiceFactory.create_ai_service("gemini") is gemini
+
+
+def test_create_ai_service_concurrently():
+    """
+    测试多个线程同时获取时只创建一个实例
+    """
+    services = []
+    threads = [
+        threading.Thread(
+            target=lambda: services.append(
+                AIServiceFactory.create_ai_service("deepseek")
+            )
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(services) == 8
+    assert all(service is services[0] for service in services)
+
+
+def test_client_uses_configured_pool(monkeypatch):
+    """
+    测试 HTTP 客户端使用配置的超时设置
+    """
+    monkeypatch.setattr(Config, "AI_HTTP_TIMEOUT", 42.0)
+    monkeypatch.setattr(Config, "AI_HTTP_CONNECT_TIMEOUT", 3.0)
+    deepseek = AIServiceFactory.create_ai_service("deepseek")
+    assert deepseek.client.timeout.read == 42.0
+    assert deepseek.client.timeout.connect == 3.0
+
+
+def test_sdk_timeout_does_not_exceed_call_deadline(monkeypatch):
+    """
+    测试开启容错时 SDK 的超时不超过单次调用的截止时间，并且 SDK 不再自己重试
+    """
+    monkeypatch.setattr(Config, "AI_RESILIENCE_ENABLED", True)
+    monkeypatch.setattr(Config, "AI_HTTP_TIMEOUT", 120.0)
+    monkeypatch.setattr(Config, "AI_CALL_TIMEOUT", 60.0)
+    deepseek = AIServiceFactory.create_ai_service("deepseek")
+    assert deepseek.client.timeout.read == 60.0
+    assert deepseek.client.max_retries == 0
+
+
+def test_close_all_creates_new_instance():
+    """
+    测试 close_all 之后重新创建实例
+    """
+    deepseek = AIServiceFactory.create_ai_service("deepseek")
+    AIServiceFactory.close_all()
+    assert AIServiceFactory.create_ai_service("deepseek") is not deepseek
+
+
+def test_invalid_ai_service_name():
+    """
+    测试无效的 AI 服务名称
+    """
+    with pytest.raises(ValueError):
+        AIServiceFactory.create_ai_service("unknown")
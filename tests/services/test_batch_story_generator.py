@@ -0,0 +1,132 @@
+# tests/services/test_batch_story_generator.py
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from app.services.batch_story_generator import BatchStoryGenerator
+from app.services.cached_ai_service import _bypass_cache
+
+
+def spec(level, ai_service="deepseek", use_cache=True):
+    return {
+        "ai_service": ai_service,
+        "use_cache": use_cache,
+        "kwargs": {"vocabulary_level": level, "scene_id": "scene1"},
+    }
+
+
+class FakeStoryService:
+    """
+    记录最大并发数的 StoryService
+    """
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.bypass = []
+        self._lock = threading.Lock()
+
+    def generate_story(self, vocabulary_level, scene_id):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.bypass.append(_bypass_cache.get())
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if vocabulary_level < 0:
+            raise Exception("AI 服务调用失败")
+        return f"story {vocabulary_level}"
+
+
+@pytest.fixture
+def story_services():
+    return {"deepseek": FakeStoryService(), "gemini": FakeStoryService()}
+
+
+@pytest.fixture
+def generator(story_services):
+    generator = BatchStoryGenerator(
+        story_services.__getitem__, MagicMock(), concurrency_per_backend=2
+    )
+    yield generator
+    generator.close()
+
+
+def test_generate_all_items(generator):
+    """
+    测试返回每一项的结果，并且每个级别只准备一次已知词汇片段
+    """
+    results = list(generator.generate([spec(1), spec(2), spec(1, "gemini")]))
+    assert sorted((index, story) for index, story, _ in results) == [
+        (0, "story 1"),
+        (1, "story 2"),
+        (2, "story 1"),
+    ]
+    assert all(error is None for _, _, error in results)
+    prepared = generator.known_words_cache.get_known_words_section.call_args_list
+    assert sorted(call.args[0] for call in prepared) == [1, 2]
+
+
+def test_concurrency_limit_per_backend(generator, story_services):
+    """
+    测试每个 AI 服务的并发调用数不超过限制，不同 AI 服务之间并行
+    """
+    specs = [spec(level) for level in range(6)]
+    specs += [spec(level, "gemini") for level in range(6)]
+    assert len(list(generator.generate(specs))) == 12
+    assert story_services["deepseek"].max_active == 2
+    assert story_services["gemini"].max_active == 2
+
+
+def test_failed_item(generator):
+    """
+    测试单项失败不影响其他项
+    """
+    results = {
+        index: (story, error)
+        for index, story, error in generator.generate([spec(-1), spec(1)])
+    }
+    assert results[0][0] is None
+    assert str(results[0][1]) == "AI 服务调用失败"
+    assert results[1] == ("story 1", None)
+
+
+def test_use_cache_per_item(generator, story_services):
+    """
+    测试每项可以单独跳过生成结果缓存
+    """
+    list(generator.generate([spec(1, use_cache=False)]))
+    assert story_services["deepseek"].bypass == [True]
+
+
+def test_batches_share_thread_pools(generator, story_services):
+    """
+    测试同时进行的批量请求共享每个 AI 服务的线程池和并发限制
+    """
+    batches = [
+        threading.Thread(target=lambda: list(generator.generate([spec(1)] * 3)))
+        for _ in range(3)
+    ]
+    for batch in batches:
+        batch.start()
+    for batch in batches:
+        batch.join()
+    assert story_services["deepseek"].max_active == 2
+    executor = generator._executors["deepseek"]
+    list(generator.generate([spec(1)]))
+    assert generator._executors["deepseek"] is executor
+
+
+def test_stopping_early_cancels_pending_items(generator, story_services):
+    """
+    测试调用方提前停止时取消尚未开始的项，线程池可以继续使用
+    """
+    story_services["deepseek"].delay = 0.05
+    results = generator.generate([spec(level) for level in range(10)])
+    next(results)
+    results.close()
+    time.sleep(0.2)
+    assert len(story_services["deepseek"].bypass) < 10
+    assert [story for _, story, _ in generator.generate([spec(7)])] == ["story 7"]
@@ -0,0 +1,138 @@
+# tests/services/test_cached_ai_service.py
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.cached_ai_service import (
+    CachedAIService,
+    bypass_generation_cache,
+    normalize_prompt,
+)
+from app.utils.generation_cache import MemoryGenerationCache
+
+
+@pytest.fixture
+def ai_service():
+    """
+    模拟的 AI 服务，每次调用返回一个新的故事
+    """
+    service = MagicMock(model="test-model")
+    service.generate_story.side_effect = lambda prompt: {
+        "title": f"故事 {service.generate_story.call_count}",
+        "content": "你好(PHR)",
+    }
+    return service
+
+
+@pytest.fixture
+def cached_service(ai_service):
+    return CachedAIService(
+        ai_service, "deepseek", MemoryGenerationCache(maxsize=10, ttl=60)
+    )
+
+
+def test_repeated_prompt_is_cached(cached_service, ai_service):
+    """
+    测试相同 (规范化后) 的提示语只调用一次 AI 服务
+    """
+    first = cached_service.generate_story("提示语\n第二行")
+    assert cached_service.generate_story("  提示语  \r\n第二行\n") == first
+    assert ai_service.generate_story.call_count == 1
+    cached_service.generate_story("另一个提示语")
+    assert ai_service.generate_story.call_count == 2
+
+
+def test_cached_result_is_a_copy(cached_service):
+    """
+    测试修改返回的结果不会影响缓存
+    """
+    cached_service.generate_story("提示语")["title"] = "被修改"
+    assert cached_service.generate_story("提示语")["title"] == "故事 1"
+
+
+def test_cache_key_includes_backend_and_model(ai_service):
+    """
+    测试缓存键区分 AI 服务和模型
+    """
+    cache = MemoryGenerationCache(maxsize=10, ttl=60)
+    deepseek = CachedAIService(ai_service, "deepseek", cache)
+    gemini = CachedAIService(ai_service, "gemini", cache)
+    assert deepseek.cache_key("提示语") != gemini.cache_key("提示语")
+    other_model = CachedAIService(MagicMock(model="other"), "deepseek", cache)
+    assert deepseek.cache_key("提示语") != other_model.cache_key("提示语")
+
+
+def test_bypass_generation_cache(cached_service, ai_service):
+    """
+    测试跳过缓存时调用 AI 服务，并用新的结果替换缓存
+    """
+    cached_service.generate_story("提示语")
+    with bypass_generation_cache():
+        fresh = cached_service.generate_story("提示语")
+    assert ai_service.generate_story.call_count == 2
+    assert cached_service.generate_story("提示语") == fresh
+    with bypass_generation_cache(False):
+        cached_service.generate_story("提示语")
+    assert ai_service.generate_story.call_count == 2
+
+
+def test_errors_are_not_cached(cached_service, ai_service):
+    """
+    测试 AI 服务调用失败时不写入缓存
+    """
+    ai_service.generate_story.side_effect = Exception("timeout")
+    with pytest.raises(Exception):
+        cached_service.generate_story("提示语")
+    ai_service.generate_story.side_effect = None
+    ai_service.generate_story.return_value = {"title": "故事"}
+    assert cached_service.generate_story("提示语") == {"title": "故事"}
+
+
+def test_normalize_prompt():
+    """
+    测试提示语规范化: 统一换行符，去掉行尾和首尾空白
+    """
+    assert normalize_prompt(" a  \r\nb\t\n\n") == "a\nb"
+    assert normalize_prompt("a\n  b") == "a\n  b"
+
+
+def test_agenerate_story_shares_cache(cached_service, ai_service):
+    """
+    测试异步生成和同步生成共用缓存
+    """
+    ai_service.agenerate_story = AsyncMock(
+        return_value={"title": "异步故事", "content": "你好(PHR)"}
+    )
+    first = asyncio.run(cached_service.agenerate_story("异步提示语"))
+    assert first["title"] == "异步故事"
+    assert asyncio.run(cached_service.agenerate_story("异步提示语")) == first
+    assert cached_service.generate_story("异步提示语") == first
+    assert ai_service.agenerate_story.await_count == 1
+    assert ai_service.generate_story.call_count == 0
+
+    with bypass_generation_cache():
+        asyncio.run(cached_service.agenerate_story("异步提示语"))
+    assert ai_service.agenerate_story.await_count == 2
+
+
+def test_generate_story_stream_caches_complete_result(cached_service, ai_service):
+    """
+    测试流式生成: 转发 AI 服务的输出，完整的 JSON 写入缓存，之后一次返回
+    """
+    ai_service.generate_story_stream.side_effect = lambda prompt: iter(
+        ['{"title": "流式', '故事"}']
+    )
+    assert list(cached_service.generate_story_stream("提示语")) == [
+        '{"title": "流式',
+        '故事"}',
+    ]
+    chunks = list(cached_service.generate_story_stream("提示语"))
+    assert [json.loads(chunk) for chunk in chunks] == [{"title": "流式故事"}]
+    assert ai_service.generate_story_stream.call_count == 1
+
+    # 不完整的输出不写入缓存
+    ai_service.generate_story_stream.side_effect = lambda prompt: iter(['{"title'])
+    with bypass_generation_cache():
+        stream = cached_service.generate_story_stream("另一个提示语")
+    list(stream)
+    assert cached_service.cache.get(cached_service.cache_key("另一个提示语")) is None
@@ -0,0 +1,161 @@
+# tests/services/test_composite_ai_service.py
+import asyncio
+import time
+import pytest
+from app.services.ai_service import AIService
+from app.services.composite_ai_service import BackendStats, CompositeAIService
+from app.services.resilient_ai_service import (
+    AIServiceUnavailableError,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class FakeBackend(AIService):
+    """
+    固定延迟的 AI 服务，error 不为 None 时抛出该错误
+    """
+
+    def __init__(self, name, latency=0.0, error=None):
+        self.name = name
+        self.model = f"{name}-model"
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+
+    def _result(self):
+        if self.error is not None:
+            raise self.error
+        return {"title": self.name}
+
+    def generate_story(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._result()
+
+    async def agenerate_story(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+    def generate_story_stream(self, prompt):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        yield '{"title": '
+        yield f'"{self.name}"}}'
+
+
+def composite(*backends, **kwargs):
+    options = dict(hedge=False, hedge_default_delay=0.05, hedge_min_delay=0.01)
+    options.update(kwargs)
+    return CompositeAIService(
+        {backend.name: backend for backend in backends}, **options
+    )
+
+
+def test_fails_over_to_next_backend():
+    """
+    测试第一个 AI 服务失败时换下一个，并记录错误率
+    """
+    gemini = FakeBackend("gemini", error=Exception("Gemini AI 服务调用失败"))
+    deepseek = FakeBackend("deepseek")
+    service = composite(gemini, deepseek)
+    assert service.generate_story("提示语") == {"title": "deepseek"}
+    metrics = service.get_metrics()
+    assert metrics["failovers"] == 1
+    assert metrics["backends"]["gemini"]["error_rate"] == 1.0
+    # 失败的服务排到后面
+    assert service.rank() == ["deepseek", "gemini"]
+
+
+def test_routes_by_observed_latency():
+    """
+    测试按观察到的耗时选择更快的 AI 服务
+    """
+    slow = FakeBackend("gemini", latency=0.03)
+    fast = FakeBackend("deepseek", latency=0.0)
+    service = composite(slow, fast)
+    service.generate_story("提示语")  # 没有数据时按配置顺序
+    service.generate_story("提示语")  # 另一个服务没有数据，先尝试它
+    for _ in range(3):
+        assert service.generate_story("提示语") == {"title": "deepseek"}
+    assert slow.calls == 1
+    assert service.rank() == ["deepseek", "gemini"]
+
+
+def test_open_circuit_is_ranked_last():
+    """
+    测试熔断中的 AI 服务排在最后
+    """
+    gemini = FakeBackend("gemini")
+    gemini.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    gemini.circuit_breaker.record_failure()
+    service = composite(gemini, FakeBackend("deepseek"))
+    assert service.rank() == ["deepseek", "gemini"]
+
+
+def test_hedged_request_takes_first_valid_result():
+    """
+    测试第一个服务超过对冲延迟仍未返回时调用下一个，采用先返回的结果
+    """
+    slow = FakeBackend("gemini", latency=0.5)
+    fast = FakeBackend("deepseek", latency=0.0)
+    service = composite(slow, fast, hedge=True)
+    start = time.monotonic()
+    assert service.generate_story("提示语") == {"title": "deepseek"}
+    assert time.monotonic() - start < 0.4
+    metrics = service.get_metrics()
+    assert metrics["hedged"] == 1
+    assert metrics["hedge_wins"] == 1
+
+
+def test_all_backends_unavailable():
+    """
+    测试所有 AI 服务都熔断时抛出 AIServiceUnavailableError
+    """
+    service = composite(
+        FakeBackend("gemini", error=CircuitOpenError("gemini 已熔断")),
+        FakeBackend("deepseek", error=CircuitOpenError("deepseek 已熔断")),
+    )
+    with pytest.raises(AIServiceUnavailableError, match="所有 AI 服务暂时不可用"):
+        service.generate_story("提示语")
+    assert service.get_metrics()["failed"] == 1
+
+
+def test_agenerate_story_hedges_and_cancels_slower_call():
+    """
+    测试异步对冲请求: 采用先返回的结果，取消落后的调用
+    """
+    slow = FakeBackend("gemini", latency=5)
+    fast = FakeBackend("deepseek", latency=0.0)
+    service = composite(slow, fast, hedge=True)
+    start = time.monotonic()
+    assert asyncio.run(service.agenerate_story("提示语")) == {"title": "deepseek"}
+    assert time.monotonic() - start < 1
+    # 被取消的调用不计入统计
+    assert service.stats["gemini"].to_dict()["samples"] == 0
+
+
+def test_stream_fails_over_before_first_chunk():
+    """
+    测试流式生成在输出第一段文本之前失败时换下一个 AI 服务
+    """
+    service = composite(
+        FakeBackend("gemini", error=ConnectionError("down")), FakeBackend("deepseek")
+    )
+    assert "".join(service.generate_story_stream("提示语")) == '{"title": "deepseek"}'
+    assert service.get_metrics()["failovers"] == 1
+
+
+def test_backend_stats_percentiles():
+    """
+    测试耗时分位数和错误率
+    """
+    stats = BackendStats(window=10)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        stats.record(latency, True)
+    stats.record(1.0, False)
+    assert stats.latency_percentile(0.5) == 0.3
+    assert stats.error_rate() == 0.2
+    assert stats.expected_latency() == pytest.approx(0.3 / 0.8)
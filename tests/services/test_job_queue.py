@@ -0,0 +1,97 @@
+# tests/services/test_job_queue.py
+import threading
+import time
+import pytest
+from contextvars import ContextVar
+from app.services.job_queue import Job, JobQueueFullError, LocalJobQueue
+
+
+@pytest.fixture
+def job_queue():
+    queue = LocalJobQueue(workers=1, max_queued=1, result_ttl=60)
+    yield queue
+    queue.shutdown()
+
+
+def wait_for(job: Job, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not job.done:
+        assert time.monotonic() < deadline, f"job {job.id} did not finish"
+        time.sleep(0.01)
+
+
+def test_job_succeeds(job_queue):
+    """
+    测试任务在工作线程中执行并保存结果
+    """
+    job = job_queue.submit("generate", lambda x: {"title": x}, "测试故事")
+    wait_for(job)
+    assert job_queue.get_job(job.id) is job
+    data = job.to_dict()
+    assert data["status"] == Job.SUCCEEDED
+    assert data["result"] == {"title": "测试故事"}
+    assert data["finished_at"] is not None
+    metrics = job_queue.get_metrics()
+    assert metrics["succeeded"] == 1
+    assert metrics["duration_seconds"]["count"] == 1
+
+
+def test_job_fails(job_queue):
+    """
+    测试任务抛出异常时状态为 failed 并记录错误
+    """
+
+    def fail():
+        raise Exception("AI 服务调用失败")
+
+    job = job_queue.submit("rewrite", fail)
+    wait_for(job)
+    assert job.status == Job.FAILED
+    assert job.error == "AI 服务调用失败"
+    assert job_queue.get_metrics()["failed"] == 1
+
+
+def test_queue_is_bounded(job_queue):
+    """
+    测试排队任务达到上限时拒绝新任务
+    """
+    release = threading.Event()
+    running = job_queue.submit("generate", release.wait)
+    while running.status != Job.RUNNING:
+        time.sleep(0.01)
+    queued = job_queue.submit("generate", lambda: None)
+    assert job_queue.get_metrics()["queue_depth"] == 1
+    with pytest.raises(JobQueueFullError):
+        job_queue.submit("generate", lambda: None)
+    assert job_queue.get_metrics()["rejected"] == 1
+    release.set()
+    wait_for(queued)
+    assert job_queue.get_metrics()["queue_depth"] == 0
+
+
+def test_job_runs_in_submitter_context(job_queue):
+    """
+    测试任务在提交时的上下文中执行 (例如跳过生成结果缓存的设置)
+    """
+    flag = ContextVar("flag", default="default")
+    token = flag.set("request")
+    try:
+        job = job_queue.submit("generate", flag.get)
+    finally:
+        flag.reset(token)
+    wait_for(job)
+    assert job.result == "request"
+
+
+def test_finished_jobs_expire():
+    """
+    测试已完成任务的结果过期后被清理
+    """
+    job_queue = LocalJobQueue(workers=1, max_queued=10, result_ttl=0)
+    try:
+        job = job_queue.submit("generate", lambda: None)
+        wait_for(job)
+        job_queue.submit("generate", lambda: None)
+        assert job_queue.get_job(job.id) is None
+    finally:
+        job_queue.shutdown()
@@ -0,0 +1,89 @@
+# tests/services/test_known_words_prompt_cache.py
+import json
+import pytest
+from unittest.mock import patch, mock_open
+from app.models.word_model import WordModel
+from app.services.known_words_prompt_cache import KnownWordsPromptCache
+from app.services.prompt_registry import PromptRegistry
+from app.services.word_service import WordService
+
+
+@pytest.fixture
+def word_service():
+    """
+    包含 1、2、3 级各一个词的 WordService
+    """
+    words = [
+        {"word_id": "w1", "word": "你好", "chaotong_level": 1, "part_of_speech": "PHR"},
+        {"word_id": "w2", "word": "喜欢", "chaotong_level": 2, "part_of_speech": "V"},
+        {"word_id": "w3", "word": "跑步", "chaotong_level": 3, "part_of_speech": "V"},
+    ]
+    with patch(
+        "app.services.word_service.open", mock_open(read_data=json.dumps(words))
+    ):
+        return WordService()
+
+
+@pytest.fixture
+def cache(word_service):
+    return KnownWordsPromptCache(
+        word_service, PromptRegistry(bytecode_cache_dir=""), maxsize=3
+    )
+
+
+def test_get_known_words_json(cache):
+    """
+    测试已知词汇 JSON 与直接序列化的结果一致，并且第二次直接命中缓存
+    """
+    expected = json.dumps(
+        [
+            {"word": "你好", "part_of_speech": "PHR"},
+            {"word": "喜欢", "part_of_speech": "V"},
+        ],
+        ensure_ascii=False,
+    )
+    assert cache.get_known_words_json(3) == expected
+    assert cache.get_known_words_json(3) is cache.get_known_words_json(3)
+    assert cache.misses == 1
+    assert cache.get_known_words_json(3, limit=1) == json.dumps(
+        [{"word": "你好", "part_of_speech": "PHR"}], ensure_ascii=False
+    )
+    assert cache.get_known_words_json(1) == "[]"
+
+
+def test_get_known_words_section(cache):
+    """
+    测试渲染好的已知词汇提示语片段
+    """
+    section = cache.get_known_words_section(2)
+    assert "2 级别以下的词汇" in section
+    assert section.endswith('[{"word": "你好", "part_of_speech": "PHR"}]')
+    assert cache.get_known_words_section(2) is section
+
+
+def test_lru_eviction(cache):
+    """
+    测试超过 maxsize 时淘汰最近最少使用的片段
+    """
+    for level in (1, 2, 3):
+        cache.get_known_words_json(level)
+    cache.get_known_words_json(1)  # 1 级变为最近使用
+    cache.get_known_words_json(4)  # 淘汰 2 级
+    misses = cache.misses
+    cache.get_known_words_json(1)
+    assert cache.misses == misses
+    cache.get_known_words_json(2)
+    assert cache.misses == misses + 1
+
+
+def test_invalidated_on_reload(cache, word_service):
+    """
+    测试词表替换 (重新加载) 后缓存失效
+    """
+    assert cache.get_known_words_json(99).count('"word"') == 3
+    word_service.words = {
+        "w1": WordModel(
+            word_id="w1", word="你好", chaotong_level=1, part_of_speech="PHR"
+        )
+    }
+    assert cache.get_known_words_json(99).count('"word"') == 1
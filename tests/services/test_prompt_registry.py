@@ -0,0 +1,75 @@
+# tests/services/test_prompt_registry.py
+import pytest
+from jinja2 import TemplateNotFound
+from app.services.prompt_registry import PromptRegistry, get_prompt_registry
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    """
+    包含一个静态模板和一个带变量模板的模板目录
+    """
+    (tmp_path / "static.txt").write_text("你好，世界", encoding="utf-8")
+    (tmp_path / "hello.txt").write_text("你好，{{ name }}", encoding="utf-8")
+    return tmp_path
+
+
+def test_render(template_dir):
+    """
+    测试渲染带变量的模板和静态模板
+    """
+    registry = PromptRegistry(str(template_dir), bytecode_cache_dir="")
+    assert registry.render("hello.txt", {"name": "小明"}) == "你好，小明"
+    assert registry.render("static.txt") == "你好，世界"
+    with pytest.raises(TemplateNotFound):
+        registry.render("missing.txt")
+
+
+def test_templates_compiled_once(template_dir):
+    """
+    测试模板只编译一次，静态模板预先渲染
+    """
+    registry = PromptRegistry(str(template_dir), bytecode_cache_dir="")
+    registry.preload()
+    template = registry.get_template("hello.txt")
+    # 模板文件修改后仍然使用编译好的模板 (auto_reload 已关闭)
+    (template_dir / "static.txt").write_text("changed", encoding="utf-8")
+    assert registry.get_template("hello.txt") is template
+    assert registry.render("static.txt") == "你好，世界"
+
+
+def test_bytecode_cache(template_dir, tmp_path):
+    """
+    测试编译结果写入磁盘字节码缓存
+    """
+    cache_dir = tmp_path / "bytecode"
+    registry = PromptRegistry(str(template_dir), bytecode_cache_dir=str(cache_dir))
+    registry.preload()
+    assert len(list(cache_dir.iterdir())) == 2
+    # 新的注册表 (例如重启后) 直接使用字节码缓存
+    registry = PromptRegistry(str(template_dir), bytecode_cache_dir=str(cache_dir))
+    assert registry.render("hello.txt", {"name": "小红"}) == "你好，小红"
+
+
+def test_render_stats(template_dir):
+    """
+    测试每个模板的渲染统计
+    """
+    registry = PromptRegistry(str(template_dir), bytecode_cache_dir="")
+    for name in ("小明", "小红"):
+        registry.render("hello.txt", {"name": name})
+    registry.render("static.txt")
+    stats = registry.get_render_stats()
+    assert stats["hello.txt"]["count"] == 2
+    assert stats["hello.txt"]["static"] is False
+    assert stats["static.txt"]["static"] is True
+    assert stats["hello.txt"]["max_ms"] >= stats["hello.txt"]["avg_ms"] >= 0
+
+
+def test_get_prompt_registry_is_shared():
+    """
+    测试进程内共享同一个注册表，并且已经编译了 app/prompts 中的模板
+    """
+    registry = get_prompt_registry()
+    assert get_prompt_registry() is registry
+    assert registry.render("known_words_section_prompt.txt", {"vocabulary_level": 3})
@@ -0,0 +1,252 @@
+# tests/services/test_resilient_ai_service.py
+import asyncio
+import json
+import threading
+import time
+import httpx
+import pytest
+from app.config import Config
+from app.services.ai_service import AIService
+from app.services.resilient_ai_service import (
+    AIQueueTimeoutError,
+    AIServiceTimeoutError,
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientAIService,
+    is_transient_error,
+)
+from app.utils.rate_limiter import AIRateLimiter
+
+
+class FaultyAIService(AIService):
+    """
+    按顺序注入故障的 AI 服务: faults 中每一项对应一次调用，
+    可以是异常、"slow" (超过截止时间)、"invalid" (无效 JSON) 或 None (正常返回)。
+    """
+
+    def __init__(self, faults, latency=0.5):
+        self.faults = list(faults)
+        self.latency = latency
+        self.calls = 0
+        self.model = "fake-model"
+
+    def _next_fault(self):
+        self.calls += 1
+        return self.faults.pop(0) if self.faults else None
+
+    def _respond(self, fault):
+        if isinstance(fault, Exception):
+            # 与 DeepseekService / GeminiService 一样包装原始错误
+            try:
+                raise fault
+            except Exception as e:
+                raise Exception(f"Fake AI 服务调用失败: {e}")
+        if fault == "invalid":
+            try:
+                return json.loads("not json")
+            except Exception as e:
+                raise Exception(f"Fake AI 服务调用失败: {e}")
+        return {"title": "故事", "content": "你好"}
+
+    def generate_story(self, prompt):
+        fault = self._next_fault()
+        if fault == "slow":
+            time.sleep(self.latency)
+        return self._respond(fault)
+
+    async def agenerate_story(self, prompt):
+        fault = self._next_fault()
+        if fault == "slow":
+            await asyncio.sleep(self.latency)
+        return self._respond(fault)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def resilient(faults, **kwargs):
+    options = dict(
+        timeout=0.05,
+        max_retries=2,
+        backoff_base=0.01,
+        backoff_max=0.01,
+        circuit_breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30),
+        sleep=lambda delay: None,
+    )
+    options.update(kwargs)
+    return ResilientAIService(FaultyAIService(faults), "fake", **options)
+
+
+def test_retries_transient_errors():
+    """
+    测试超时、连接错误和无效 JSON 会重试，成功后返回结果
+    """
+    service = resilient(
+        ["slow", httpx.ConnectError("refused"), "invalid"], max_retries=3
+    )
+    assert service.generate_story("提示语") == {"title": "故事", "content": "你好"}
+    assert service.ai_service.calls == 4
+    metrics = service.get_metrics()
+    assert metrics["retries"] == 3
+    assert metrics["timeouts"] == 1
+    assert metrics["invalid_responses"] == 1
+    assert metrics["succeeded"] == 1
+    assert metrics["circuit"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_gives_up_after_max_retries():
+    """
+    测试重试次数用完后抛出最后一次的错误
+    """
+    service = resilient(["slow"] * 3)
+    with pytest.raises(AIServiceTimeoutError):
+        service.generate_story("提示语")
+    assert service.ai_service.calls == 3
+    assert service.get_metrics()["failed"] == 1
+
+
+def test_permanent_errors_are_not_retried():
+    """
+    测试非临时错误 (例如参数错误) 不重试
+    """
+    service = resilient([ValueError("bad request")])
+    with pytest.raises(Exception, match="bad request"):
+        service.generate_story("提示语")
+    assert service.ai_service.calls == 1
+    assert service.get_metrics()["retries"] == 0
+
+
+def test_circuit_opens_and_recovers():
+    """
+    测试连续失败后熔断 (不再调用 AI 服务)，超时后试探调用成功则恢复
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    service = resilient(
+        [ConnectionError("down")] * 2, max_retries=0, circuit_breaker=breaker
+    )
+    for _ in range(2):
+        with pytest.raises(Exception, match="down"):
+            service.generate_story("提示语")
+    with pytest.raises(CircuitOpenError):
+        service.generate_story("提示语")
+    assert service.ai_service.calls == 2
+    assert service.get_metrics()["rejected"] == 1
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 31
+    assert service.generate_story("提示语")["title"] == "故事"
+    assert breaker.get_stats() == {
+        "state": CircuitBreaker.CLOSED,
+        "consecutive_failures": 0,
+        "times_opened": 1,
+    }
+
+
+def test_request_errors_do_not_open_circuit():
+    """
+    测试参数错误、认证失败和无效 JSON 不计入熔断器，不影响其他调用方
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    service = resilient(
+        [ValueError("401 invalid api key"), ValueError("400 bad request")]
+        + ["invalid"] * 3,
+        max_retries=0,
+        circuit_breaker=breaker,
+    )
+    for _ in range(5):
+        with pytest.raises(Exception):
+            service.generate_story("提示语")
+    assert breaker.get_stats()["consecutive_failures"] == 0
+    assert service.generate_story("提示语")["title"] == "故事"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_executor_queue_wait_does_not_count_against_deadline(monkeypatch):
+    """
+    测试不限流时调用数超过线程数，在线程池中排队的时间不计入截止时间，熔断器保持关闭
+    """
+    monkeypatch.setattr(Config, "AI_CALL_WORKERS", 2)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    service = resilient(["slow"] * 6, max_retries=0, circuit_breaker=breaker)
+    service.ai_service.latency = 0.03  # 排队 0.03 秒以上的调用会超过 0.05 秒的截止时间
+    results = []
+
+    def call():
+        results.append(service.generate_story("提示语")["title"])
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["故事"] * 6
+    assert service.get_metrics()["timeouts"] == 0
+    assert breaker.state == CircuitBreaker.CLOSED
+    service.close()
+
+
+def test_half_open_allows_a_single_probe():
+    """
+    测试半开状态下只允许一次试探调用，试探失败后重新熔断
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_agenerate_story_deadline_and_retry():
+    """
+    测试异步调用同样有截止时间和重试
+    """
+    service = resilient(["slow", None])
+    result = asyncio.run(service.agenerate_story("提示语"))
+    assert result["title"] == "故事"
+    assert service.get_metrics()["timeouts"] == 1
+
+
+def test_is_transient_error_follows_exception_chain():
+    """
+    测试包装后的错误按原始错误判断是否可以重试
+    """
+    try:
+        try:
+            raise httpx.ReadTimeout("timeout")
+        except Exception as e:
+            raise Exception(f"Gemini AI 服务调用失败: {e}")
+    except Exception as wrapped:
+        assert is_transient_error(wrapped)
+    assert not is_transient_error(Exception("Scene id x not found"))
+
+
+def test_each_attempt_waits_for_rate_limiter():
+    """
+    测试每次调用 (包括重试) 都经过限流，调用结束后释放名额；排队超时不调用 AI 服务
+    """
+    limiter = AIRateLimiter(max_in_flight=1, max_wait=0.05)
+    service = resilient([httpx.ConnectError("refused")], rate_limiter=limiter)
+    assert service.generate_story("提示语")["title"] == "故事"
+    assert asyncio.run(service.agenerate_story("提示语"))["title"] == "故事"
+    stats = limiter.get_stats()
+    assert stats["acquired"] == 3
+    assert stats["in_flight"] == 0
+
+    limiter.acquire()  # 占用唯一的名额
+    with pytest.raises(AIQueueTimeoutError):
+        service.generate_story("提示语")
+    assert service.ai_service.calls == 3
+    metrics = service.get_metrics()
+    assert metrics["queue_timeouts"] == 1
+    assert metrics["rate_limit"]["timeouts"] == 1
@@ -2,6 +2,9 @@
 import unittest
 from unittest.mock import patch, mock_open
 import json
+import os
+import tempfile
+from app.config import Config
 from app.services.scene_service import SceneService
 from app.models.scene_model import SceneModel
 
@@ -28,6 +31,17 @@ class TestSceneService(unittest.TestCase):
             },
         ]
         self.sample_scenes_json = json.dumps(self.sample_scenes_data)
+        # 使用临时的场景文件，避免写入 app/data/scenes.json
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.scenes_file_path = os.path.join(temp_dir.name, "scenes.json")
+        with open(self.scenes_file_path, "w", encoding="utf-8") as f:
+            f.write(self.sample_scenes_json)
+        config_patcher = patch.multiple(
+            Config, SCENES_FILE_PATH=self.scenes_file_path, STORAGE_BACKEND="json"
+        )
+        config_patcher.start()
+        self.addCleanup(config_patcher.stop)
 
     def test_load_scenes(self):
         """
@@ -160,6 +174,19 @@ class TestSceneService(unittest.TestCase):
             result = scene_service.delete_scene("not_exist_id")
             self.assertFalse(result)
 
+    def test_changes_are_persisted_to_storage(self):
+        """
+        测试创建、更新和删除场景写入 storage，重新加载后仍然存在
+        """
+        scene = SceneService().create_scene("购物", "学习如何在商店买东西。")
+        SceneService().update_scene("test_scene_id_1", "问路", "新的描述")
+        SceneService().delete_scene("test_scene_id_2")
+
+        scenes = SceneService().scenes
+        self.assertEqual(scenes[scene.id].name, "购物")
+        self.assertEqual(scenes["test_scene_id_1"].description, "新的描述")
+        self.assertNotIn("test_scene_id_2", scenes)
+
 
 if __name__ == "__main__":
     unittest.main()
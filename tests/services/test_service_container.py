@@ -0,0 +1,111 @@
+# tests/services/test_service_container.py
+import pytest
+from unittest.mock import MagicMock
+from app.services.cached_ai_service import CachedAIService
+from app.services.composite_ai_service import CompositeAIService
+from app.services.resilient_ai_service import ResilientAIService
+from app.services.service_container import ServiceContainer
+from app.utils.json_storage import JSONStorage
+
+
+def unwrap_cache(ai_service):
+    """
+    去掉生成结果缓存层 (AI_CACHE_ENABLED 开启时存在)
+    """
+    if isinstance(ai_service, CachedAIService):
+        return ai_service.ai_service
+    return ai_service
+
+
+@pytest.fixture
+def container(tmp_path):
+    """
+    创建一个使用模拟依赖的 ServiceContainer
+    """
+
+    def ai_service_factory(ai_service_name):
+        if ai_service_name not in ("deepseek", "gemini"):
+            raise ValueError(f"无效的 AI 服务名称: {ai_service_name}")
+        return MagicMock(name=ai_service_name)
+
+    return ServiceContainer(
+        word_service=MagicMock(),
+        scene_service=MagicMock(),
+        story_storage=JSONStorage(str(tmp_path / "stories.json")),
+        ai_service_factory=MagicMock(side_effect=ai_service_factory),
+    )
+
+
+def test_story_service_is_cached_per_ai_service(container):
+    """
+    测试同一个 AI 服务名称返回同一个 StoryService
+    """
+    deepseek = container.get_story_service("deepseek")
+    assert container.get_story_service("deepseek") is deepseek
+    gemini = container.get_story_service("gemini")
+    assert gemini is not deepseek
+    assert container.ai_service_factory.call_count == 2
+
+
+def test_story_services_share_dependencies(container):
+    """
+    测试不同 AI 服务的 StoryService 共享同一组依赖
+    """
+    deepseek = container.get_story_service("deepseek")
+    gemini = container.get_story_service("gemini")
+    for story_service in (deepseek, gemini):
+        assert story_service.word_service is container.word_service
+        assert story_service.scene_service is container.scene_service
+        assert story_service.literacy_calculator is container.literacy_calculator
+        assert story_service.story_storage is container.story_storage
+        assert story_service.template_env is container.template_env
+    assert deepseek.ai_service is container.get_ai_service("deepseek")
+
+
+def test_invalid_ai_service_name(container):
+    """
+    测试无效的 AI 服务名称抛出 ValueError 且不被缓存
+    """
+    with pytest.raises(ValueError):
+        container.get_story_service("unknown")
+    with pytest.raises(ValueError):
+        container.get_story_service("unknown")
+
+
+def test_ai_services_are_resilient(container):
+    """
+    测试 AI 服务包装了容错层，计数可以通过 get_ai_metrics 获取
+    """
+    ai_service = container.get_ai_service("deepseek")
+    resilient = unwrap_cache(ai_service)
+    assert isinstance(resilient, ResilientAIService)
+    assert set(container.get_ai_metrics()["backends"]) == {"deepseek"}
+    assert container.get_ai_metrics()["backends"]["deepseek"]["calls"] == 0
+
+
+def test_auto_ai_service_shares_backends(container, monkeypatch):
+    """
+    测试 auto 在可用的 AI 服务之间路由，与单独使用时共享同一个容错层 (熔断器)
+    """
+    monkeypatch.setattr(
+        "app.config.Config.AI_AUTO_BACKENDS", ["gemini", "unknown", "deepseek"]
+    )
+    ai_service = container.get_ai_service("auto")
+    composite = unwrap_cache(ai_service)
+    assert isinstance(composite, CompositeAIService)
+    # 无效的 AI 服务不参与路由
+    assert list(composite.backends) == ["gemini", "deepseek"]
+    deepseek = container.get_ai_service("deepseek")
+    assert composite.backends["deepseek"] is unwrap_cache(deepseek)
+    assert container.get_ai_metrics()["auto"]["requests"] == 0
+
+
+def test_close_is_idempotent(container):
+    """
+    测试多次调用 close 只关闭一次 (ASGI 退出和进程退出时都会调用)
+    """
+    container.job_queue = MagicMock()
+    container.close()
+    container.close()
+    container.word_service.stop_watching.assert_called_once()
+    container.job_queue.shutdown.assert_called_once()
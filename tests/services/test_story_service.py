@@ -1,7 +1,9 @@
 # tests/services/test_story_service.py
+import asyncio
 import pytest
 from unittest.mock import MagicMock
 
+from app.config import Config
 from app.services.story_service import StoryService
 
 
@@ -247,3 +249,251 @@ def test_validate_story(story_service, mock_literacy_calculator):
     )
     assert is_valid == False
     mock_literacy_calculator.calculate_vocabulary_rate.assert_called()  # 确保调用的验证
+
+
+class AsyncStoryAIService:
+    """
+    只实现异步接口的 AI 服务，记录同时进行的调用数
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def agenerate_story(self, prompt):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"title": "测试故事", "content": "你好喜欢", "key_words": []}
+
+
+def test_agenerate_story_runs_concurrently(
+    mock_word_service, mock_scene_service, mock_literacy_calculator
+):
+    """
+    测试异步生成故事: 多个请求同时等待 AI 服务，结果计算生词率并保存
+    """
+    ai_service = AsyncStoryAIService()
+    story_storage = MagicMock()
+    service = StoryService(
+        mock_word_service,
+        mock_scene_service,
+        mock_literacy_calculator,
+        ai_service,
+        story_storage=story_storage,
+        known_words_cache=MagicMock(**{"get_known_words_section.return_value": ""}),
+    )
+
+    async def generate_many():
+        return await asyncio.gather(
+            *(
+                service.agenerate_story(
+                    vocabulary_level=30,
+                    scene_id="scene1",
+                    story_word_count=100,
+                    new_word_rate=0.2,
+                )
+                for _ in range(5)
+            )
+        )
+
+    stories = asyncio.run(generate_many())
+    assert [story.title for story in stories] == ["测试故事"] * 5
+    assert ai_service.peak_in_flight == 5
+    assert story_storage.add.call_count == 5
+    mock_literacy_calculator.calculate_vocabulary_rate.assert_called_with(
+        "你好喜欢", 30
+    )
+
+
+def test_generate_story_stream(story_service, mock_literacy_calculator):
+    """
+    测试流式生成故事: 逐段返回 AI 输出，完整的 JSON 计算生词率后返回 scored 事件
+    """
+    story_service.ai_service = MagicMock()
+    story_service.ai_service.generate_story_stream.return_value = iter(
+        ['{"title": "测试故事", ', '"content": "你好喜欢"}']
+    )
+    story_service.story_storage = MagicMock()
+    story_service.known_words_cache = MagicMock(
+        **{"get_known_words_section.return_value": ""}
+    )
+    events = list(
+        story_service.generate_story_stream(
+            vocabulary_level=30,
+            scene_id="scene1",
+            story_word_count=100,
+            new_word_rate=0.2,
+        )
+    )
+    assert [event["event"] for event in events] == ["token", "token", "scored"]
+    story = events[-1]["data"]
+    assert story.title == "测试故事"
+    story_service.story_storage.add.assert_called_once_with(story.to_dict())
+    mock_literacy_calculator.calculate_vocabulary_rate.assert_called_once_with(
+        "你好喜欢", 30
+    )
+
+    story_service.ai_service.generate_story_stream.return_value = iter(['{"title'])
+    with pytest.raises(Exception, match="AI 服务返回无效的 JSON 格式"):
+        list(
+            story_service.generate_story_stream(
+                vocabulary_level=30,
+                scene_id="scene1",
+                story_word_count=100,
+                new_word_rate=0.2,
+            )
+        )
+
+
+class ScriptedAIService:
+    """
+    按顺序返回故事内容的 AI 服务，记录每次的提示语；error 为异常时抛出
+    """
+
+    def __init__(self, contents):
+        self.contents = list(contents)
+        self.prompts = []
+
+    def generate_story(self, prompt):
+        self.prompts.append(prompt)
+        content = self.contents.pop(0)
+        if isinstance(content, Exception):
+            raise content
+        return {"title": "测试故事", "content": content, "key_words": []}
+
+    async def agenerate_story(self, prompt):
+        return self.generate_story(prompt)
+
+
+# 故事内容 -> (词数, 生词率, 生词列表)
+SCORES = {
+    "生词太多": (100, 0.5, [{"word": "咖啡", "pos": "N", "level": 80}]),
+    "太长": (200, 0.2, []),
+    "刚好": (100, 0.2, []),
+}
+
+
+@pytest.fixture
+def verify_service(mock_word_service, mock_scene_service):
+    calculator = MagicMock()
+    calculator.calculate_vocabulary_rate.side_effect = lambda text, level: SCORES[text]
+
+    def create(contents):
+        return StoryService(
+            mock_word_service,
+            mock_scene_service,
+            calculator,
+            ScriptedAIService(contents),
+            story_storage=MagicMock(),
+            known_words_cache=MagicMock(**{"get_known_words_section.return_value": ""}),
+        )
+
+    return create
+
+
+GENERATE_ARGS = dict(
+    vocabulary_level=30,
+    scene_id="scene1",
+    story_word_count=100,
+    new_word_rate=0.2,
+    new_word_rate_tolerance=0.1,
+    story_word_count_tolerance=20,
+)
+
+
+def test_generate_story_regenerates_until_within_tolerance(verify_service):
+    """
+    测试生词率超出容差时把生词反馈给 AI 服务重新生成，满足要求后停止并只保存最终的故事
+    """
+    service = verify_service(["生词太多", "刚好", "刚好"])
+    story = service.generate_story(**GENERATE_ARGS, max_attempts=3)
+    assert story.content == "刚好"
+    assert story.generation["attempts"] == 2
+    assert story.generation["converged"] is True
+    assert story.generation["stop_reason"] == "converged"
+    assert story.generation["tokens"] > 0
+    # 第二次的提示语包含上一次的故事和超出的生词
+    revision = service.ai_service.prompts[1]
+    assert revision.startswith(service.ai_service.prompts[0])
+    assert "生词太多" in revision and "咖啡" in revision
+    service.story_storage.add.assert_called_once_with(story.to_dict())
+
+
+def test_generate_story_returns_closest_story_when_budget_is_exhausted(verify_service):
+    """
+    测试用完次数或 token 预算时保存最接近要求的故事
+    """
+    service = verify_service(["生词太多", "太长"])
+    story = service.generate_story(**GENERATE_ARGS, max_attempts=2)
+    assert story.content == "生词太多"  # 生词率差 3 个容差，词数差 5 个容差
+    assert story.generation["converged"] is False
+    assert story.generation["stop_reason"] == "max_attempts"
+    assert [item["new_word_rate"] for item in story.generation["history"]] == [
+        0.5,
+        0.2,
+    ]
+
+    service = verify_service(["太长", "刚好"])
+    story = service.generate_story(**GENERATE_ARGS, max_attempts=3, token_budget=10)
+    assert story.generation["attempts"] == 1
+    assert story.generation["stop_reason"] == "token_budget"
+    assert len(service.ai_service.prompts) == 1
+
+
+def test_generate_story_keeps_previous_story_when_retry_fails(verify_service):
+    """
+    测试重新生成时 AI 服务调用失败，使用之前的故事；第一次就失败时抛出错误
+    """
+    service = verify_service(["太长", Exception("超时")])
+    story = service.generate_story(**GENERATE_ARGS, max_attempts=3)
+    assert story.content == "太长"
+    assert story.generation["stop_reason"] == "error"
+
+    service = verify_service([Exception("超时")])
+    with pytest.raises(Exception, match="AI 服务调用失败: 超时"):
+        service.generate_story(**GENERATE_ARGS, max_attempts=3)
+
+
+def test_default_word_count_tolerance_matches_prompt(verify_service, monkeypatch):
+    """
+    测试没有指定词数容差时，提示语中的词数范围与检查时使用的 Config.STORY_WORD_COUNT_TOLERANCE 相同
+    """
+    monkeypatch.setattr(Config, "STORY_WORD_COUNT_TOLERANCE", 100)
+    args = dict(GENERATE_ARGS, story_word_count_tolerance=None)
+    for generate in ("generate_story", "agenerate_story"):
+        service = verify_service(["太长"])
+        result = getattr(service, generate)(**args, max_attempts=2)
+        story = asyncio.run(result) if asyncio.iscoroutine(result) else result
+        # 200 词在 100 ± 100 以内，不需要重新生成
+        assert story.generation["converged"] is True
+        assert "在 0 到 200 词之间" in service.ai_service.prompts[0]
+
+
+def test_stream_prompt_uses_default_word_count_tolerance(verify_service, monkeypatch):
+    """
+    测试流式生成没有指定词数容差时，提示语的词数范围与其他生成接口相同
+    """
+    monkeypatch.setattr(Config, "STORY_WORD_COUNT_TOLERANCE", 20)
+    service = verify_service([])
+    service.ai_service = MagicMock()
+    service.ai_service.generate_story_stream.return_value = iter(
+        ['{"title": "测试故事", "content": "刚好"}']
+    )
+    args = dict(GENERATE_ARGS, story_word_count_tolerance=None)
+    del args["new_word_rate_tolerance"]
+    list(service.generate_story_stream(**args))
+    prompt = service.ai_service.generate_story_stream.call_args.kwargs["prompt"]
+    assert "在 80 到 120 词之间" in prompt
+
+
+def test_agenerate_story_regenerates_until_within_tolerance(verify_service):
+    """
+    测试异步生成同样使用生成-验证循环
+    """
+    service = verify_service(["太长", "刚好"])
+    story = asyncio.run(service.agenerate_story(**GENERATE_ARGS, max_attempts=2))
+    assert story.content == "刚好"
+    assert story.generation["attempts"] == 2
+    assert "请删减内容" in service.ai_service.prompts[1]
@@ -3,7 +3,11 @@ import pytest
 from unittest.mock import patch, mock_open
 from app.services.word_service import WordService
 from app.models.word_model import WordModel
+from app.config import Config
 import json
+import os
+import pickle
+import time
 from typing import List, Dict
 
 
@@ -96,3 +100,188 @@ class TestWordService:  # 继承 unittest.TestCase 去掉
             words = word_service.get_words_below_level(5)
             assert len(words) == 1
             assert words[0].word == "你好"
+
+    def test_get_words_by_surface(self):
+        """
+        测试根据词形 (不区分大小写) 获取词语
+        """
+        self.sample_words_data.append(
+            {
+                "word_id": "test_word_id_4",
+                "word": "喜欢",
+                "chaotong_level": 2,
+                "part_of_speech": "N",
+                "hsk_level": 2,
+            }
+        )
+        with patch(
+            "app.services.word_service.open",
+            mock_open(read_data=json.dumps(self.sample_words_data)),
+        ):
+            word_service = WordService()
+        words = word_service.get_words_by_surface("喜欢")
+        assert [word.id for word in words] == ["test_word_id_2", "test_word_id_4"]
+        words = word_service.get_words_by_surface("喜欢", part_of_speech="N")
+        assert [word.id for word in words] == ["test_word_id_4"]
+        assert word_service.get_words_by_surface("不存在") == []
+
+        # 替换词表后索引随之更新
+        word_service.words = {
+            "english": WordModel(word_id="english", word="Hello", chaotong_level=1)
+        }
+        assert word_service.get_words_by_surface("喜欢") == []
+        assert word_service.get_words_by_surface("HELLO")[0].id == "english"
+
+    def test_level_index(self):
+        """
+        测试按级别分桶的索引和 "低于级别 L" 的计数
+        """
+        with patch(
+            "app.services.word_service.open",
+            mock_open(read_data=self.sample_words_json),
+        ):
+            word_service = WordService()
+        assert word_service.get_total_words() == 3
+        assert word_service.get_total_words(5) == 1
+        assert word_service.get_total_words(7) == 0
+        assert [word.word for word in word_service.get_words(10)] == ["跑步"]
+        assert [word.word for word in word_service.get_words(page=2, page_size=2)] == [
+            "跑步"
+        ]
+        expected_counts = {None: 0, 0: 0, 1: 0, 2: 1, 5: 1, 6: 2, 10: 2, 11: 3, 99: 3}
+        for level, count in expected_counts.items():
+            assert word_service.count_words_below_level(level) == count
+            assert len(word_service.get_words_below_level(level)) == count
+
+        # 替换词表后索引随之更新
+        word_service.words = {
+            "test_word_id_1": WordModel.from_dict(self.sample_words_data[0]),
+        }
+        assert word_service.count_words_below_level(99) == 1
+        assert word_service.get_total_words(5) == 0
+
+
+@pytest.fixture
+def words_file(tmp_path, monkeypatch):
+    """
+    写入临时的 words.json 并让 WordService 读取它
+    """
+    path = tmp_path / "words.json"
+    monkeypatch.setattr(Config, "WORDS_FILE_PATH", str(path))
+
+    def write(words: List[Dict]):
+        path.write_text(json.dumps(words), encoding="utf-8")
+        # 保证修改时间变化，文件监视能够发现修改
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    write(
+        [
+            {
+                "word_id": "w1",
+                "word": "你好",
+                "chaotong_level": 1,
+                "part_of_speech": "PHR",
+            }
+        ]
+    )
+    return write
+
+
+def test_reload_swaps_snapshot(words_file):
+    """
+    测试重新加载词表: 新快照整体替换，旧快照保持不变
+    """
+    word_service = WordService()
+    old_snapshot = word_service.snapshot
+    words_file(
+        [
+            {
+                "word_id": "w1",
+                "word": "你好",
+                "chaotong_level": 1,
+                "part_of_speech": "PHR",
+            },
+            {
+                "word_id": "w2",
+                "word": "喜欢",
+                "chaotong_level": 2,
+                "part_of_speech": "V",
+            },
+        ]
+    )
+
+    result = word_service.reload()
+
+    assert result["version"] == old_snapshot.version + 1
+    assert result["word_count"] == 2
+    assert result["reload_ms"] >= 0
+    assert word_service.count_words_below_level(3) == 2
+    assert word_service.get_words_by_surface("喜欢")[0].id == "w2"
+    # 已经拿到旧快照的计算继续看到旧词表
+    assert len(old_snapshot.words) == 1
+    assert old_snapshot.get_words_by_surface("喜欢") == []
+
+
+def test_reload_keeps_words_on_error(words_file, tmp_path):
+    """
+    测试 words.json 无效时重新加载失败，保留当前词表
+    """
+    word_service = WordService()
+    snapshot = word_service.snapshot
+    (tmp_path / "words.json").write_text("[{", encoding="utf-8")
+
+    with pytest.raises(json.JSONDecodeError):
+        word_service.reload()
+    assert word_service.snapshot is snapshot
+
+
+def test_reload_if_changed(words_file):
+    """
+    测试只有 words.json 发生变化时才重新加载
+    """
+    word_service = WordService()
+    assert word_service.reload_if_changed() is None
+
+    words_file(
+        [{"word_id": "w3", "word": "跑步", "chaotong_level": 3, "part_of_speech": "V"}]
+    )
+    assert word_service.reload_if_changed()["word_count"] == 1
+    assert word_service.get_word_by_id("w3").word == "跑步"
+    assert word_service.reload_if_changed() is None
+
+
+def test_start_watching(words_file):
+    """
+    测试文件监视线程发现修改后自动重新加载
+    """
+    word_service = WordService()
+    word_service.start_watching(interval=0.01)
+    try:
+        words_file(
+            [
+                {
+                    "word_id": "w3",
+                    "word": "跑步",
+                    "chaotong_level": 3,
+                    "part_of_speech": "V",
+                }
+            ]
+        )
+        deadline = time.monotonic() + 5
+        while word_service.get_word_by_id("w3") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert word_service.get_word_by_id("w3") is not None
+    finally:
+        word_service.stop_watching()
+
+
+def test_pickle_copies_snapshot_only(words_file):
+    """
+    测试 WordService 可以被 pickle (进程池)，副本不带锁和监视线程
+    """
+    word_service = WordService()
+    copied = pickle.loads(pickle.dumps(word_service))
+    assert copied.get_word_by_id("w1").word == "你好"
+    assert copied.snapshot.version == word_service.snapshot.version
+    copied.stop_watching()
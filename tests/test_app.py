@@ -0,0 +1,37 @@
+# tests/test_app.py
+from unittest.mock import patch
+from app import create_app
+from app.config import Config
+
+
+def test_create_app_in_testing_mode_starts_no_background_work():
+    """
+    测试模式下不启动词表文件监视，也不注册进程退出时的清理
+    """
+    with patch.object(Config, "WORDS_WATCH_ENABLED", True), patch(
+        "app.atexit.register"
+    ) as register:
+        app = create_app(testing=True)
+    container = app.extensions["service_container"]
+    try:
+        assert app.testing
+        assert container.word_service._watcher is None
+        register.assert_not_called()
+    finally:
+        container.close()
+
+
+def test_create_app_registers_close_on_exit():
+    """
+    测试非测试模式下在进程退出时关闭服务容器，只在打开开关时监视词表文件
+    """
+    with patch.object(Config, "WORDS_WATCH_ENABLED", False), patch(
+        "app.atexit.register"
+    ) as register:
+        app = create_app()
+    container = app.extensions["service_container"]
+    try:
+        register.assert_called_once_with(container.close)
+        assert container.word_service._watcher is None
+    finally:
+        container.close()
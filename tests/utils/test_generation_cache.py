@@ -0,0 +1,128 @@
+# tests/utils/test_generation_cache.py
+import os
+import time
+import pytest
+from unittest.mock import patch
+from app.config import Config
+from app.utils.generation_cache import (
+    DiskGenerationCache,
+    GenerationCacheFactory,
+    MemoryGenerationCache,
+    TieredGenerationCache,
+)
+
+STORY = {"title": "测试故事", "content": "你好(PHR)", "key_words": []}
+
+
+def test_memory_cache_lru():
+    """
+    测试进程内缓存超过 maxsize 时淘汰最近最少使用的条目
+    """
+    cache = MemoryGenerationCache(maxsize=2, ttl=60)
+    cache.set("a", {"title": "a"})
+    cache.set("b", {"title": "b"})
+    assert cache.get("a") == {"title": "a"}  # a 变为最近使用
+    cache.set("c", {"title": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"title": "a"}
+    assert len(cache) == 2
+    assert cache.get_stats() == {"hits": 2, "misses": 1}
+
+
+def test_memory_cache_ttl():
+    """
+    测试进程内缓存的条目过期
+    """
+    cache = MemoryGenerationCache(maxsize=2, ttl=60)
+    with patch("app.utils.generation_cache.time.monotonic", return_value=1000):
+        cache.set("a", STORY)
+    with patch("app.utils.generation_cache.time.monotonic", return_value=1059):
+        assert cache.get("a") == STORY
+    with patch("app.utils.generation_cache.time.monotonic", return_value=1060):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_disk_cache(tmp_path):
+    """
+    测试磁盘缓存的读写、过期和清空
+    """
+    cache = DiskGenerationCache(str(tmp_path), ttl=60)
+    assert cache.get("abcdef") is None
+    cache.set("abcdef", STORY)
+    # 新的实例 (例如另一个进程) 可以读取
+    assert DiskGenerationCache(str(tmp_path), ttl=60).get("abcdef") == STORY
+    with patch("app.utils.generation_cache.time.time", return_value=2**40):
+        assert cache.get("abcdef") is None
+    assert not (tmp_path / "ab" / "abcdef.json").exists()
+
+    cache.set("abcdef", STORY)
+    cache.clear()
+    assert cache.get("abcdef") is None
+
+
+def test_disk_cache_ignores_corrupted_entry(tmp_path):
+    """
+    测试损坏的磁盘缓存条目被当作未命中
+    """
+    cache = DiskGenerationCache(str(tmp_path), ttl=60)
+    (tmp_path / "ab").mkdir()
+    (tmp_path / "ab" / "abcdef.json").write_text("{", encoding="utf-8")
+    assert cache.get("abcdef") is None
+
+
+def test_disk_cache_evicts_oldest_and_expired_entries(tmp_path):
+    """
+    测试写入时清理磁盘缓存: 删除过期的条目，超过 max_entries 时删除最早写入的条目
+    """
+    cache = DiskGenerationCache(str(tmp_path), ttl=60, max_entries=2, sweep_every=1)
+    now = time.time()
+    for age, key in ((30, "aa0001"), (20, "bb0002"), (10, "cc0003")):
+        cache.set(key, {"title": key})
+        os.utime(tmp_path / key[:2] / f"{key}.json", (now - age, now - age))
+    # 每次写入后只保留最近写入的 2 个条目
+    cache.set("dd0004", {"title": "dd0004"})
+    assert cache.get("aa0001") is None
+    assert cache.get("bb0002") is None
+    assert cache.get("cc0003") == {"title": "cc0003"}
+    assert cache.get("dd0004") == {"title": "dd0004"}
+
+    # 过期的条目即使没有再被读取也会被删除
+    old = now - 120
+    os.utime(tmp_path / "cc" / "cc0003.json", (old, old))
+    assert cache.sweep() == 1
+    assert sorted(p.name for p in tmp_path.rglob("*.json")) == ["dd0004.json"]
+    assert cache.get_stats()["evictions"] == 3
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    """
+    测试两级缓存: 磁盘命中的条目提升到进程内缓存
+    """
+    disk = DiskGenerationCache(str(tmp_path), ttl=60)
+    disk.set("abcdef", STORY)
+    cache = TieredGenerationCache(MemoryGenerationCache(maxsize=2, ttl=60), disk)
+    assert cache.get("abcdef") == STORY
+    assert cache.memory.get("abcdef") == STORY
+    cache.set("123456", {"title": "新故事"})
+    assert disk.get("123456") == {"title": "新故事"}
+    assert cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "enabled, cache_dir, expected",
+    [
+        (False, "cache", type(None)),
+        (True, "", MemoryGenerationCache),
+        (True, "cache", TieredGenerationCache),
+    ],
+)
+def test_factory(monkeypatch, tmp_path, enabled, cache_dir, expected):
+    """
+    测试根据配置创建缓存
+    """
+    monkeypatch.setattr(Config, "AI_CACHE_ENABLED", enabled)
+    monkeypatch.setattr(
+        Config, "AI_CACHE_DIR", str(tmp_path / cache_dir) if cache_dir else None
+    )
+    assert isinstance(GenerationCacheFactory.create_cache(), expected)
@@ -0,0 +1,373 @@
+# tests/utils/test_json_storage.py
+import json
+import multiprocessing
+import os
+import time
+import pytest
+from app.config import Config
+from app.utils.json_storage import JSONStorage
+
+
+@pytest.fixture
+def storage_path(tmp_path):
+    """
+    返回一个临时的 JSON 文件路径
+    """
+    return str(tmp_path / "stories.json")
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_snapshot_mode_rewrites_file(storage_path):
+    """
+    测试 snapshot 模式下每次修改都写入完整的 JSON 文件
+    """
+    storage = JSONStorage(storage_path, mode="snapshot")
+    storage.add({"story_id": "s1", "title": "一"})
+    storage.add({"story_id": "s2", "title": "二"})
+    assert [item["story_id"] for item in read_json(storage_path)] == ["s1", "s2"]
+    assert not os.path.exists(f"{storage_path}.journal")
+
+
+def test_journal_mode_appends_operations(storage_path):
+    """
+    测试 journal 模式下修改只追加日志，快照文件保持不变
+    """
+    storage = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    storage.add({"story_id": "s1", "title": "一"})
+    storage.add({"story_id": "s2", "title": "二"})
+    storage.update("s1", {"title": "新一"}, id_field="story_id")
+    storage.delete("s2", id_field="story_id")
+
+    assert read_json(storage_path) == []
+    with open(f"{storage_path}.journal", "r", encoding="utf-8") as f:
+        operations = [json.loads(line) for line in f]
+    assert [op["op"] for op in operations] == ["add", "add", "update", "delete"]
+
+
+def test_journal_mode_replays_on_startup(storage_path):
+    """
+    测试重新打开存储时加载快照并重放日志
+    """
+    storage = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    storage.add({"story_id": "s1", "title": "一"})
+    storage.add({"story_id": "s2", "title": "二"})
+    storage.update("s1", {"title": "新一"}, id_field="story_id")
+    storage.delete("s2", id_field="story_id")
+
+    reopened = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    assert reopened.get_all() == [{"title": "新一", "story_id": "s1"}]
+
+
+def test_journal_mode_compacts_into_snapshot(storage_path):
+    """
+    测试日志达到阈值后压缩为快照并清空日志
+    """
+    storage = JSONStorage(storage_path, mode="journal", compact_threshold=3)
+    for i in range(4):
+        storage.add({"story_id": f"s{i}"})
+
+    assert [item["story_id"] for item in read_json(storage_path)] == ["s0", "s1", "s2"]
+    with open(f"{storage_path}.journal", "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+    reopened = JSONStorage(storage_path, mode="journal", compact_threshold=3)
+    assert [item["story_id"] for item in reopened.get_all()] == [
+        "s0",
+        "s1",
+        "s2",
+        "s3",
+    ]
+
+
+def test_journal_mode_discards_incomplete_trailing_record(storage_path):
+    """
+    测试日志最后一行不完整 (写入中途崩溃) 时被丢弃并截断
+    """
+    storage = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    storage.add({"story_id": "s1"})
+    with open(f"{storage_path}.journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "item": {"story_id": "s2"')
+
+    reopened = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    assert [item["story_id"] for item in reopened.get_all()] == ["s1"]
+
+    reopened.add({"story_id": "s3"})
+    again = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    assert [item["story_id"] for item in again.get_all()] == ["s1", "s3"]
+
+
+def test_journal_mode_recovers_interrupted_compaction(storage_path):
+    """
+    测试压缩在提交点之后中断时，下次启动会补完压缩且不会重复重放日志
+    """
+    storage = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    storage.add({"story_id": "s1"})
+    # 模拟压缩执行到第 2 步后崩溃
+    with open(f"{storage_path}.next", "w", encoding="utf-8") as f:
+        json.dump(storage.get_all(), f)
+    os.replace(f"{storage_path}.journal", f"{storage_path}.journal.compacting")
+
+    reopened = JSONStorage(storage_path, mode="journal", compact_threshold=100)
+    assert [item["story_id"] for item in reopened.get_all()] == ["s1"]
+    assert not os.path.exists(f"{storage_path}.next")
+    assert not os.path.exists(f"{storage_path}.journal.compacting")
+
+
+def test_invalid_mode(storage_path):
+    """
+    测试无效的存储模式
+    """
+    with pytest.raises(ValueError):
+        JSONStorage(storage_path, mode="unknown")
+
+
+def test_find_by_id_uses_configured_id_field(storage_path):
+    """
+    测试按配置的主键字段查找、更新和删除
+    """
+    storage = JSONStorage(storage_path, mode="snapshot", id_field="story_id")
+    storage.add({"story_id": "s1", "title": "一"})
+    storage.add({"story_id": "s2", "title": "二"})
+
+    assert storage.find_by_id("s2")["title"] == "二"
+    assert storage.find_by_id("missing") is None
+    assert storage.update("s1", {"title": "新一"})
+    assert storage.find_by_id("s1") == {"title": "新一", "story_id": "s1"}
+    assert storage.delete("s1")
+    assert storage.find_by_id("s1") is None
+    assert not storage.delete("s1")
+    assert [item["story_id"] for item in storage.get_all()] == ["s2"]
+
+
+def test_secondary_indexes_stay_consistent(storage_path):
+    """
+    测试二级索引在 add/update/delete 和重新加载后保持一致
+    """
+    storage = JSONStorage(
+        storage_path,
+        mode="journal",
+        compact_threshold=100,
+        id_field="story_id",
+        index_fields=("vocabulary_level", "scene_id"),
+    )
+    storage.add({"story_id": "s1", "vocabulary_level": 10, "scene_id": "a"})
+    storage.add({"story_id": "s2", "vocabulary_level": 20, "scene_id": "a"})
+    storage.add({"story_id": "s3", "vocabulary_level": 10, "scene_id": "b"})
+
+    assert [item["story_id"] for item in storage.find_by("vocabulary_level", 10)] == [
+        "s1",
+        "s3",
+    ]
+    storage.update("s1", {"vocabulary_level": 20, "scene_id": "b"})
+    storage.delete("s2")
+    assert [item["story_id"] for item in storage.find_by("vocabulary_level", 20)] == [
+        "s1"
+    ]
+    assert [item["story_id"] for item in storage.find_by("scene_id", "b")] == [
+        "s1",
+        "s3",
+    ]
+    assert storage.find_by("scene_id", "a") == []
+
+    reopened = JSONStorage(
+        storage_path,
+        mode="journal",
+        compact_threshold=100,
+        id_field="story_id",
+        index_fields=("vocabulary_level", "scene_id"),
+    )
+    assert [item["story_id"] for item in reopened.find_by("scene_id", "b")] == [
+        "s1",
+        "s3",
+    ]
+    assert reopened.find_by_id("s2") is None
+    # 未建索引的字段退化为线性扫描
+    assert reopened.find_by("story_id", "s3")[0]["vocabulary_level"] == 10
+
+
+def test_save_is_atomic_and_leaves_no_temp_files(storage_path, tmp_path):
+    """
+    测试保存通过临时文件 + rename 完成，不会留下临时文件
+    """
+    storage = JSONStorage(storage_path, mode="snapshot", durability="strict")
+    storage.add({"story_id": "s1"})
+    assert sorted(os.listdir(tmp_path)) == ["stories.json", "stories.json.lock"]
+
+
+def test_failed_save_keeps_previous_file(storage_path, monkeypatch):
+    """
+    测试写入失败时原文件保持完整，修改保留到下次 flush 重试
+    """
+    storage = JSONStorage(storage_path, mode="snapshot", durability="strict")
+    storage.add({"story_id": "s1"})
+
+    def broken_replace(src, dst):
+        raise IOError("disk full")
+
+    monkeypatch.setattr(os, "replace", broken_replace)
+    storage.add({"story_id": "s2"})
+    assert [item["story_id"] for item in read_json(storage_path)] == ["s1"]
+
+    monkeypatch.undo()
+    assert storage.flush()
+    assert [item["story_id"] for item in read_json(storage_path)] == ["s1", "s2"]
+
+
+def test_batched_durability_coalesces_writes(storage_path, monkeypatch):
+    """
+    测试 batched 模式下时间窗口内的多次修改合并为一次写入
+    """
+    storage = JSONStorage(
+        storage_path, mode="snapshot", durability="batched", flush_interval=60
+    )
+    saves = []
+    original_save = storage._save
+    monkeypatch.setattr(storage, "_save", lambda: saves.append(1) or original_save())
+
+    for i in range(20):
+        storage.add({"story_id": f"s{i}"})
+    assert saves == []
+    assert read_json(storage_path) == []
+
+    storage.close()
+    assert saves == [1]
+    assert len(read_json(storage_path)) == 20
+
+
+def test_batched_durability_flushes_after_interval(storage_path):
+    """
+    测试 batched 模式下修改会在时间窗口结束后自动写入
+    """
+    storage = JSONStorage(
+        storage_path, mode="journal", durability="batched", flush_interval=0.05
+    )
+    storage.add({"story_id": "s1"})
+    storage.add({"story_id": "s2"})
+    deadline = time.time() + 2
+    while storage._pending_operations and time.time() < deadline:
+        time.sleep(0.01)
+
+    with open(f"{storage_path}.journal", "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+
+def test_batch_context_writes_once(storage_path, monkeypatch):
+    """
+    测试 batch() 中的修改在退出时一次性写入
+    """
+    storage = JSONStorage(storage_path, mode="snapshot", durability="strict")
+    saves = []
+    original_save = storage._save
+    monkeypatch.setattr(storage, "_save", lambda: saves.append(1) or original_save())
+
+    with storage.batch():
+        for i in range(5):
+            storage.add({"story_id": f"s{i}"})
+        assert saves == []
+    assert saves == [1]
+    assert len(read_json(storage_path)) == 5
+
+
+def test_corrupted_file_is_moved_aside(storage_path, tmp_path):
+    """
+    测试损坏的文件被重命名保留，而不是在下一次保存时被覆盖
+    """
+    with open(storage_path, "w", encoding="utf-8") as f:
+        f.write('[{"story_id": "s1"}, {"story_id": ')
+
+    storage = JSONStorage(storage_path, mode="snapshot", durability="strict")
+    assert storage.get_all() == []
+    corrupt_files = [name for name in os.listdir(tmp_path) if ".corrupt-" in name]
+    assert len(corrupt_files) == 1
+
+
+def test_invalid_durability(storage_path):
+    """
+    测试无效的持久化级别
+    """
+    with pytest.raises(ValueError):
+        JSONStorage(storage_path, durability="unknown")
+
+
+def _append_stories(path, worker, count):
+    storage = JSONStorage(path, id_field="story_id")
+    for i in range(count):
+        storage.add({"story_id": f"w{worker}-{i}"})
+    storage.close()
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="需要 fork 启动方式",
+)
+@pytest.mark.parametrize("mode", ["snapshot", "journal"])
+def test_concurrent_processes_do_not_lose_writes(storage_path, mode, monkeypatch):
+    """
+    测试多个进程同时写入同一个文件时不会互相覆盖
+    """
+    monkeypatch.setenv("STORAGE_MODE", mode)
+    monkeypatch.setattr(Config, "STORAGE_MODE", mode)
+    JSONStorage(storage_path).close()
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_append_stories, args=(storage_path, worker, 20))
+        for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    storage = JSONStorage(storage_path, id_field="story_id")
+    assert len(storage.get_all()) == 80
+    assert storage.find_by_id("w3-19") is not None
+
+
+def test_reads_see_changes_from_other_instances(storage_path, monkeypatch):
+    """
+    测试读取时检测到其他进程 (此处用另一个实例模拟) 的修改，未变化时不重新读取
+    """
+    writer = JSONStorage(storage_path, mode="journal", id_field="story_id")
+    reader = JSONStorage(storage_path, mode="journal", id_field="story_id")
+
+    reloads = []
+    original_reload = reader._reload
+    monkeypatch.setattr(
+        reader, "_reload", lambda: reloads.append(1) or original_reload()
+    )
+
+    writer.add({"story_id": "s1"})
+    assert reader.find_by_id("s1") == {"story_id": "s1"}
+    writer.update("s1", {"title": "新"})
+    assert reader.find_by_id("s1")["title"] == "新"
+    assert reader.get_all() == [{"title": "新", "story_id": "s1"}]
+    # 只追加了日志，读取新增部分即可，不需要完整重新加载
+    assert reloads == []
+
+    writer.compact()
+    assert reader.get_all() == [{"title": "新", "story_id": "s1"}]
+    assert reloads == [1]
+    assert not reader.reload_if_changed()
+
+
+def test_flush_merges_changes_from_other_instances(storage_path):
+    """
+    测试合并写入时先合并其他实例已写入的数据，而不是覆盖它们
+    """
+    first = JSONStorage(
+        storage_path, mode="snapshot", durability="batched", flush_interval=60
+    )
+    second = JSONStorage(storage_path, mode="snapshot", durability="strict")
+
+    first.add({"id": "a"})
+    second.add({"id": "b"})
+    first.flush()
+
+    assert sorted(item["id"] for item in read_json(storage_path)) == ["a", "b"]
+    assert sorted(item["id"] for item in second.get_all()) == ["a", "b"]
@@ -1,8 +1,9 @@
 # tests/utils/test_literacy_calculator.py
 import pytest
 from app.utils.literacy_calculator import LiteracyCalculator
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, mock_open, patch
 from app.models.word_model import WordModel
+from app.services.word_service import WordService
 
 # 示例词汇数据
 EXAMPLE_WORDS = [
@@ -106,3 +107,107 @@ def test_calculate_vocabulary_rate_with_word_and_unknown_char(literacy_calculato
     known_rate, unknown_rate, _ = literacy_calculator.calculate_vocabulary_rate(text, 5)
     assert abs(known_rate - 1 / 2) < 0.001
     assert abs(unknown_rate - 1 / 2) < 0.001
+
+
+@pytest.fixture
+def indexed_calculator():
+    # 使用真实的 WordService (word_id -> WordModel，中文词性)
+    with patch("app.services.word_service.open", mock_open(read_data="[]")):
+        word_service = WordService()
+    word_service.words = {
+        "w1": WordModel(
+            word_id="w1", word="你好", chaotong_level=1, part_of_speech="短语"
+        ),
+        "w2": WordModel(
+            word_id="w2", word="喜欢", chaotong_level=3, part_of_speech="动词"
+        ),
+        "w3": WordModel(
+            word_id="w3", word="喜欢", chaotong_level=2, part_of_speech="动词"
+        ),
+        "w4": WordModel(
+            word_id="w4", word="白色", chaotong_level=4, part_of_speech="形容词"
+        ),
+    }
+    return LiteracyCalculator(word_service)
+
+
+def test_known_words_use_lowest_level(indexed_calculator):
+    # 喜欢(V) 出现在 2、3 两个级别，以最低级别 2 为准
+    word_count, rate, unknown = indexed_calculator.calculate_vocabulary_rate(
+        "你好(PHR)喜欢(V)白色(ADJ)", 3
+    )
+    assert word_count == 3
+    assert abs(rate - 1 / 3) < 0.001
+    assert unknown == [{"word": "白色", "pos": "ADJ", "level": 4}]
+    assert indexed_calculator._load_known_words(3) == {("你好", "PHR"), ("喜欢", "V")}
+
+
+def test_level_index_built_once_and_rebuilt_on_reload(indexed_calculator):
+    indexed_calculator.calculate_vocabulary_rate("你好(PHR)", 2)
+    index = indexed_calculator._level_index
+    indexed_calculator.calculate_vocabulary_rate("喜欢(V)", 5)
+    assert indexed_calculator._level_index is index
+
+    # 词表被替换 (重新加载) 后重建查找表
+    indexed_calculator.word_service.words = {
+        "w5": WordModel(
+            word_id="w5", word="跑步", chaotong_level=1, part_of_speech="动词"
+        ),
+    }
+    _, rate, _ = indexed_calculator.calculate_vocabulary_rate("跑步(V)", 2)
+    assert rate == 0.0
+    assert indexed_calculator._level_index is not index
+
+
+def test_missing_part_of_speech_below_target_level(indexed_calculator):
+    indexed_calculator.word_service.words["w6"] = WordModel(
+        word_id="w6", word="游泳", chaotong_level=5
+    )
+    indexed_calculator.word_service.words = dict(indexed_calculator.word_service.words)
+    # 缺少词性的词不低于目标级别时不影响计算
+    indexed_calculator.calculate_vocabulary_rate("你好(PHR)", 5)
+    with pytest.raises(ValueError):
+        indexed_calculator.calculate_vocabulary_rate("你好(PHR)", 6)
+
+
+def test_calculate_vocabulary_rates_matches_single(indexed_calculator):
+    items = [
+        ("你好(PHR)喜欢(V)白色(ADJ)", 3),
+        ("白色(ADJ)，跑步(V)", 5),
+        ("你好(PHR)", 1),
+        ("喜欢(V)喜欢(V)", 3),
+    ]
+    expected = [
+        indexed_calculator.calculate_vocabulary_rate(text, level)
+        for text, level in items
+    ]
+    assert indexed_calculator.calculate_vocabulary_rates(items) == expected
+    assert (
+        indexed_calculator.calculate_vocabulary_rates(items, processes=2, chunksize=1)
+        == expected
+    )
+
+
+def test_rescore_stories(tmp_path, indexed_calculator):
+    from app.utils.json_storage import JSONStorage
+    from tools.rescore_stories import rescore_stories
+
+    storage = JSONStorage(str(tmp_path / "stories.json"), id_field="story_id")
+    storage.add(
+        {
+            "story_id": "s1",
+            "content": "你好(PHR)白色(ADJ)",
+            "vocabulary_level": 3,
+            "word_count": 0,
+        }
+    )
+    storage.add({"story_id": "s2", "content": "", "vocabulary_level": 3})
+
+    assert rescore_stories(storage, indexed_calculator, dry_run=True) == (1, 1)
+    assert storage.find_by_id("s1")["word_count"] == 0
+    assert rescore_stories(storage, indexed_calculator) == (1, 1)
+    story = storage.find_by_id("s1")
+    assert story["word_count"] == 2
+    assert story["new_word_rate"] == 0.5
+    assert story["unknown_words"] == [{"word": "白色", "pos": "ADJ", "level": 4}]
+    assert rescore_stories(storage, indexed_calculator) == (1, 0)
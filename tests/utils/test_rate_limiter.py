@@ -0,0 +1,138 @@
+# tests/utils/test_rate_limiter.py
+import asyncio
+import threading
+import time
+import pytest
+from app.utils.rate_limiter import AIRateLimiter, TokenBucket, track_queue_wait
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_token_bucket_refills_over_time():
+    """
+    测试令牌桶按速率补充令牌，不超过容量
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)
+    bucket.consume(1)
+    bucket.consume(1)
+    assert bucket.delay(1) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert bucket.delay(1) == pytest.approx(0.5)
+    clock.now = 100
+    assert bucket.delay(2) == 0
+    # 超过容量的请求按容量计算
+    assert bucket.delay(10) == 0
+
+
+def test_waiters_are_served_in_arrival_order():
+    """
+    测试超过同时进行的调用数时按到达顺序排队
+    """
+    limiter = AIRateLimiter(max_in_flight=1)
+    limiter.acquire()
+    order = []
+
+    def worker(index):
+        limiter.acquire()
+        order.append(index)
+        limiter.release()
+
+    threads = []
+    for index in range(5):
+        thread = threading.Thread(target=worker, args=(index,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: limiter.get_stats()["queued"] == index + 1)
+    limiter.release()
+    for thread in threads:
+        thread.join()
+    assert order == [0, 1, 2, 3, 4]
+    stats = limiter.get_stats()
+    assert stats["in_flight"] == 0
+    assert stats["acquired"] == 6
+
+
+def test_large_request_is_not_starved_by_small_ones():
+    """
+    测试每分钟 token 数用完时，排在前面的大请求先于后到的小请求
+    """
+    limiter = AIRateLimiter(tokens_per_minute=600)  # 每秒补充 10 个
+    limiter.acquire(600)
+    limiter.release()
+    order = []
+
+    def worker(name, tokens):
+        limiter.acquire(tokens)
+        order.append(name)
+        limiter.release()
+
+    large = threading.Thread(target=worker, args=("large", 3))
+    large.start()
+    wait_until(lambda: limiter.get_stats()["queued"] == 1)
+    small = threading.Thread(target=worker, args=("small", 1))
+    small.start()
+    large.join()
+    small.join()
+    assert order == ["large", "small"]
+
+
+def test_queue_wait_is_recorded_per_request():
+    """
+    测试排队时间记录到当前请求，超过 max_wait 时抛出 TimeoutError 并离开队列
+    """
+    limiter = AIRateLimiter(requests_per_minute=600)  # 每 0.1 秒补充一个名额
+    limiter._request_bucket.tokens = 0
+    with track_queue_wait() as queue_wait:
+        limiter.acquire()
+    assert queue_wait.milliseconds >= 90
+
+    limiter = AIRateLimiter(requests_per_minute=60, max_wait=0.05)
+    limiter._request_bucket.tokens = 0
+    with pytest.raises(TimeoutError):
+        limiter.acquire()
+    stats = limiter.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["queued"] == 0
+
+
+def test_aacquire_limits_concurrent_calls():
+    """
+    测试异步调用按到达顺序排队，不超过同时进行的调用数
+    """
+    limiter = AIRateLimiter(max_in_flight=2)
+    in_flight = peak = 0
+    order = []
+
+    async def call(index):
+        nonlocal in_flight, peak
+        await limiter.aacquire()
+        in_flight += 1
+        peak = max(peak, in_flight)
+        order.append(index)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        limiter.release()
+
+    async def main():
+        with track_queue_wait() as queue_wait:
+            await asyncio.gather(*(call(index) for index in range(6)))
+        return queue_wait
+
+    queue_wait = asyncio.run(main())
+    assert peak == 2
+    assert order == list(range(6))
+    assert queue_wait.milliseconds >= 20
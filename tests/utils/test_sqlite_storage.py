@@ -0,0 +1,197 @@
+# tests/utils/test_sqlite_storage.py
+import json
+import pytest
+from app.utils.json_storage import JSONStorage
+from app.utils.sqlite_storage import SQLiteStorage
+from app.utils.storage_factory import StorageFactory
+from tools.migrate_json_to_sqlite import migrate_store
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """
+    返回一个临时的 SQLite 数据库路径
+    """
+    return str(tmp_path / "storypal.db")
+
+
+@pytest.fixture
+def story_storage(db_path):
+    storage = SQLiteStorage(
+        db_path,
+        table="stories",
+        id_field="story_id",
+        index_fields=("vocabulary_level", "scene_id", "created_at"),
+    )
+    yield storage
+    storage.close()
+
+
+def test_crud(story_storage):
+    """
+    测试 add/get_all/find_by_id/update/delete
+    """
+    story_storage.add({"story_id": "s1", "title": "一", "vocabulary_level": 10})
+    story_storage.add({"story_id": "s2", "title": "二", "vocabulary_level": 20})
+
+    assert [item["story_id"] for item in story_storage.get_all()] == ["s1", "s2"]
+    assert story_storage.find_by_id("s2")["title"] == "二"
+    assert story_storage.find_by_id("missing") is None
+
+    assert story_storage.update("s1", {"title": "新一", "vocabulary_level": 30})
+    assert story_storage.find_by_id("s1") == {
+        "title": "新一",
+        "vocabulary_level": 30,
+        "story_id": "s1",
+    }
+    assert not story_storage.update("missing", {"title": "无"})
+
+    assert story_storage.delete("s2")
+    assert not story_storage.delete("s2")
+    assert [item["story_id"] for item in story_storage.get_all()] == ["s1"]
+
+
+def test_indexed_queries(story_storage):
+    """
+    测试按级别、场景过滤并按创建时间排序分页
+    """
+    story_storage.add(
+        {"story_id": "s1", "vocabulary_level": 10, "scene_id": "a", "created_at": "3"}
+    )
+    story_storage.add(
+        {"story_id": "s2", "vocabulary_level": 10, "scene_id": "b", "created_at": "1"}
+    )
+    story_storage.add(
+        {"story_id": "s3", "vocabulary_level": 10, "scene_id": "a", "created_at": "2"}
+    )
+    story_storage.add(
+        {"story_id": "s4", "vocabulary_level": 20, "scene_id": "a", "created_at": "0"}
+    )
+
+    assert [item["story_id"] for item in story_storage.find_by("scene_id", "a")] == [
+        "s1",
+        "s3",
+        "s4",
+    ]
+    items = story_storage.query(
+        {"vocabulary_level": 10, "scene_id": "a"}, order_by="created_at"
+    )
+    assert [item["story_id"] for item in items] == ["s3", "s1"]
+    items = story_storage.query(order_by="created_at", descending=True, limit=2)
+    assert [item["story_id"] for item in items] == ["s1", "s3"]
+    items = story_storage.query({"vocabulary_level": 10}, limit=1, offset=1)
+    assert [item["story_id"] for item in items] == ["s2"]
+    # 未建索引的字段退化为内存过滤
+    items = story_storage.query({"title": None}, order_by="created_at")
+    assert [item["story_id"] for item in items] == ["s4", "s2", "s3", "s1"]
+
+
+def test_batch_rolls_back_on_error(story_storage):
+    """
+    测试 batch() 在同一个事务中提交，出错时整体回滚
+    """
+    with pytest.raises(RuntimeError):
+        with story_storage.batch():
+            story_storage.add({"story_id": "s1"})
+            raise RuntimeError("boom")
+    assert story_storage.get_all() == []
+
+    with story_storage.batch():
+        story_storage.add({"story_id": "s1"})
+        story_storage.add({"story_id": "s2"})
+    assert len(story_storage.get_all()) == 2
+
+
+def test_new_index_fields_are_backfilled(db_path):
+    """
+    测试已有表新增索引字段时自动补列并回填
+    """
+    storage = SQLiteStorage(db_path, table="stories", id_field="story_id")
+    storage.add({"story_id": "s1", "vocabulary_level": 10})
+    storage.close()
+
+    storage = SQLiteStorage(
+        db_path,
+        table="stories",
+        id_field="story_id",
+        index_fields=("vocabulary_level",),
+    )
+    assert storage.query({"vocabulary_level": 10})[0]["story_id"] == "s1"
+    storage.close()
+
+
+def test_json_storage_query_matches_sqlite(tmp_path, story_storage):
+    """
+    测试 JSONStorage 的通用 query 实现与 SQLite 结果一致
+    """
+    json_storage = JSONStorage(
+        str(tmp_path / "stories.json"),
+        id_field="story_id",
+        index_fields=("vocabulary_level",),
+    )
+    for storage in (json_storage, story_storage):
+        storage.add({"story_id": "s1", "vocabulary_level": 10, "created_at": "2"})
+        storage.add({"story_id": "s2", "vocabulary_level": 10, "created_at": "1"})
+        storage.add({"story_id": "s3", "vocabulary_level": 20, "created_at": "0"})
+
+    for storage in (json_storage, story_storage):
+        items = storage.query({"vocabulary_level": 10}, order_by="created_at")
+        assert [item["story_id"] for item in items] == ["s2", "s1"]
+
+
+def test_storage_factory(tmp_path, monkeypatch):
+    """
+    测试根据 Config.STORAGE_BACKEND 创建存储对象
+    """
+    from app.config import Config
+
+    monkeypatch.setattr(Config, "SQLITE_DB_PATH", str(tmp_path / "storypal.db"))
+    assert isinstance(
+        StorageFactory.create_storage(
+            "stories", str(tmp_path / "stories.json"), backend="json"
+        ),
+        JSONStorage,
+    )
+    assert isinstance(
+        StorageFactory.create_storage(
+            "stories", str(tmp_path / "stories.json"), backend="sqlite"
+        ),
+        SQLiteStorage,
+    )
+    with pytest.raises(ValueError):
+        StorageFactory.create_storage(
+            "stories", str(tmp_path / "stories.json"), backend="mongo"
+        )
+    with pytest.raises(ValueError):
+        StorageFactory.create_storage("unknown", str(tmp_path / "x.json"))
+
+
+def test_migrate_store(tmp_path, db_path):
+    """
+    测试把 JSON 文件迁移到 SQLite，重复迁移时跳过已存在的数据
+    """
+    json_path = tmp_path / "stories.json"
+    json_path.write_text(
+        json.dumps(
+            [
+                {"story_id": "s1", "vocabulary_level": 10},
+                {"story_id": "s2", "vocabulary_level": 20},
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    assert migrate_store("stories", str(json_path), db_path) == (2, 0)
+    assert migrate_store("stories", str(json_path), db_path) == (0, 2)
+    assert migrate_store("stories", str(json_path), db_path, replace=True) == (2, 0)
+
+    storage = SQLiteStorage(
+        db_path,
+        table="stories",
+        id_field="story_id",
+        index_fields=("vocabulary_level",),
+    )
+    assert [item["story_id"] for item in storage.find_by("vocabulary_level", 20)] == [
+        "s2"
+    ]
+    storage.close()
@@ -0,0 +1,95 @@
+# tests/utils/test_vocabulary_cache.py
+import json
+import os
+from unittest.mock import patch
+from app.config import Config
+from app.services.word_service import WordService
+from app.utils import vocabulary_cache
+
+SAMPLE_WORDS = [
+    {
+        "word_id": "w1",
+        "word": "你好",
+        "chaotong_level": 1,
+        "hsk_level": 1.0,
+        "part_of_speech": "短语",
+    },
+    {
+        "word_id": "w2",
+        "word": "喜欢",
+        "chaotong_level": 2,
+        "hsk_level": 2.0,
+        "part_of_speech": "动词",
+        "created_at": "2025-01-01T00:00:00+00:00",
+    },
+]
+
+
+def write_words(path, words):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(words, f, ensure_ascii=False)
+
+
+def test_word_service_uses_cache(tmp_path, monkeypatch):
+    """
+    测试第二次加载直接使用缓存，结果与解析 JSON 一致
+    """
+    words_path = str(tmp_path / "words.json")
+    write_words(words_path, SAMPLE_WORDS)
+    monkeypatch.setattr(Config, "WORDS_FILE_PATH", words_path)
+
+    parsed = WordService()
+    assert os.path.exists(Config.WORDS_CACHE_PATH)
+    with patch("app.services.word_service.json.loads") as json_loads:
+        cached = WordService()
+    json_loads.assert_not_called()
+    assert [word.to_row() for word in cached.words.values()] == [
+        word.to_row() for word in parsed.words.values()
+    ]
+    assert cached.get_words_by_surface("喜欢")[0].created_at == (
+        "2025-01-01T00:00:00+00:00"
+    )
+
+
+def test_cache_rebuilt_when_words_change(tmp_path, monkeypatch):
+    """
+    测试 words.json 内容变化后自动重建缓存
+    """
+    words_path = str(tmp_path / "words.json")
+    write_words(words_path, SAMPLE_WORDS)
+    monkeypatch.setattr(Config, "WORDS_FILE_PATH", words_path)
+    assert len(WordService().words) == 2
+
+    write_words(words_path, SAMPLE_WORDS[:1])
+    assert list(WordService().words) == ["w1"]
+    with patch("app.services.word_service.json.loads") as json_loads:
+        assert list(WordService().words) == ["w1"]
+    json_loads.assert_not_called()
+
+
+def test_corrupted_cache_is_ignored(tmp_path, monkeypatch):
+    """
+    测试缓存文件损坏时重新解析 words.json
+    """
+    words_path = str(tmp_path / "words.json")
+    write_words(words_path, SAMPLE_WORDS)
+    monkeypatch.setattr(Config, "WORDS_FILE_PATH", words_path)
+    with open(Config.WORDS_CACHE_PATH, "wb") as f:
+        f.write(b"not a pickle")
+    assert len(WordService().words) == 2
+    key = vocabulary_cache.source_key(
+        open(words_path, encoding="utf-8").read(), words_path
+    )
+    assert len(vocabulary_cache.load(Config.WORDS_CACHE_PATH, key)) == 2
+
+
+def test_cache_disabled(tmp_path, monkeypatch):
+    """
+    测试 WORDS_CACHE_PATH 为空时不使用缓存
+    """
+    words_path = str(tmp_path / "words.json")
+    write_words(words_path, SAMPLE_WORDS)
+    monkeypatch.setattr(Config, "WORDS_FILE_PATH", words_path)
+    monkeypatch.setattr(Config, "WORDS_CACHE_PATH", None)
+    assert len(WordService().words) == 2
+    assert os.listdir(tmp_path) == ["words.json"]
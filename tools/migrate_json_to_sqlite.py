@@ -0,0 +1,98 @@
+# tools/migrate_json_to_sqlite.py
+import argparse
+import logging
+import os
+import sys
+from typing import Tuple
+
+# 直接运行脚本 (python tools/xxx.py) 时把项目根目录加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.utils.json_storage import JSONStorage
+from app.utils.sqlite_storage import SQLiteStorage
+from app.utils.storage_factory import STORE_SCHEMAS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 需要迁移的存储: 存储名称 -> JSON 文件路径
+JSON_STORES = {
+    "stories": Config.STORIES_FILE_PATH,
+    "scenes": Config.SCENES_FILE_PATH,
+}
+
+
+def migrate_store(
+    store_name: str, json_file_path: str, db_path: str, replace: bool = False
+) -> Tuple[int, int]:
+    """
+    把一个 JSON 存储 (快照 + 日志) 中的数据迁移到 SQLite 表中，整个表在一个事务中写入。
+
+    Args:
+        store_name: 存储名称，例如 stories。
+        json_file_path: JSON 文件路径。
+        db_path: SQLite 数据库文件路径。
+        replace: 数据库中已存在相同 ID 时是否用 JSON 中的数据覆盖 (默认跳过)。
+
+    Returns:
+        (写入条数, 跳过条数)
+    """
+    schema = STORE_SCHEMAS[store_name]
+    source = JSONStorage(json_file_path, id_field=schema["id_field"])
+    target = SQLiteStorage(
+        db_path,
+        table=store_name,
+        id_field=schema["id_field"],
+        index_fields=schema["index_fields"],
+    )
+    written, skipped = 0, 0
+    try:
+        with target.batch():
+            for item in source.get_all():
+                item_id = item.get(schema["id_field"])
+                if item_id is not None and target.find_by_id(item_id) is not None:
+                    if not replace:
+                        skipped += 1
+                        continue
+                    target.update(item_id, item)
+                else:
+                    target.add(item)
+                written += 1
+    finally:
+        source.close()
+        target.close()
+    logger.info(
+        f"Migrated {store_name}: {written} written, {skipped} skipped ({json_file_path} -> {db_path})"
+    )
+    return written, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="把 stories.json / scenes.json 一次性迁移到 SQLite 数据库。"
+    )
+    parser.add_argument(
+        "--db",
+        default=Config.SQLITE_DB_PATH,
+        help=f"目标 SQLite 数据库文件。默认为 {Config.SQLITE_DB_PATH}。",
+    )
+    parser.add_argument(
+        "--store",
+        choices=sorted(JSON_STORES),
+        action="append",
+        help="只迁移指定的存储，可重复指定。默认迁移全部。",
+    )
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="数据库中已存在相同 ID 时用 JSON 中的数据覆盖 (默认跳过)。",
+    )
+    args = parser.parse_args()
+
+    for store_name in args.store or sorted(JSON_STORES):
+        written, skipped = migrate_store(
+            store_name, JSON_STORES[store_name], args.db, replace=args.replace
+        )
+        print(f"{store_name}: 写入 {written} 条，跳过 {skipped} 条")
+    print("迁移完成。设置 STORAGE_BACKEND=sqlite 后启动服务即可使用 SQLite 存储。")
@@ -0,0 +1,100 @@
+# tools/rescore_stories.py
+import argparse
+import logging
+import os
+import sys
+from typing import Tuple
+
+# 直接运行脚本 (python tools/xxx.py) 时把项目根目录加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.services.word_service import WordService
+from app.utils.base_storage import BaseStorage
+from app.utils.literacy_calculator import LiteracyCalculator
+from app.utils.storage_factory import StorageFactory
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rescore_stories(
+    storage: BaseStorage,
+    literacy_calculator: LiteracyCalculator,
+    processes: int = None,
+    dry_run: bool = False,
+) -> Tuple[int, int]:
+    """
+    用当前词表重新计算所有故事的 word_count、new_word_rate 和 unknown_words，
+    并在一次批量写入中保存发生变化的故事。
+
+    Args:
+        storage: 故事存储。
+        literacy_calculator: 生词率计算器。
+        processes: 进程池大小，为空时在当前进程中计算。
+        dry_run: 只统计变化，不写入存储。
+
+    Returns:
+        (重新计算的故事数, 发生变化的故事数)
+    """
+    stories = [
+        story
+        for story in storage.get_all()
+        if story.get("content") and isinstance(story.get("vocabulary_level"), int)
+    ]
+    results = literacy_calculator.calculate_vocabulary_rates(
+        [(story["content"], story["vocabulary_level"]) for story in stories],
+        processes=processes,
+    )
+
+    changed = []
+    for story, (word_count, new_word_rate, unknown_words) in zip(stories, results):
+        scores = {
+            "word_count": word_count,
+            "new_word_rate": new_word_rate,
+            "unknown_words": unknown_words,
+        }
+        if any(story.get(key) != value for key, value in scores.items()):
+            # 不修改 get_all() 返回的对象，dry run 时存储内容保持不变
+            changed.append({**story, **scores})
+
+    if changed and not dry_run:
+        with storage.batch():
+            for story in changed:
+                storage.update(story[storage.id_field], story)
+    logger.info(
+        f"Rescored {len(stories)} stories, {len(changed)} changed"
+        + (" (dry run)" if dry_run else "")
+    )
+    return len(stories), len(changed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="词表变化后，重新计算 stories.json 中所有故事的词数和生词率。"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="并行计算使用的进程数。默认在当前进程中计算。",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="只统计发生变化的故事，不写入文件。",
+    )
+    args = parser.parse_args()
+
+    word_service = WordService()
+    story_storage = StorageFactory.create_storage("stories", Config.STORIES_FILE_PATH)
+    try:
+        total, changed = rescore_stories(
+            story_storage,
+            LiteracyCalculator(word_service),
+            processes=args.processes,
+            dry_run=args.dry_run,
+        )
+    finally:
+        story_storage.close()
+    print(f"重新计算 {total} 个故事，其中 {changed} 个发生变化。")